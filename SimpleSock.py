@@ -1,17 +1,36 @@
 # Wichtige Bibliotheken importieren
-import pystray
-from PIL import Image
 import os
 import subprocess
 import threading
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
 import json
 import sys
-import winreg
 import time
-import webbrowser
 import locale
+import re
+import functools
+import hashlib
+import shutil
+import socket
+import struct
+import random
+import string
+import collections
+import array
+import bisect
+import contextlib
+import itertools
+import queue
+
+# Zeitpunkt, ab dem --startup-timing die Startphasen misst
+STARTUP_TIME = time.perf_counter()
+
+# GUI-Bibliotheken werden erst im Tray-Modus geladen (siehe import_gui_modules),
+# damit der Dienst-Modus ohne Tkinter, Pillow und pystray auskommt. Module, die nur
+# für einzelne Funktionen gebraucht werden (z.B. sqlite3, gzip, multiprocessing.connection,
+# zipfile, webbrowser), werden erst an der jeweiligen Stelle importiert.
+pystray = None
+Image = ImageDraw = None
+tk = filedialog = messagebox = ttk = None
 
 # --- Anwendungs- und Versionsinformationen ---
 APP_NAME = 'SimpleSock'
@@ -25,10 +44,292 @@ DEFAULT_WIRESOCK_PATH = 'C:\\Program Files\\WireSock Secure Connect\\bin\\wireso
 
 # Dateinamen für die Konfigurationsverwaltung und den Autostart-Key definieren
 SETTINGS_FILE = 'app_settings.json'
+SETTINGS_SAVE_DELAY = 0.5       # Sekunden, in denen Änderungen zu einem Schreibvorgang gebündelt werden
+CONFIG_INDEX_FILE = 'config_index.json'
+CONFIG_INDEX_VERSION = 1
+SEARCH_FIELDS = ('endpoint', 'address', 'allowed_ips', 'dns')  # Durchsuchte Felder der Konfigurationen
+SEARCH_NGRAM = 3                    # Länge der indexierten Zeichenfolgen für die Teilstringsuche
+CONFIG_WATCH_INTERVAL = 2.0         # Sekunden zwischen zwei Vergleichen ohne Benachrichtigungen des Systems
+CONFIG_WATCH_DEBOUNCE = 0.3         # Sekunden, in denen zusammengehörige Änderungen gesammelt werden
+
+# Import mehrerer Konfigurationen
+IMPORT_WORKERS = 8                  # Anzahl paralleler Worker für Kopieren und Validieren
+MAX_CONFIG_SIZE = 1024 * 1024       # Größere Dateien werden nicht als Konfiguration akzeptiert
+IMPORT_REPORT_MAX_LINES = 10        # Maximal aufgeführte ungültige Dateien in der Zusammenfassung
+
+# Latenzmessung für "Mit schnellster verbinden"
+PROBE_METHOD_ICMP = 'icmp'          # Ping über das System-Kommando (WireGuard antwortet nicht auf fremde UDP-Pakete)
+PROBE_METHOD_UDP = 'udp'            # UDP-Paket senden und auf eine Antwort warten (z.B. Echo-Dienste)
+DEFAULT_PROBE_METHOD = PROBE_METHOD_ICMP
+DEFAULT_PROBE_TIMEOUT = 1.0         # Sekunden pro Endpunkt
+PROBE_CONCURRENCY = 16              # Maximale Anzahl gleichzeitiger Messungen
+PROBE_CACHE_TTL = 300               # Sekunden, die ein Messergebnis gültig bleibt
+PROBE_PAYLOAD = b'SimpleSock probe'
+
+# Vorab-Auflösung der Endpunkt-Hostnamen
+DNS_TIMEOUT = 2.0                   # Sekunden pro Anfrage
+DNS_DEFAULT_TTL = 300               # Gültigkeit ohne TTL aus der Antwort (Resolver des Systems)
+DNS_MIN_TTL = 30
+DNS_MAX_TTL = 3600
+DNS_STALE_LIMIT = 86400             # Wie lange ein abgelaufener Eintrag noch verwendet wird, während er erneuert wird
+DNS_REFRESH_INTERVAL = 15           # Sekunden zwischen zwei Durchläufen der Hintergrund-Aktualisierung
+DNS_RECORD_A = 1
+DNS_RECORD_AAAA = 28
 AUTOSTART_REGISTRY_KEY = 'SimpleSockTrayUI'
 LANG_DIR = 'lang'
 DEFAULT_LANG = 'en'
-TRANSLATIONS = {}
+TRANSLATION_CACHE_SIZE = 4096   # Zwischengespeicherte formatierte Texte, danach wird der Speicher geleert
+
+# Zustände einer Verbindung (idle -> spawning -> handshaking -> connected / failed)
+STATE_IDLE = 'idle'
+STATE_SPAWNING = 'spawning'
+STATE_HANDSHAKING = 'handshaking'
+STATE_CONNECTED = 'connected'
+STATE_FAILED = 'failed'
+STATE_RECONNECTING = 'reconnecting'     # Nur vom ConnectionSupervisor gemeldet
+# Erlaubte Wechsel innerhalb einer Verbindung (gleiche id); failed und idle beenden sie jederzeit
+TUNNEL_TRANSITIONS = {
+    STATE_SPAWNING: (STATE_HANDSHAKING, STATE_RECONNECTING),
+    STATE_HANDSHAKING: (STATE_CONNECTED, STATE_RECONNECTING),
+    STATE_CONNECTED: (STATE_RECONNECTING,),
+    STATE_RECONNECTING: (STATE_SPAWNING,),
+}
+
+# Ausgabezeilen von wiresock-client, an denen ein fertiger Tunnel erkannt wird
+DEFAULT_READY_PATTERNS = [
+    r'handshake (response )?(received|completed|complete)',
+    r'tunnel (has been |is )?(started|established|ready|up)',
+]
+# Maximale Wartezeit in Sekunden bis zum Handshake
+DEFAULT_CONNECT_TIMEOUT = 20
+
+# Automatischer Neustart abgestürzter Verbindungen (überschreibbar über settings["reconnect"])
+DEFAULT_RECONNECT_POLICY = {
+    "enabled": True,
+    "base_delay": 1.0,          # Sekunden bis zum ersten Neustart, danach exponentiell
+    "max_delay": 60.0,          # Obergrenze für die Wartezeit
+    "max_restarts": 5,          # Maximale Neustarts innerhalb von restart_window
+    "restart_window": 600,      # Sekunden
+    "stall_timeout": 0,         # Sekunden ohne Ausgabe, nach denen neu gestartet wird (0 = aus, opt-in:
+                                # ohne Verkehr liefert auch ein intakter Tunnel keine Ausgabe)
+    "failover_after": 3,        # Fehlversuche, nach denen auf die Ersatzverbindung gewechselt wird
+}
+
+# Puffer für die Ausgabe von wiresock-client
+LOG_BUFFER_LINES = 2000         # Zeilen im Ringpuffer zwischen zwei Aktualisierungen
+DEFAULT_STATUS_MAX_LINES = 500  # Maximale Zeilen im Textfeld des Statusfensters
+STATUS_REFRESH_MS = 100         # Intervall, in dem das Statusfenster aktualisiert wird
+READ_CHUNK_SIZE = 65536
+
+# Dauerhafte Protokolle der Sitzungen im Verzeichnis SESSION_LOG_DIR (gzip, nach Größe rotiert)
+SESSION_LOG_DIR = 'logs'
+SESSION_LOG_INDEX_FILE = 'index.json'
+SESSION_LOG_INDEX_VERSION = 1
+SESSION_LOG_INDEX_SAVE_DELAY = 5.0                  # Sekunden, in denen Änderungen am Index gebündelt werden
+SESSION_LOG_FLUSH_INTERVAL = 1.0                    # Sekunden, in denen Zeilen einer Sitzung gesammelt und komprimiert werden
+DEFAULT_SESSION_LOG_MAX_FILE_SIZE = 1024 * 1024     # Bytes (komprimiert), ab denen eine neue Datei begonnen wird
+DEFAULT_SESSION_LOG_MAX_TOTAL_SIZE = 20 * 1024 * 1024  # Bytes aller Dateien; die ältesten werden gelöscht
+SESSION_LOG_MAX_SESSIONS = 1000                     # Maximal im Index gehaltene Sitzungen
+SESSION_LOG_MAX_MARKERS = 100                       # Maximal gemerkte Fehlerzeilen je Sitzung
+SESSION_LOG_READ_LIMIT = 1000                       # Zeilen je Abruf eines gespeicherten Protokolls
+SESSION_LOG_FAILURE_PATTERN = r'error|fail|timed? ?out|refused|unreachable'
+
+# Verlauf aller Verbindungen (SQLite) für Auswertungen
+HISTORY_FILE = 'history.sqlite3'
+HISTORY_FLUSH_INTERVAL = 2.0        # Sekunden, in denen neue Einträge zu einer Transaktion gebündelt werden
+HISTORY_RETENTION_DAYS = 365        # Ältere Einträge werden gelöscht ...
+HISTORY_PURGE_INTERVAL = 86400      # ... höchstens einmal in so vielen Sekunden, beim Schreiben
+HISTORY_STATS_DAYS = 30             # Zeitraum für Rangfolge und Statistik
+
+# Backends für Verbindungen: wiresock-client oder eine WireGuard-Userspace-Implementierung mit UAPI-Steuer-Socket
+DEFAULT_BACKEND = 'wiresock'
+DEFAULT_UAPI_COMMAND = ['wireguard-go', '-f', '{interface}']
+UAPI_SOCKET_DIR = '/var/run/wireguard'
+UAPI_PIPE_PREFIX = '\\\\.\\pipe\\ProtectedPrefix\\Administrators\\WireGuard\\'
+UAPI_POLL_INTERVAL = 0.5        # Sekunden zwischen zwei Abfragen des Steuer-Sockets
+UAPI_HANDSHAKE_POLL_INTERVAL = 0.02  # Kürzerer Abstand bis zum ersten Handshake
+
+# Verkehrsstatistik je Verbindung
+TRAFFIC_SAMPLE_INTERVAL = 1.0   # Sekunden zwischen zwei Messpunkten
+TRAFFIC_HISTORY_SIZE = 300      # Messpunkte im Ringpuffer (5 Minuten)
+# Ausgabezeilen mit Zählerständen; benannte Gruppen rx/tx (Bytes gesamt) und handshake (Unix-Zeit)
+DEFAULT_TRAFFIC_PATTERNS = [
+    r'rx[_ ]?bytes\s*[=:]\s*(?P<rx>\d+)',
+    r'tx[_ ]?bytes\s*[=:]\s*(?P<tx>\d+)',
+    r'last[_ ]handshake[_ ]time[_ ]sec\s*[=:]\s*(?P<handshake>\d+)',
+]
+TRAFFIC_GRAPH_WIDTH = 420
+TRAFFIC_GRAPH_HEIGHT = 160
+
+# Icons für die Zustände des Tray-Icons
+ICON_FILES = {
+    'connected': 'icon_green.png',
+    'connecting': 'icon_yellow.png',
+    'disconnected': 'icon_red.png',
+}
+TRAY_ICON_SIZE = 64  # Das Tray skaliert das Bild je nach DPI selbst herunter
+OVERLAY_ACTIVITY = 'activity'           # Kleiner Punkt oben rechts
+TRAFFIC_LEVELS = 3                      # Overlays 'traffic1' bis 'traffic3' (Balken unten)
+TRAFFIC_LEVEL_RATES = (16 * 1024, 256 * 1024, 4 * 1024 * 1024)  # Bytes/s (rx + tx aller Verbindungen) ab Balken 1 bis 3
+
+# Gruppierung im Tray-Menü
+MENU_FLAT_LIMIT = 15            # Bis zu so vielen Verbindungen ohne Gruppe bleibt das Menü flach
+MENU_GROUP_SEPARATOR = '/'      # "Gruppe/Name" ordnet eine Verbindung einer Gruppe zu
+
+# Lokaler Steuer-Endpunkt für den Dienst-Modus (--daemon) und Skripte (--ctl)
+IPC_KEY_FILE = 'ipc.key'        # Gemeinsamer Schlüssel für die Authentifizierung am Endpunkt
+IPC_EVENT_QUEUE_SIZE = 1000     # Ereignisse, die für einen langsamen Abonnenten gepuffert werden
+INSTANCE_LOCK_FILE = 'instance.lock'  # Sperre, die das laufende Tray-Icon hält
+INSTANCE_CONNECT_TIMEOUT = 5.0  # Sekunden, die ein zweiter Start auf den Endpunkt einer noch startenden Instanz wartet
+
+# Zeitmessung der einzelnen Phasen (Verbindungsaufbau, Menü, Speichern, ...)
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_SAMPLES = 500           # Letzte Messwerte je Phase für p50/p95
+METRICS_EXPORT_INTERVAL = 15    # Sekunden zwischen zwei Schreibvorgängen der Metrik-Datei
+METRICS_PREFIX = 'simplesock'
+
+def import_gui_modules():
+    """Lädt Tkinter, Pillow und pystray für den Tray-Modus."""
+    global pystray, Image, ImageDraw, tk, filedialog, messagebox, ttk
+    import pystray
+    from PIL import Image, ImageDraw
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+
+# Inhalt der Standard-Sprachdatei, falls sie fehlt oder leer ist
+DEFAULT_TRANSLATIONS = {
+    "app_name": "SimpleSock",
+    "tray_menu_connect": "Connect ({name})",
+    "tray_menu_disconnect": "Disconnect ({name})",
+    "tray_menu_no_connections": "No connections available",
+    "tray_menu_settings": "Settings",
+    "tray_menu_help_info": "Help & Info",
+    "tray_menu_exit": "Exit",
+    "win_title_settings": "Wiresock Settings",
+    "win_title_info": "About SimpleSock",
+    "info_text_version": "Version {version}",
+    "info_text_author": "Author: {author}",
+    "info_text_github": "GitHub: {github}",
+    "settings_path_frame": "Path to Wiresock Installation",
+    "settings_path_button": "Save",
+    "settings_import_frame": "Import Configuration File",
+    "settings_import_name_label": "Name for connection:",
+    "settings_import_button": "Import",
+    "settings_connections_frame": "Manage Connections",
+    "settings_connections_delete": "Delete",
+    "settings_connections_rename": "Rename",
+    "settings_connections_edit": "Edit",
+    "settings_startup_frame": "Startup Settings",
+    "settings_autostart_checkbox": "Start automatically with Windows",
+    "settings_default_connection_label": "Default connection on startup:",
+    "settings_default_connection_none": "None",
+    "msg_box_title_success": "Success",
+    "msg_box_title_warning": "Warning",
+    "msg_box_title_error": "Error",
+    "msg_box_title_confirm": "Confirm",
+    "msg_box_title_autostart": "Autostart",
+    "msg_box_wiresock_not_found": "Wiresock was not found at '{path}'. Do you want to install it now via Winget?",
+    "msg_box_autostart_enabled": "The application will now start automatically with Windows.",
+    "msg_box_autostart_disabled": "Automatic startup has been disabled.",
+    "msg_box_path_saved": "The path has been successfully updated. The application will now use this path.",
+    "msg_box_path_invalid": "Invalid path. Please check if the file exists.",
+    "msg_box_name_required": "Please enter a name for the connection.",
+    "msg_box_name_exists": "The name '{name}' already exists. Please choose another one.",
+    "msg_box_import_success": "'{name}' was imported successfully.",
+    "msg_box_delete_confirm": "Are you sure you want to delete '{name}'?",
+    "msg_box_delete_success": "'{name}' was deleted successfully.",
+    "msg_box_rename_success": "'{old_name}' was renamed to '{new_name}'.",
+    "msg_box_rename_title": "Rename",
+    "msg_box_connect_active": "A connection is already active: {name}",
+    "msg_box_config_not_found": "The configuration '{name}' was not found.",
+    "msg_box_file_not_found": "The configuration file '{path}' was not found.",
+    "msg_box_wiresock_not_found_connect": "The file '{path}' was not found. Please install Wiresock or correct the path in the settings.",
+    "msg_box_connection_success": "Connection with '{name}' was successfully established.",
+    "msg_box_disconnect_success": "The connection was successfully disconnected.",
+    "msg_box_select_connection_delete": "Please select a connection to delete.",
+    "msg_box_select_connection_rename": "Please select a connection to rename.",
+    "msg_box_select_connection_edit": "Please select a connection to edit.",
+    "msg_box_install_failed": "The installation could not be verified. Please try it manually.",
+    "msg_box_install_error": "An error occurred during the Winget installation: {error}",
+    "msg_box_app_exit_info": "The application cannot be executed without Wiresock.",
+    "msg_box_default_set": "Standard connection set to '{name}'.",
+    "msg_box_open_error": "An error occurred while opening the file: {error}",
+    "settings_language_label": "Language:",
+    "settings_language_frame": "Language Settings",
+    "settings_close_button": "Close",
+    "settings_import_title": "Select a Wiresock configuration file (.conf)",
+    "settings_file_type": "Configuration files",
+    "win_title_status": "Status",
+    "status_connecting": "Connecting to {name}...",
+    "status_disconnecting": "Disconnecting...",
+    "status_closing": "Closing...",
+    "status_connected": "Connected",
+    "status_connection_failed": "Connection failed",
+    "status_handshaking": "Waiting for handshake with {name}...",
+    "msg_box_connect_timeout": "The connection to '{name}' could not be established within {seconds} seconds.",
+    "status_lines_dropped": "... {count} lines skipped ...",
+    "tray_menu_group": "{group} ({count})",
+    "tray_menu_endpoint": "Endpoint: {endpoint}",
+    "settings_details_frame": "Connection Details",
+    "settings_details_text": "Endpoint: {endpoint}\nAllowedIPs: {allowed_ips}\nDNS: {dns}    MTU: {mtu}    Peers: {peers}",
+    "settings_details_errors": "Problems: {errors}",
+    "config_error_missing_interface": "[Interface] section missing",
+    "config_error_missing_private_key": "PrivateKey missing",
+    "config_error_invalid_mtu": "invalid MTU",
+    "config_error_missing_peer": "[Peer] section missing",
+    "config_error_missing_public_key": "PublicKey missing",
+    "config_error_missing_endpoint": "Endpoint missing",
+    "settings_import_folder_button": "Folder...",
+    "settings_import_archive_button": "Archive...",
+    "settings_import_folder_title": "Select a folder with configuration files",
+    "settings_import_archive_title": "Select a ZIP archive with configuration files",
+    "settings_archive_file_type": "ZIP archives",
+    "msg_box_title_import": "Import",
+    "msg_box_bulk_import_summary": "Imported: {imported}\nDuplicates skipped: {duplicates}\nInvalid: {invalid}",
+    "msg_box_bulk_import_invalid_entry": "{file}: {errors}",
+    "config_error_too_large": "file too large",
+    "tray_menu_connect_fastest": "Connect to fastest",
+    "tray_menu_connect_fastest_group": "Fastest in {group}",
+    "msg_box_no_reachable_endpoint": "None of the endpoints could be reached.",
+    "msg_box_reconnect_failed": "The connection '{name}' was lost and could not be restored after {restarts} restarts.",
+    "tray_tooltip_restarts": "Restarts: {restarts}, downtime: {downtime} s",
+    "tray_menu_cancel": "Cancel ({name})",
+    "tray_menu_disconnect_all": "Disconnect all",
+    "tray_tooltip_tunnel": "{name}: {state}",
+    "state_idle": "disconnected",
+    "state_spawning": "starting",
+    "state_handshaking": "handshake",
+    "state_connected": "connected",
+    "state_failed": "failed",
+    "state_reconnecting": "reconnecting",
+    "msg_box_autostart_error": "Autostart could not be changed: {error}",
+    "msg_box_connect_error": "The connection could not be established: {error}",
+    "msg_box_import_error": "An error occurred during the import: {error}",
+    "msg_box_install_success": "Wiresock was installed successfully.",
+    "tray_menu_traffic": "Traffic...",
+    "tray_tooltip_traffic": "Rx {rx}/s, Tx {tx}/s",
+    "tray_tooltip_handshake": "handshake {seconds} s ago",
+    "win_title_traffic": "Traffic",
+    "traffic_window_rates": "Received: {rx}/s ({rx_total})\nSent: {tx}/s ({tx_total})",
+    "traffic_window_handshake": "Last handshake: {seconds} s ago",
+    "traffic_window_no_data": "The client has not reported any traffic counters yet.",
+    "settings_metrics_frame": "Phase timings (p50 / p95)",
+    "settings_metrics_line": "{phase}: {p50:.1f} / {p95:.1f} ms ({count}x)",
+    "settings_metrics_empty": "No measurements yet",
+    "settings_connections_search": "Search:",
+    "settings_tab_general": "General",
+    "settings_tab_statistics": "Statistics",
+    "settings_stats_profile": "Connection",
+    "settings_stats_sessions": "Sessions",
+    "settings_stats_median_connect": "Median connect",
+    "settings_stats_failure_rate": "Failure rate",
+    "settings_stats_drops": "Drops",
+    "settings_stats_refresh": "Refresh",
+    "settings_stats_sort_menu": "Order tray menu by this ranking",
+    "settings_reconnect_frame": "Automatic reconnect",
+    "settings_stall_timeout_label": "Restart a connection without output after (seconds):",
+    "settings_stall_timeout_hint": "0 = off (default). Idle tunnels without traffic may be quiet as well."
+}
 
 def get_system_language():
     """Versucht, die Systemsprache zu ermitteln."""
@@ -38,26 +339,159 @@ def get_system_language():
     except Exception:
         return DEFAULT_LANG
 
-def load_translations(lang_code):
-    """Lädt die Übersetzungen aus der JSON-Datei für die angegebene Sprache."""
-    global TRANSLATIONS
-    lang_path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), LANG_DIR, f"{lang_code}.json")
-    if os.path.exists(lang_path):
+def get_placeholders(template):
+    """Gibt die Namen aller Platzhalter einer Vorlage zurück."""
+    return {field for _, field, _, _ in string.Formatter().parse(template) if field is not None}
+
+def compile_template(template):
+    """Bereitet eine Vorlage einmalig vor.
+
+    Ohne Platzhalter wird der fertige Text zurückgegeben (geschweifte Klammern
+    bereits aufgelöst), sonst die gebundene format-Methode der Vorlage.
+    """
+    if not get_placeholders(template):
+        return template.format()
+    return template.format
+
+def read_translation_file(lang_dir, lang_code):
+    """Liest eine Sprachdatei; fehlt sie oder ist sie ungültig, wird ein leeres Dict zurückgegeben."""
+    lang_path = os.path.join(lang_dir, f"{lang_code}.json")
+    try:
         with open(lang_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (ValueError, OSError) as e:
+        print(f"Fehler beim Laden der Übersetzungsdatei '{lang_path}': {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def check_translations(lang_dir):
+    """Prüft alle Sprachdateien gegen DEFAULT_TRANSLATIONS und gibt die gefundenen Probleme zurück.
+
+    Gemeldet werden ungültige Dateien, fehlende Schlüssel und Übersetzungen,
+    deren Platzhalter nicht zur englischen Vorlage passen.
+    """
+    problems = []
+    reference = {key: get_placeholders(text) for key, text in DEFAULT_TRANSLATIONS.items()}
+    for file_name in sorted(os.listdir(lang_dir)):
+        if not file_name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(lang_dir, file_name), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (ValueError, OSError) as e:
+            problems.append(f"{file_name}: {e}")
+            continue
+        for key in reference:
+            if key not in data:
+                problems.append(f"{file_name}: {key} fehlt")
+        for key, text in data.items():
+            if not isinstance(text, str):
+                problems.append(f"{file_name}: {key} ist kein Text")
+                continue
             try:
-                TRANSLATIONS = json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"Fehler beim Laden der Übersetzungsdatei '{lang_path}': {e}")
-                TRANSLATIONS = {}
-    else:
-        # Fallback auf Standard-Englisch, wenn die Zielsprache nicht gefunden wird
-        print(f"Warnung: Übersetzungsdatei für '{lang_code}' nicht gefunden. Verwende Fallback-Sprache.")
-        TRANSLATIONS = {}
+                placeholders = get_placeholders(text)
+            except ValueError as e:
+                problems.append(f"{file_name}: {key}: {e}")
+                continue
+            if key in reference and placeholders != reference[key]:
+                expected = ', '.join(sorted(reference[key])) or '-'
+                problems.append(f"{file_name}: {key} hat die Platzhalter {', '.join(sorted(placeholders)) or '-'}, erwartet: {expected}")
+    return problems
+
+class TranslationCatalog:
+    """Übersetzungen mit Fallback-Kette, vorab zerlegten Vorlagen und Zwischenspeicher.
+
+    load() führt die gewählte Sprache, die Systemsprache, Englisch und die
+    eingebauten DEFAULT_TRANSLATIONS zu einem Katalog zusammen, sodass fehlende
+    Schlüssel aus der nächsten Sprache der Kette kommen. Übersetzungen, deren
+    Platzhalter nicht zur englischen Vorlage passen, werden dabei verworfen.
+    Formatierte Texte werden pro Schlüssel und Argumenten zwischengespeichert,
+    solange die Argumente Texte oder ganze Zahlen sind.
+    """
+
+    CACHEABLE_TYPES = (str, int)
+
+    def __init__(self):
+        self.language = None
+        self.chain = []
+        self._templates = {key: compile_template(text) for key, text in DEFAULT_TRANSLATIONS.items()}
+        self._cache = {}
 
-def get_text(key, **kwargs):
-    """Gibt den übersetzten Text zurück und ersetzt Platzhalter."""
-    text = TRANSLATIONS.get(key, key)
-    return text.format(**kwargs)
+    def load(self, lang_code, lang_dir):
+        """Lädt die Fallback-Kette für die angegebene Sprache."""
+        chain = []
+        for code in (lang_code, get_system_language(), DEFAULT_LANG):
+            if code and code not in chain:
+                chain.append(code)
+        if not os.path.exists(os.path.join(lang_dir, f"{lang_code}.json")):
+            print(f"Warnung: Übersetzungsdatei für '{lang_code}' nicht gefunden. Verwende Fallback-Sprache.")
+
+        reference = {key: get_placeholders(text) for key, text in DEFAULT_TRANSLATIONS.items()}
+        merged = dict(DEFAULT_TRANSLATIONS)
+        # Von hinten nach vorne, damit die gewählte Sprache Vorrang hat
+        for code in reversed(chain):
+            for key, text in read_translation_file(lang_dir, code).items():
+                if not isinstance(text, str):
+                    continue
+                try:
+                    placeholders = get_placeholders(text)
+                except ValueError:
+                    print(f"Warnung: Übersetzung '{key}' in '{code}.json' ist keine gültige Vorlage und wird ignoriert.")
+                    continue
+                if key in reference and placeholders != reference[key]:
+                    print(f"Warnung: Übersetzung '{key}' in '{code}.json' hat abweichende Platzhalter und wird ignoriert.")
+                    continue
+                merged[key] = text
+
+        self._templates = {key: compile_template(text) for key, text in merged.items()}
+        self._cache = {}
+        self.language = lang_code
+        self.chain = chain
+
+    def __contains__(self, key):
+        return key in self._templates
+
+    def get(self, key, **kwargs):
+        """Gibt den übersetzten Text zurück und ersetzt Platzhalter; unbekannte Schlüssel bleiben unverändert."""
+        template = self._templates.get(key)
+        if template is None:
+            return key
+        if type(template) is str:
+            return template
+
+        for value in kwargs.values():
+            if type(value) not in self.CACHEABLE_TYPES:
+                # Andere Werte (z.B. Ausnahmen) nicht im Zwischenspeicher festhalten
+                return template(**kwargs)
+        cache_key = (key, tuple(kwargs.items()))
+        text = self._cache.get(cache_key)
+        if text is None:
+            if len(self._cache) >= TRANSLATION_CACHE_SIZE:
+                self._cache.clear()
+            text = self._cache[cache_key] = template(**kwargs)
+        return text
+
+CATALOG = TranslationCatalog()
+
+def load_translations(lang_code):
+    """Lädt die Übersetzungen für die angegebene Sprache samt Fallback-Kette."""
+    CATALOG.load(lang_code, os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), LANG_DIR))
+
+def ensure_default_translations(lang_dir):
+    """Schreibt die Standard-Sprachdatei nur, wenn sie fehlt oder leer ist."""
+    default_lang_path = os.path.join(lang_dir, f"{DEFAULT_LANG}.json")
+    try:
+        if os.path.getsize(default_lang_path) > 0:
+            return
+    except OSError:
+        pass
+    with open(default_lang_path, 'w', encoding='utf-8') as f:
+        json.dump(DEFAULT_TRANSLATIONS, f, indent=4)
+
+# get_text() ist direkt die Methode des Katalogs, das spart bei jedem Aufruf eine Weiterleitung
+get_text = CATALOG.get
 
 def check_wiresock_installation(path_to_check):
     """Prüft, ob Wiresock installiert ist und bietet die Installation über Winget an."""
@@ -71,32 +505,3452 @@ def check_wiresock_installation(path_to_check):
     
     if response:
         try:
-            # Starte die Installation über winget in einem separaten Fenster
-            subprocess.run(['start', 'winget', 'install', 'NTKERNEL.WireSockVPNClient'], shell=True, check=True)
-            
-            time.sleep(2)
-            if os.path.exists(DEFAULT_WIRESOCK_PATH):
-                messagebox.showinfo(get_text("msg_box_title_success"), get_text("msg_box_install_success"))
-                return True
-            else:
-                messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_install_failed"))
-                return False
-        except Exception as e:
-            messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_install_error", error=e))
-            return False
-    else:
-        return False
+            # Starte die Installation über winget in einem separaten Fenster
+            subprocess.run(['start', 'winget', 'install', 'NTKERNEL.WireSockVPNClient'], shell=True, check=True)
+            
+            time.sleep(2)
+            if os.path.exists(DEFAULT_WIRESOCK_PATH):
+                messagebox.showinfo(get_text("msg_box_title_success"), get_text("msg_box_install_success"))
+                return True
+            else:
+                messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_install_failed"))
+                return False
+        except Exception as e:
+            messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_install_error", error=e))
+            return False
+    else:
+        return False
+
+class StartupTimer:
+    """Misst die Startphasen der Anwendung (Aufruf mit --startup-timing).
+
+    mark(phase) hält fest, wann eine Phase abgeschlossen wurde; report() gibt
+    für jede Phase die Dauer seit der vorherigen Marke und die Zeit seit dem
+    Modulstart aus. Ohne enabled kosten die Aufrufe praktisch nichts.
+    """
+
+    def __init__(self, enabled=False, start=STARTUP_TIME):
+        self.enabled = enabled
+        self.start = start
+        self.phases = []
+        self._last = start
+        self._lock = threading.Lock()
+
+    def mark(self, phase):
+        """Beendet eine Phase."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            self.phases.append((phase, now - self._last, now - self.start))
+            self._last = now
+
+    def report(self):
+        """Gibt die gemessenen Phasen aus."""
+        if not self.enabled:
+            return
+        with self._lock:
+            phases = list(self.phases)
+        for phase, duration, elapsed in phases:
+            print(f"{phase:<20} {duration * 1000:8.1f} ms {elapsed * 1000:8.1f} ms")
+
+class Histogram:
+    """Verteilung der Messwerte (Sekunden) einer Phase.
+
+    Zählt die Werte in festen Grenzen (für den Prometheus-Export) und behält
+    die letzten METRICS_SAMPLES Werte für Perzentile; der Speicherbedarf ist fest.
+    """
+
+    def __init__(self, buckets=METRICS_BUCKETS, samples=METRICS_SAMPLES):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Der letzte Eintrag zählt Werte über der höchsten Grenze
+        self.sum = 0.0
+        self.count = 0
+        self.recent = collections.deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Nimmt einen Messwert auf."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            self.recent.append(value)
+
+    def percentiles(self, *quantiles):
+        """Gibt die Perzentile (0..1) der letzten Messwerte zurück, ohne Messwerte None."""
+        with self._lock:
+            values = sorted(self.recent)
+        if not values:
+            return [None] * len(quantiles)
+        return [values[round(q * (len(values) - 1))] for q in quantiles]
+
+    def snapshot(self):
+        """Gibt kumulierte Zählerstände je Grenze, Summe und Anzahl zurück."""
+        with self._lock:
+            return list(itertools.accumulate(self.counts)), self.sum, self.count
+
+class Metrics:
+    """Sammelt die Dauer der einzelnen Phasen in je einem Histogram.
+
+    Gemessen wird mit time.perf_counter(), die Aufrufe sind günstig genug für
+    den Verbindungsaufbau, das Tray-Menü und das Speichern der Einstellungen.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, phase, seconds):
+        """Nimmt die Dauer einer Phase auf."""
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(phase, Histogram())
+        histogram.observe(seconds)
+
+    def since(self, phase, start):
+        """Nimmt die Zeit seit start (time.perf_counter()) als Dauer einer Phase auf und gibt sie zurück."""
+        duration = time.perf_counter() - start
+        self.observe(phase, duration)
+        return duration
+
+    @contextlib.contextmanager
+    def measure(self, phase):
+        """Misst die Dauer eines with-Blocks."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.since(phase, start)
+
+    def _items(self):
+        """Gibt die Histogramme sortiert zurück; observe() kann gleichzeitig neue Phasen anlegen."""
+        with self._lock:
+            return sorted(self.histograms.items())
+
+    def summary(self):
+        """Gibt Anzahl, p50 und p95 (Sekunden) je Phase zurück."""
+        result = {}
+        for phase, histogram in self._items():
+            p50, p95 = histogram.percentiles(0.5, 0.95)
+            result[phase] = {'count': histogram.count, 'p50': p50, 'p95': p95}
+        return result
+
+    def export_text(self):
+        """Gibt alle Histogramme im Textformat von Prometheus zurück."""
+        name = f'{METRICS_PREFIX}_phase_duration_seconds'
+        lines = [
+            f'# HELP {name} Duration of SimpleSock phases (connect, disconnect, menu, settings, icon).',
+            f'# TYPE {name} histogram',
+        ]
+        for phase, histogram in self._items():
+            cumulative, total, count = histogram.snapshot()
+            for bound, value in zip(histogram.buckets + ('+Inf',), cumulative):
+                lines.append(f'{name}_bucket{{phase="{phase}",le="{bound}"}} {value}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {total}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+METRICS = Metrics()
+
+class MetricsExporter:
+    """Stellt METRICS im Prometheus-Format bereit: als Datei und/oder per HTTP auf 127.0.0.1.
+
+    Die Datei wird alle METRICS_EXPORT_INTERVAL Sekunden atomar ersetzt (z.B. für
+    den Textfile-Collector des node_exporter), der HTTP-Endpunkt antwortet unter /metrics.
+    """
+
+    def __init__(self, metrics, file_path=None, port=None):
+        self.metrics = metrics
+        self.file_path = file_path
+        self.port = port
+        self.server = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Startet den Export in Hintergrund-Threads."""
+        if self.file_path:
+            threading.Thread(target=self._write_loop, daemon=True).start()
+        if self.port:
+            self._start_http_server()
+
+    def stop(self):
+        """Beendet den Export und schreibt die Datei ein letztes Mal."""
+        self._stop_event.set()
+        if self.server:
+            self.server.shutdown()
+        if self.file_path:
+            self.write_file()
+
+    def write_file(self):
+        """Schreibt die Metriken atomar in die Datei."""
+        temp_path = self.file_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self.metrics.export_text())
+            os.replace(temp_path, self.file_path)
+        except OSError as e:
+            print(f"Fehler beim Schreiben der Metriken '{self.file_path}': {e}")
+
+    def _write_loop(self):
+        """Schreibt die Datei in festen Abständen."""
+        while not self._stop_event.wait(METRICS_EXPORT_INTERVAL):
+            self.write_file()
+
+    def _start_http_server(self):
+        """Startet einen HTTP-Server auf 127.0.0.1, der unter /metrics antwortet."""
+        import http.server
+        metrics = self.metrics
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.export_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = http.server.ThreadingHTTPServer(('127.0.0.1', self.port), MetricsHandler)
+        except OSError as e:
+            print(f"Metrik-Endpunkt auf Port {self.port} konnte nicht gestartet werden: {e}")
+            return
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+class SettingsStore:
+    """Hält die Einstellungen im Speicher und schreibt sie verzögert und atomar auf die Festplatte.
+
+    save() bündelt mehrere Änderungen innerhalb von SETTINGS_SAVE_DELAY zu einem
+    Schreibvorgang im Hintergrund. Geschrieben wird über eine temporäre Datei,
+    fsync und rename; die vorherige Version bleibt als .bak erhalten. Hat sich
+    seit dem letzten Schreiben nichts geändert, wird nichts geschrieben.
+    """
+
+    def __init__(self, path, delay=SETTINGS_SAVE_DELAY):
+        self.path = path
+        self.backup_path = path + '.bak'
+        self.delay = delay
+        self.data = {}
+        self._saved_text = None
+        self._due = None
+        self._timer_running = False
+        self._timer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def load(self):
+        """Lädt die Einstellungen; ist die Datei beschädigt, wird die Sicherung verwendet."""
+        for candidate in (self.path, self.backup_path):
+            try:
+                with open(candidate, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (ValueError, OSError) as e:
+                print(f"Fehler beim Laden der Einstellungen '{candidate}': {e}")
+                continue
+            if isinstance(data, dict):
+                self.data = data
+                # Aus der Sicherung geladen: die Hauptdatei beim nächsten save() ersetzen
+                self._saved_text = self._serialize() if candidate == self.path else None
+                return self.data
+        self.data = {}
+        self._saved_text = None
+        return self.data
+
+    def save(self):
+        """Merkt einen Schreibvorgang vor; weitere Aufrufe verschieben ihn (Debounce)."""
+        with self._timer_lock:
+            self._due = time.monotonic() + self.delay
+            if self._timer_running:
+                return
+            self._timer_running = True
+        threading.Thread(target=self._flush_in_background, daemon=True).start()
+
+    def flush(self):
+        """Schreibt ausstehende Änderungen sofort (z.B. beim Beenden der Anwendung)."""
+        with self._timer_lock:
+            self._due = None
+        return self._write()
+
+    def _flush_in_background(self):
+        """Wartet, bis seit dem letzten save() SETTINGS_SAVE_DELAY vergangen ist, und schreibt dann."""
+        while True:
+            with self._timer_lock:
+                if self._due is None:
+                    self._timer_running = False
+                    return
+                remaining = self._due - time.monotonic()
+                if remaining <= 0:
+                    self._due = None
+                    self._timer_running = False
+                    break
+            time.sleep(remaining)
+        try:
+            self._write()
+        except Exception as e:
+            print(f"Fehler beim Speichern der Einstellungen '{self.path}': {e}")
+
+    def _write(self):
+        """Schreibt die Einstellungen atomar, falls sie sich geändert haben."""
+        with self._write_lock:
+            start = time.perf_counter()
+            text = self._serialize()
+            if text == self._saved_text:
+                return False
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(self.path):
+                os.replace(self.path, self.backup_path)
+            os.replace(temp_path, self.path)
+            self._saved_text = text
+            METRICS.since('settings_save', start)
+            return True
+
+    def _serialize(self):
+        """Serialisiert die Einstellungen; wiederholt, falls sie währenddessen geändert werden."""
+        for _ in range(3):
+            try:
+                return json.dumps(self.data, indent=4)
+            except RuntimeError:
+                # Das Dictionary wurde während der Serialisierung im UI-Thread geändert
+                continue
+        return json.dumps(self.data, indent=4)
+
+def apply_settings_defaults(settings):
+    """Ergänzt fehlende Schlüssel der Einstellungen um ihre Standardwerte."""
+    settings.setdefault("wiresock_path", DEFAULT_WIRESOCK_PATH)
+    settings.setdefault("configs", {})
+    settings.setdefault("startup_config", None)
+    settings.setdefault("autostart_enabled", False)
+    settings.setdefault("config_groups", {})
+    settings.setdefault("probe_method", DEFAULT_PROBE_METHOD)
+    settings.setdefault("probe_timeout", DEFAULT_PROBE_TIMEOUT)
+    settings.setdefault("reconnect", {})
+    settings.setdefault("failover_configs", {})
+    settings.setdefault("multiple_tunnels", False)
+    settings.setdefault("fast_switch", True)
+    settings.setdefault("dns_prefetch", True)
+    settings.setdefault("dns_server", None)
+    settings.setdefault("dns_rewrite_endpoints", False)
+    settings.setdefault("backend", DEFAULT_BACKEND)
+    settings.setdefault("uapi_command", DEFAULT_UAPI_COMMAND)
+    settings.setdefault("ready_patterns", DEFAULT_READY_PATTERNS)
+    settings.setdefault("connect_timeout", DEFAULT_CONNECT_TIMEOUT)
+    settings.setdefault("status_max_lines", DEFAULT_STATUS_MAX_LINES)
+    settings.setdefault("traffic_patterns", DEFAULT_TRAFFIC_PATTERNS)
+    settings.setdefault("metrics_file", None)
+    settings.setdefault("metrics_port", None)
+    settings.setdefault("debug_overlay", False)
+    settings.setdefault("tray_traffic_overlay", True)
+    settings.setdefault("session_logs", True)
+    settings.setdefault("session_log_max_file_size", DEFAULT_SESSION_LOG_MAX_FILE_SIZE)
+    settings.setdefault("session_log_max_total_size", DEFAULT_SESSION_LOG_MAX_TOTAL_SIZE)
+    settings.setdefault("connection_history", True)
+    settings.setdefault("menu_sort_by_ranking", False)
+    return settings
+
+def read_wireguard_sections(text):
+    """Zerlegt eine WireGuard-Konfiguration in den [Interface]-Abschnitt (oder None) und die [Peer]-Abschnitte.
+
+    text ist der Inhalt als str oder eine iterierbare Folge von Zeilen (z.B. eine
+    geöffnete Textdatei). Schlüssel werden klein geschrieben; mehrfach vorkommende
+    Listen (Address, AllowedIPs, DNS) werden mit Komma verbunden, sonst gilt der letzte Wert.
+    """
+    interface = None
+    peers = []
+    section = None
+    for raw_line in text.splitlines() if isinstance(text, str) else text:
+        line = raw_line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            section_name = line[1:-1].strip().lower()
+            if section_name == 'interface':
+                interface = section = {}
+            elif section_name == 'peer':
+                section = {}
+                peers.append(section)
+            else:
+                section = None
+            continue
+        if section is None or '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        key = key.strip().lower()
+        if key in ('address', 'allowedips', 'dns') and key in section:
+            section[key] = f"{section[key]}, {value.strip()}"
+        else:
+            section[key] = value.strip()
+    return interface, peers
+
+def parse_wireguard_config(text):
+    """Liest die relevanten Felder einer WireGuard-Konfiguration (INI-Format, mehrere [Peer] möglich).
+
+    Der private Schlüssel wird nur auf Vorhandensein geprüft und nicht übernommen.
+    """
+    interface, peers = read_wireguard_sections(text)
+
+    errors = []
+    if interface is None:
+        errors.append('missing_interface')
+        interface = {}
+    elif 'privatekey' not in interface:
+        errors.append('missing_private_key')
+    mtu = interface.get('mtu', '')
+    if mtu and not mtu.isdigit():
+        errors.append('invalid_mtu')
+    if not peers:
+        errors.append('missing_peer')
+    for peer in peers:
+        if 'publickey' not in peer and 'missing_public_key' not in errors:
+            errors.append('missing_public_key')
+        if 'endpoint' not in peer and 'missing_endpoint' not in errors:
+            errors.append('missing_endpoint')
+
+    peer_entries = [
+        {
+            'public_key': peer.get('publickey', ''),
+            'endpoint': peer.get('endpoint', ''),
+            'allowed_ips': peer.get('allowedips', ''),
+        }
+        for peer in peers
+    ]
+    first_peer = peer_entries[0] if peer_entries else {'public_key': '', 'endpoint': '', 'allowed_ips': ''}
+    return {
+        'address': interface.get('address', ''),
+        'dns': interface.get('dns', ''),
+        'mtu': mtu,
+        'endpoint': first_peer['endpoint'],
+        'public_key': first_peer['public_key'],
+        'allowed_ips': first_peer['allowed_ips'],
+        'peers': peer_entries,
+        'errors': errors,
+    }
+
+def parse_networks(value):
+    """Wandelt eine kommagetrennte Liste von Adressen bzw. Netzen in ip_network-Objekte um."""
+    import ipaddress
+    networks = []
+    for part in value.split(','):
+        part = part.strip()
+        if part:
+            networks.append(ipaddress.ip_network(part, strict=False))
+    return networks
+
+def configs_conflict(entry, other):
+    """Prüft, ob zwei geparste Konfigurationen nicht gleichzeitig laufen können.
+
+    Das ist der Fall, wenn sich die Adressen der Adapter oder die AllowedIPs
+    (Routen) überschneiden oder beide denselben Peer verwenden. Im Zweifel,
+    z.B. bei fehlerhaften Konfigurationen, gilt das als Konflikt.
+    """
+    if entry['errors'] or other['errors']:
+        return True
+    try:
+        pairs = [
+            (parse_networks(entry['address']), parse_networks(other['address'])),
+            (parse_networks(','.join(peer['allowed_ips'] for peer in entry['peers'])),
+             parse_networks(','.join(peer['allowed_ips'] for peer in other['peers']))),
+        ]
+    except ValueError:
+        return True
+    for networks, other_networks in pairs:
+        if any(a.version == b.version and a.overlaps(b) for a in networks for b in other_networks):
+            return True
+    shared_peers = {peer['public_key'] for peer in entry['peers']} & {peer['public_key'] for peer in other['peers']}
+    return bool(shared_peers - {''})
+
+class HashingReader:
+    """Liest aus einem Binär-Dateiobjekt, berechnet dabei SHA-256 und liefert nach mehr als limit Bytes nichts mehr."""
+
+    def __init__(self, source, limit):
+        self.source = source
+        self.limit = limit
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        if self.size > self.limit:
+            return b''
+        chunk = self.source.read(size)
+        self.size += len(chunk)
+        self.digest.update(chunk)
+        return chunk
+
+def copy_config_file(source, temp_path):
+    """Kopiert eine Konfiguration blockweise in temp_path und validiert sie danach zeilenweise.
+
+    source ist ein geöffnetes Binär-Dateiobjekt. Gibt (entry, None) mit dem geparsten
+    Index-Eintrag samt Hash zurück oder (None, Fehlercodes), wenn die Datei ungültig ist.
+    """
+    reader = HashingReader(source, MAX_CONFIG_SIZE)
+    with open(temp_path, 'wb') as dst:
+        shutil.copyfileobj(reader, dst, READ_CHUNK_SIZE)
+    if reader.size > MAX_CONFIG_SIZE:
+        return None, ['too_large']
+
+    with open(temp_path, 'r', encoding='utf-8', errors='replace') as f:
+        entry = parse_wireguard_config(f)
+    if entry['errors']:
+        return None, entry['errors']
+    entry['hash'] = reader.digest.hexdigest()
+    return entry, None
+
+class ConfigIndex:
+    """Zwischengespeicherter Index der geparsten .conf-Dateien im configs-Verzeichnis.
+
+    Die Einträge werden nach Dateiname abgelegt und in CONFIG_INDEX_FILE gespeichert.
+    Eine Datei wird nur neu gelesen, wenn sich mtime oder Größe geändert haben, und
+    nur neu geparst, wenn sich zusätzlich ihr Inhalt (SHA-256) geändert hat.
+    """
+
+    def __init__(self, configs_dir, cache_path):
+        self.configs_dir = configs_dir
+        self.store = SettingsStore(cache_path)
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Lädt den gespeicherten Index, ohne die Konfigurationsdateien zu lesen."""
+        data = self.store.load()
+        if data.get('version') != CONFIG_INDEX_VERSION:
+            data.clear()
+            data['version'] = CONFIG_INDEX_VERSION
+        self.entries = data.setdefault('files', {})
+
+    def refresh(self, file_names):
+        """Gleicht den Index mit den angegebenen Dateien ab und entfernt verwaiste Einträge."""
+        for file_name in file_names:
+            self.update(file_name)
+        wanted = set(file_names)
+        with self._lock:
+            for file_name in [f for f in self.entries if f not in wanted]:
+                del self.entries[file_name]
+        self.store.save()
+
+    def update(self, file_name):
+        """Aktualisiert den Eintrag einer Datei, falls sie sich geändert hat, und gibt ihn zurück."""
+        path = os.path.join(self.configs_dir, file_name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove(file_name)
+            return None
+
+        entry = self.entries.get(file_name)
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Fehler beim Lesen der Konfiguration '{path}': {e}")
+            return entry
+        digest = hashlib.sha256(data).hexdigest()
+
+        if entry and entry['hash'] == digest:
+            # Nur der Zeitstempel hat sich geändert
+            entry = dict(entry, mtime=stat.st_mtime_ns, size=stat.st_size)
+        else:
+            entry = parse_wireguard_config(data.decode('utf-8', errors='replace'))
+            entry.update(mtime=stat.st_mtime_ns, size=stat.st_size, hash=digest)
+        with self._lock:
+            self.entries[file_name] = entry
+        self.store.save()
+        return entry
+
+    def put(self, file_name, entry):
+        """Übernimmt einen bereits geparsten Eintrag (z.B. beim Import) ohne die Datei erneut zu lesen."""
+        stat = os.stat(os.path.join(self.configs_dir, file_name))
+        entry = dict(entry, mtime=stat.st_mtime_ns, size=stat.st_size)
+        with self._lock:
+            self.entries[file_name] = entry
+        self.store.save()
+        return entry
+
+    def known_hashes(self):
+        """Gibt die Inhalts-Hashes aller indexierten Dateien zurück."""
+        return {entry['hash'] for entry in list(self.entries.values())}
+
+    def remove(self, file_name):
+        """Entfernt den Eintrag einer Datei aus dem Index."""
+        with self._lock:
+            removed = self.entries.pop(file_name, None)
+        if removed:
+            self.store.save()
+
+    def get(self, file_name):
+        """Gibt den Eintrag einer Datei zurück oder None, falls sie noch nicht indexiert ist."""
+        return self.entries.get(file_name)
+
+class ConnectionSearchIndex:
+    """Suchindex über die Namen der Verbindungen und die indexierten Felder ihrer Konfigurationen.
+
+    Jede Verbindung ist über alle Teilzeichenfolgen der Länge SEARCH_NGRAM ihres
+    Suchtexts auffindbar; längere Suchbegriffe werden über deren Schnittmenge
+    eingegrenzt und dann geprüft. Wird ein Suchbegriff nur verlängert (Tippen),
+    wird lediglich das vorherige Ergebnis weiter gefiltert. Mehrere Wörter müssen
+    alle vorkommen. Ergebnisse stehen in der Reihenfolge, in der die Verbindungen
+    hinzugefügt wurden (wie in den Einstellungen).
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.texts = {}
+        self.ngrams = collections.defaultdict(set)
+        self._counter = itertools.count()
+        self._last = ('', None)
+
+    def rebuild(self, configs, config_index):
+        """Baut den Index für configs (Name -> Datei) neu auf."""
+        self.positions.clear()
+        self.texts.clear()
+        self.ngrams.clear()
+        self._last = ('', None)
+        for name, file_name in configs.items():
+            self.add(name, config_index.get(file_name))
+
+    @staticmethod
+    def _text(name, entry):
+        """Suchtext einer Verbindung: Name und Felder, ohne Groß-/Kleinschreibung."""
+        parts = [name]
+        if entry:
+            parts.extend(entry[field] for field in SEARCH_FIELDS if entry.get(field))
+        return '\n'.join(parts).lower()
+
+    @staticmethod
+    def _split(text):
+        """Alle Teilzeichenfolgen der Länge SEARCH_NGRAM."""
+        return {text[i:i + SEARCH_NGRAM] for i in range(len(text) - SEARCH_NGRAM + 1)}
+
+    def add(self, name, entry):
+        """Nimmt eine Verbindung am Ende auf bzw. aktualisiert ihren Suchtext."""
+        if name in self.positions:
+            self._unindex(name)
+        else:
+            self.positions[name] = next(self._counter)
+        text = self.texts[name] = self._text(name, entry)
+        for ngram in self._split(text):
+            self.ngrams[ngram].add(name)
+        self._last = ('', None)
+
+    def remove(self, name):
+        """Entfernt eine Verbindung aus dem Index."""
+        if name in self.positions:
+            self._unindex(name)
+            del self.positions[name]
+            del self.texts[name]
+            self._last = ('', None)
+
+    def _unindex(self, name):
+        for ngram in self._split(self.texts[name]):
+            names = self.ngrams.get(ngram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.ngrams[ngram]
+
+    def matches(self, name, query):
+        """Prüft, ob eine Verbindung zum Suchbegriff passt."""
+        text = self.texts.get(name)
+        return text is not None and all(word in text for word in query.lower().split())
+
+    def search(self, query):
+        """Gibt die passenden Namen in ihrer Reihenfolge zurück."""
+        query = ' '.join(query.lower().split())
+        if not query:
+            return sorted(self.positions, key=self.positions.get)
+        last_query, last_results = self._last
+        if last_results is not None and last_query and query.startswith(last_query):
+            candidates = last_results
+        else:
+            candidates = None
+            for word in query.split():
+                if len(word) < SEARCH_NGRAM:
+                    continue
+                for ngram in self._split(word):
+                    names = self.ngrams.get(ngram, ())
+                    candidates = set(names) if candidates is None else candidates & names
+                    if not candidates:
+                        break
+            if candidates is None:
+                candidates = self.positions
+        words = query.split()
+        results = [name for name in candidates if all(word in self.texts[name] for word in words)]
+        results.sort(key=self.positions.get)
+        self._last = (query, results)
+        return results
+
+    def insert_index(self, names, name):
+        """Position, an der name in die geordnete Liste names eingefügt werden muss."""
+        position = self.positions[name]
+        return next((i for i, other in enumerate(names) if self.positions.get(other, -1) > position), len(names))
+
+class ConfigWatcher:
+    """Überwacht das configs-Verzeichnis auf hinzugefügte, geänderte und entfernte .conf-Dateien.
+
+    Benachrichtigungen des Systems (inotify unter Linux, FindFirstChangeNotification
+    unter Windows) wecken den Watcher; was sich geändert hat, ergibt der Vergleich
+    mit einem Index aus mtime und Größe. Ohne Benachrichtigungen wird alle
+    CONFIG_WATCH_INTERVAL Sekunden verglichen. Zusammengehörige Änderungen (z.B.
+    Speichern über eine temporäre Datei) werden CONFIG_WATCH_DEBOUNCE Sekunden
+    gesammelt und dann als on_change(added, modified, removed) mit Mengen von
+    Dateinamen gemeldet (im Watcher-Thread). Der Bestand beim Start wird nur in
+    den Index übernommen, nicht gemeldet.
+    """
+
+    def __init__(self, configs_dir, on_change, interval=CONFIG_WATCH_INTERVAL):
+        self.configs_dir = configs_dir
+        self.on_change = on_change
+        self.interval = interval
+        self.index = {}
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Startet die Überwachung in einem Hintergrund-Thread."""
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        """Beendet die Überwachung."""
+        self._stop_event.set()
+
+    @staticmethod
+    def is_config_file(file_name):
+        """Nur sichtbare .conf-Dateien zählen (keine temporären Dateien des Imports oder von Editoren)."""
+        return file_name.lower().endswith('.conf') and not file_name.startswith('.')
+
+    def _run(self):
+        """Merkt sich den Anfangsbestand und meldet danach jede Änderung."""
+        self.index = self._scan()
+        wait = self._open_notifications()
+        while not self._stop_event.is_set():
+            changed = wait(self.interval)
+            if changed is not None and not changed:
+                continue
+            # Weitere Ereignisse derselben Änderung abwarten
+            deadline = time.monotonic() + CONFIG_WATCH_DEBOUNCE
+            while changed is not None and time.monotonic() < deadline:
+                more = wait(deadline - time.monotonic())
+                changed = None if more is None else changed | more
+            self._apply(changed)
+
+    def _open_notifications(self):
+        """Gibt wait(timeout) zurück: geänderte Dateinamen, None (unbekannt, alles vergleichen) oder eine leere Menge."""
+        try:
+            if sys.platform == 'win32':
+                return self._open_windows_notifications()
+            if sys.platform.startswith('linux'):
+                return self._open_inotify()
+        except OSError as e:
+            print(f"Benachrichtigungen für '{self.configs_dir}' nicht verfügbar, vergleiche regelmäßig: {e}")
+        return self._poll
+
+    def _poll(self, timeout):
+        """Ersatz ohne Benachrichtigungen: wartet und lässt dann alles vergleichen."""
+        self._stop_event.wait(timeout)
+        return None
+
+    def _open_inotify(self):
+        """Richtet inotify für das Verzeichnis ein (Linux)."""
+        import ctypes
+        import ctypes.util
+        import select
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+        if libc.inotify_add_watch(fd, os.fsencode(self.configs_dir), 0x002 | 0x004 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200 | 0x400) < 0:
+            error = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(error, 'inotify_add_watch')
+
+        def wait(timeout):
+            if not select.select([fd], [], [], timeout)[0]:
+                return set()
+            names = set()
+            try:
+                data = os.read(fd, 65536)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset + 16 <= len(data):
+                _, mask, _, length = struct.unpack_from('iIII', data, offset)
+                name = data[offset + 16:offset + 16 + length].rstrip(b'\0')
+                offset += 16 + length
+                if mask & 0x4000:  # IN_Q_OVERFLOW: Ereignisse verloren, alles vergleichen
+                    return None
+                if name:
+                    names.add(os.fsdecode(name))
+            return names
+        return wait
+
+    def _open_windows_notifications(self):
+        """Richtet eine Änderungsbenachrichtigung für das Verzeichnis ein (Windows)."""
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        # FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_SIZE | FILE_NOTIFY_CHANGE_LAST_WRITE
+        handle = kernel32.FindFirstChangeNotificationW(self.configs_dir, False, 0x001 | 0x008 | 0x010)
+        if handle in (None, ctypes.c_void_p(-1).value):
+            raise ctypes.WinError()
+
+        def wait(timeout):
+            if kernel32.WaitForSingleObject(ctypes.c_void_p(handle), int(timeout * 1000)) != 0:
+                return set()
+            kernel32.FindNextChangeNotification(ctypes.c_void_p(handle))
+            return None
+        return wait
+
+    def _scan(self):
+        """Liest mtime und Größe aller .conf-Dateien des Verzeichnisses."""
+        index = {}
+        try:
+            with os.scandir(self.configs_dir) as entries:
+                for entry in entries:
+                    if self.is_config_file(entry.name) and entry.is_file():
+                        stat = entry.stat()
+                        index[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            print(f"Fehler beim Lesen von '{self.configs_dir}': {e}")
+        return index
+
+    def _apply(self, names):
+        """Gleicht den Index für die angegebenen Dateien (None: alle) ab und meldet die Unterschiede."""
+        if names is None:
+            current = self._scan()
+            names = set(current) | set(self.index)
+        else:
+            current = {}
+            for name in names:
+                if not self.is_config_file(name):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.configs_dir, name))
+                    current[name] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    pass
+        added, modified, removed = set(), set(), set()
+        for name in names:
+            if not self.is_config_file(name):
+                continue
+            old, new = self.index.get(name), current.get(name)
+            if old is None and new is not None:
+                added.add(name)
+            elif old is not None and new is None:
+                removed.add(name)
+            elif old != new:
+                modified.add(name)
+            if new is None:
+                self.index.pop(name, None)
+            else:
+                self.index[name] = new
+        if added or modified or removed:
+            self._report(added, modified, removed)
+
+    def _report(self, added, modified, removed):
+        """Meldet Änderungen; Fehler im Callback beenden die Überwachung nicht."""
+        try:
+            self.on_change(added, modified, removed)
+        except Exception as e:
+            print(f"Fehler beim Melden von Änderungen in '{self.configs_dir}': {e}")
+
+def split_endpoint(endpoint):
+    """Zerlegt 'host:port' bzw. '[v6-adresse]:port' in (host, port)."""
+    endpoint = endpoint.strip()
+    if endpoint.startswith('['):
+        host, _, rest = endpoint[1:].partition(']')
+        port = rest.lstrip(':')
+    else:
+        host, _, port = endpoint.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError(f"Ungültiger Endpunkt: '{endpoint}'")
+    return host, int(port)
+
+def is_ip_address(host):
+    """Prüft, ob host bereits eine IPv4- oder IPv6-Adresse ist."""
+    import ipaddress
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+def query_dns(server, host, record_type, timeout=DNS_TIMEOUT):
+    """Fragt A- bzw. AAAA-Einträge direkt per UDP bei einem DNS-Server ab ('adresse' oder 'adresse:port').
+
+    Gibt eine Liste von (Adresse, TTL) zurück; CNAME-Ketten in der Antwort werden übersprungen.
+    """
+    try:
+        server_host, server_port = split_endpoint(server)
+    except ValueError:
+        server_host, server_port = server, 53
+    query_id = random.getrandbits(16)
+    question = b''.join(bytes([len(label)]) + label for label in host.rstrip('.').encode('idna').split(b'.')) + b'\0'
+    packet = struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 0) + question + struct.pack('!HH', record_type, 1)
+    family, sock_type, proto, _, address = socket.getaddrinfo(server_host, server_port, type=socket.SOCK_DGRAM)[0]
+    with socket.socket(family, sock_type, proto) as sock:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.send(packet)
+        while True:
+            response = sock.recv(4096)
+            if len(response) >= 12 and struct.unpack('!H', response[:2])[0] == query_id:
+                break
+
+    _, flags, question_count, answer_count, _, _ = struct.unpack('!HHHHHH', response[:12])
+    if flags & 0x000F:
+        raise OSError(f"DNS-Fehler {flags & 0x000F} für '{host}'")
+    offset = 12
+    for _ in range(question_count):
+        offset = skip_dns_name(response, offset) + 4
+    results = []
+    for _ in range(answer_count):
+        offset = skip_dns_name(response, offset)
+        answer_type, _, ttl, length = struct.unpack('!HHIH', response[offset:offset + 10])
+        offset += 10
+        if answer_type == record_type:
+            family = socket.AF_INET if record_type == DNS_RECORD_A else socket.AF_INET6
+            results.append((socket.inet_ntop(family, response[offset:offset + length]), ttl))
+        offset += length
+    return results
+
+def skip_dns_name(data, offset):
+    """Gibt die Position hinter einem (ggf. komprimierten) Namen in einer DNS-Nachricht zurück."""
+    while True:
+        length = data[offset]
+        if length >= 0xC0:
+            return offset + 2
+        if length == 0:
+            return offset + 1
+        offset += length + 1
+
+class EndpointResolver:
+    """Löst die Hostnamen von Endpunkten im Voraus auf und hält die Adressen mit TTL vor.
+
+    lookup() liefert abgelaufene Einträge noch bis zu DNS_STALE_LIMIT Sekunden
+    sofort zurück und erneuert sie im Hintergrund (stale-while-revalidate).
+    Nach start() werden bald ablaufende Einträge zudem vorab erneuert. Ohne
+    server wird der Resolver des Systems verwendet (ohne TTL, daher
+    DNS_DEFAULT_TTL), sonst werden A/AAAA-Einträge samt TTL direkt abgefragt.
+    """
+
+    def __init__(self, server=None, timeout=DNS_TIMEOUT):
+        self.server = server
+        self.timeout = timeout
+        self._cache = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Startet die Hintergrund-Aktualisierung."""
+        threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def prefetch(self, hosts):
+        """Löst die noch nicht oder nicht mehr gültigen Hostnamen im Hintergrund auf."""
+        now = time.monotonic()
+        for host in dict.fromkeys(hosts):
+            entry = self._cache.get(host)
+            if not is_ip_address(host) and (not entry or entry['expires'] <= now):
+                self._refresh_in_background(host)
+
+    def lookup(self, host):
+        """Gibt die Adressen eines Hostnamens zurück, bei Bedarf aus dem Zwischenspeicher; [] bei Fehlern."""
+        if is_ip_address(host):
+            return [host]
+        now = time.monotonic()
+        entry = self._cache.get(host)
+        if entry and now < entry['expires']:
+            return entry['addresses']
+        if entry and now < entry['stale_until']:
+            self._refresh_in_background(host)
+            return entry['addresses']
+        try:
+            return self._resolve(host)
+        except OSError:
+            return []
+
+    def resolve_endpoint(self, endpoint):
+        """Ersetzt den Hostnamen in 'host:port' durch die erste Adresse; unverändert, wenn das nicht geht."""
+        try:
+            host, port = split_endpoint(endpoint)
+        except ValueError:
+            return endpoint
+        addresses = self.lookup(host)
+        if not addresses or addresses[0] == host:
+            return endpoint
+        return f"[{addresses[0]}]:{port}" if ':' in addresses[0] else f"{addresses[0]}:{port}"
+
+    def _resolve(self, host):
+        """Fragt die Adressen ab und speichert sie mit ihrer TTL."""
+        if self.server:
+            answers = []
+            for record_type in (DNS_RECORD_A, DNS_RECORD_AAAA):
+                try:
+                    answers += query_dns(self.server, host, record_type, self.timeout)
+                except OSError:
+                    if record_type == DNS_RECORD_AAAA and answers:
+                        break
+                    raise
+            addresses = list(dict.fromkeys(address for address, _ in answers))
+            ttl = min((ttl for _, ttl in answers), default=DNS_MIN_TTL)
+        else:
+            infos = socket.getaddrinfo(host, None, type=socket.SOCK_DGRAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+            ttl = DNS_DEFAULT_TTL
+        if not addresses:
+            raise OSError(f"Keine Adresse für '{host}'")
+        ttl = max(DNS_MIN_TTL, min(DNS_MAX_TTL, ttl))
+        now = time.monotonic()
+        with self._lock:
+            self._cache[host] = {'addresses': addresses, 'expires': now + ttl, 'stale_until': now + ttl + DNS_STALE_LIMIT}
+        return addresses
+
+    def _refresh_in_background(self, host):
+        """Erneuert einen Eintrag in einem Hintergrund-Thread; gleichzeitige Anfragen werden zusammengefasst."""
+        with self._lock:
+            if host in self._refreshing:
+                return
+            self._refreshing.add(host)
+        threading.Thread(target=self._refresh, args=(host,), daemon=True).start()
+
+    def _refresh(self, host):
+        """Erneuert einen Eintrag; bei Fehlern bleibt der bisherige erhalten."""
+        try:
+            self._resolve(host)
+        except OSError as e:
+            print(f"Endpunkt '{host}' konnte nicht aufgelöst werden: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(host)
+
+    def _refresh_loop(self):
+        """Erneuert Einträge, die vor dem nächsten Durchlauf ablaufen würden."""
+        while True:
+            time.sleep(DNS_REFRESH_INTERVAL)
+            deadline = time.monotonic() + 2 * DNS_REFRESH_INTERVAL
+            with self._lock:
+                expiring = [host for host, entry in self._cache.items() if entry['expires'] < deadline < entry['stale_until']]
+            for host in expiring:
+                self._refresh_in_background(host)
+
+def write_runtime_config(config_path, runtime_dir, resolver):
+    """Schreibt eine Kopie der Konfiguration mit aufgelösten Endpunkten nach runtime_dir.
+
+    Gibt den Pfad der Kopie zurück oder config_path, wenn es nichts zu ersetzen gibt.
+    Die Kopie enthält den privaten Schlüssel und ist daher nur für den Benutzer lesbar.
+    """
+    with open(config_path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    new_text = re.sub(
+        r'^(\s*Endpoint\s*=\s*)([^\s#]+)',
+        lambda match: match.group(1) + resolver.resolve_endpoint(match.group(2)),
+        text,
+        flags=re.IGNORECASE | re.MULTILINE
+    )
+    if new_text == text:
+        return config_path
+    runtime_path = os.path.join(runtime_dir, os.path.basename(config_path))
+    fd = os.open(runtime_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(new_text)
+    return runtime_path
+
+class LatencyProber:
+    """Misst Erreichbarkeit und Latenz von Endpunkten parallel und speichert die Ergebnisse zwischen.
+
+    Ein Ergebnis ist die Latenz in Millisekunden oder None, falls der Endpunkt
+    nicht erreichbar ist. Ergebnisse bleiben PROBE_CACHE_TTL Sekunden gültig.
+    """
+
+    def __init__(self, method=DEFAULT_PROBE_METHOD, timeout=DEFAULT_PROBE_TIMEOUT, concurrency=PROBE_CONCURRENCY, ttl=PROBE_CACHE_TTL):
+        self.method = method
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def probe(self, endpoint):
+        """Gibt die (ggf. zwischengespeicherte) Latenz eines Endpunkts zurück."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(endpoint)
+        if cached and now - cached[0] < self.ttl:
+            return cached[1]
+
+        try:
+            host, port = split_endpoint(endpoint)
+            if self.method == PROBE_METHOD_UDP:
+                latency = self._probe_udp(host, port)
+            else:
+                latency = self._probe_icmp(host)
+        except (OSError, ValueError, subprocess.SubprocessError):
+            latency = None
+
+        with self._lock:
+            self._cache[endpoint] = (time.monotonic(), latency)
+        return latency
+
+    def probe_many(self, endpoints):
+        """Misst mehrere Endpunkte gleichzeitig (höchstens concurrency parallel)."""
+        import concurrent.futures
+        endpoints = list(dict.fromkeys(endpoints))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(endpoints)))) as pool:
+            return dict(zip(endpoints, pool.map(self.probe, endpoints)))
+
+    def fastest(self, candidates):
+        """Gibt (Name, Latenz) des schnellsten erreichbaren Kandidaten (Name -> Endpunkt) zurück."""
+        if not candidates:
+            return None, None
+        results = self.probe_many(candidates.values())
+        reachable = [(results[endpoint], name) for name, endpoint in candidates.items() if results[endpoint] is not None]
+        if not reachable:
+            return None, None
+        latency, name = min(reachable)
+        return name, latency
+
+    def invalidate(self):
+        """Verwirft alle zwischengespeicherten Messergebnisse."""
+        with self._lock:
+            self._cache.clear()
+
+    def _probe_udp(self, host, port):
+        """Sendet ein UDP-Paket und misst die Zeit bis zur Antwort."""
+        family, sock_type, proto, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0]
+        with socket.socket(family, sock_type, proto) as sock:
+            sock.settimeout(self.timeout)
+            # connect() sorgt dafür, dass ICMP "port unreachable" als Fehler gemeldet wird
+            sock.connect(address)
+            start = time.perf_counter()
+            sock.send(PROBE_PAYLOAD)
+            sock.recv(2048)
+            return (time.perf_counter() - start) * 1000
+
+    def _probe_icmp(self, host):
+        """Misst die Latenz mit einem einzelnen Ping über das System-Kommando."""
+        if sys.platform == 'win32':
+            cmd = ['ping', '-n', '1', '-w', str(int(self.timeout * 1000)), host]
+        else:
+            cmd = ['ping', '-c', '1', '-W', str(max(1, int(self.timeout))), host]
+        start = time.perf_counter()
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=self.timeout + 2,
+            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        if result.returncode != 0:
+            return None
+        # "time=23ms", "Zeit=23ms", "time<1ms", "time=0.045 ms" (sprachunabhängig)
+        match = re.search(r'[=<]\s*(\d+(?:[.,]\d+)?)\s*ms', result.stdout.decode('utf-8', errors='replace'))
+        if match:
+            return float(match.group(1).replace(',', '.'))
+        return elapsed
+
+class IconCache:
+    """Dekodiert die Zustands-Icons einmalig und hält skalierte Varianten im Speicher.
+
+    Varianten mit Overlay (Aktivitätspunkt, Traffic-Balken) werden beim ersten
+    Zugriff zusammengesetzt und danach ebenfalls aus dem Speicher geliefert.
+    """
+
+    def __init__(self, app_dir, size=TRAY_ICON_SIZE):
+        self.app_dir = app_dir
+        self.size = size
+        self._images = {}
+        self._lock = threading.RLock()
+
+    def get(self, state, size=None, overlay=None):
+        """Gibt das fertige Bild für Zustand, Größe (sonst die des Trays) und Overlay zurück."""
+        size = size or self.size
+        key = (state, size, overlay)
+        image = self._images.get(key)
+        if image is None:
+            with self._lock:
+                image = self._images.get(key)
+                if image is None:
+                    image = self._render(state, size, overlay)
+                    self._images[key] = image
+        return image
+
+    def preload(self):
+        """Dekodiert und skaliert alle Zustands-Icons in der verwendeten Größe vorab."""
+        for state in ICON_FILES:
+            self.get(state)
+
+    def _render(self, state, size, overlay):
+        """Erzeugt eine Variante aus dem Originalbild bzw. der Variante ohne Overlay."""
+        if overlay:
+            image = self.get(state, size).copy()
+            self._draw_overlay(image, overlay)
+            return image
+
+        icon_path = os.path.join(self.app_dir, ICON_FILES[state])
+        if not os.path.exists(icon_path):
+            # Fallback zu einem generischen Icon, falls keines gefunden wird
+            return Image.new('RGBA', (size, size), color='gray')
+        with Image.open(icon_path) as source:
+            image = source.convert('RGBA')
+        if image.size != (size, size):
+            image = image.resize((size, size), Image.LANCZOS)
+        return image
+
+    def _draw_overlay(self, image, overlay):
+        """Zeichnet ein Overlay direkt in das übergebene Bild."""
+        size = image.size[0]
+        draw = ImageDraw.Draw(image)
+        if overlay == OVERLAY_ACTIVITY:
+            radius = max(2, size // 6)
+            draw.ellipse((size - 2 * radius - 1, 0, size - 1, 2 * radius), fill='#1e90ff', outline='white')
+        elif overlay.startswith('traffic'):
+            level = min(int(overlay[len('traffic'):]), TRAFFIC_LEVELS)
+            bar_height = max(2, size // 8)
+            bar_width = size * level // TRAFFIC_LEVELS
+            draw.rectangle((0, size - bar_height, size - 1, size - 1), fill='#404040')
+            draw.rectangle((0, size - bar_height, bar_width - 1, size - 1), fill='#00c8ff')
+
+class LogBuffer:
+    """Begrenzter, threadsicherer Ringpuffer für Ausgabezeilen.
+
+    Der Lese-Thread hängt Zeilen an, die UI holt sie gesammelt mit drain() ab.
+    Läuft der Puffer über, werden die ältesten Zeilen verworfen und gezählt.
+    """
+
+    def __init__(self, max_lines=LOG_BUFFER_LINES):
+        self._lines = collections.deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def extend(self, lines):
+        """Hängt mehrere Zeilen an den Puffer an."""
+        with self._lock:
+            overflow = len(self._lines) + len(lines) - self._lines.maxlen
+            if overflow > 0:
+                self.dropped += overflow
+            self._lines.extend(lines)
+
+    def drain(self):
+        """Gibt alle gesammelten Zeilen und die Zahl verworfener Zeilen zurück und leert den Puffer."""
+        with self._lock:
+            lines = list(self._lines)
+            dropped = self.dropped
+            self._lines.clear()
+            self.dropped = 0
+        return lines, dropped
+
+class SessionLogStore:
+    """Schreibt die Ausgabe jeder Sitzung dauerhaft in komprimierte, nach Größe rotierte Dateien.
+
+    begin(), write() und end() legen nur Ereignisse in eine Warteschlange; ein
+    Hintergrund-Thread sammelt die Zeilen jeder Sitzung SESSION_LOG_FLUSH_INTERVAL
+    Sekunden lang und hängt sie als eigenes gzip-Member an die aktuelle Datei der
+    Verbindung an. Jede Verbindung schreibt in eigene Dateien, die Bereiche einer
+    Sitzung liegen daher zusammenhängend. Der Index (SESSION_LOG_INDEX_FILE) hält
+    je Sitzung Beginn, Ende, Ergebnis, die Zeilen mit Fehlermeldungen (markers)
+    und die Byte-Bereiche (segments: [Datei, Start, Ende]), sodass read() eine
+    Sitzung direkt ansteuert und nur deren Members dekomprimiert. Überschreiten
+    die Dateien zusammen max_total_size, werden die ältesten gelöscht.
+    """
+
+    def __init__(self, log_dir, max_file_size=DEFAULT_SESSION_LOG_MAX_FILE_SIZE, max_total_size=DEFAULT_SESSION_LOG_MAX_TOTAL_SIZE):
+        self.log_dir = log_dir
+        self.max_file_size = max_file_size
+        self.max_total_size = max_total_size
+        self.failure_regex = re.compile(SESSION_LOG_FAILURE_PATTERN, re.IGNORECASE)
+        self.store = SettingsStore(os.path.join(log_dir, SESSION_LOG_INDEX_FILE), delay=SESSION_LOG_INDEX_SAVE_DELAY)
+        self.index = {}
+        self._pending = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._ids = None
+        self._loaded = threading.Event()
+
+    def start(self):
+        """Startet den Schreib-Thread, der zuerst den Index lädt."""
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _load(self):
+        """Lädt den Index; begin(), sessions() und read() warten darauf."""
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+        except OSError as e:
+            print(f"Fehler beim Anlegen des Protokollordners '{self.log_dir}': {e}")
+        data = self.store.load()
+        if data.get('version') != SESSION_LOG_INDEX_VERSION:
+            data.clear()
+            data['version'] = SESSION_LOG_INDEX_VERSION
+        data.setdefault('sessions', [])
+        data.setdefault('files', {})
+        data.setdefault('streams', {})
+        data.setdefault('next_id', 1)
+        data.setdefault('next_file', 1)
+        # Beim letzten Beenden noch offene Sitzungen wurden abgebrochen
+        for session in data['sessions']:
+            if session['ended'] is None:
+                session['ended'] = session['started']
+                session['result'] = 'interrupted'
+        with self._lock:
+            self.index = data
+            self._ids = itertools.count(data['next_id'])
+
+    def begin(self, tunnel):
+        """Beginnt eine neue Sitzung und gibt ihre Nummer zurück."""
+        self._loaded.wait()
+        with self._lock:
+            session_id = next(self._ids)
+        self._queue.put(('begin', session_id, tunnel, time.time()))
+        return session_id
+
+    def write(self, session_id, lines):
+        """Hängt Ausgabezeilen an eine Sitzung an."""
+        self._queue.put(('lines', session_id, lines))
+
+    def mark_connected(self, session_id):
+        """Merkt die Zeile, mit der die Verbindung aufgebaut war."""
+        self._queue.put(('connected', session_id))
+
+    def end(self, session_id, result, detail=None):
+        """Beendet eine Sitzung mit ihrem Ergebnis ('idle' oder 'failed')."""
+        self._queue.put(('end', session_id, result, detail, time.time()))
+
+    def flush(self, timeout=5):
+        """Schreibt alle bis jetzt gemeldeten Zeilen und den Index (z.B. beim Beenden)."""
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        done.wait(timeout)
+        self.store.flush()
+
+    def sessions(self, tunnel=None):
+        """Gibt die Einträge des Index zurück (neueste zuerst), optional nur für eine Verbindung."""
+        self._loaded.wait()
+        with self._lock:
+            sessions = [dict(s) for s in self.index.get('sessions', ()) if tunnel is None or s['tunnel'] == tunnel]
+        sessions.reverse()
+        return sessions
+
+    def read(self, session_id, start=0, limit=SESSION_LOG_READ_LIMIT):
+        """Liest Zeilen einer Sitzung ab Zeile start; gibt (Zeilen, weitere vorhanden) oder None zurück.
+
+        Es werden nur die Members der Sitzung gelesen und stückweise dekomprimiert.
+        """
+        self._loaded.wait()
+        with self._lock:
+            session = next((s for s in self.index.get('sessions', ()) if s['id'] == session_id), None)
+            segments = [list(segment) for segment in session['segments']] if session else None
+        if segments is None:
+            return None
+        lines = []
+        number = 0
+        for line in self._iter_lines(segments):
+            if number >= start:
+                if len(lines) >= limit:
+                    return lines, True
+                lines.append(line)
+            number += 1
+        return lines, False
+
+    def _iter_lines(self, segments):
+        """Liefert die Zeilen der angegebenen Byte-Bereiche, ohne ganze Dateien zu laden."""
+        import zlib
+        for file_name, start, end in segments:
+            try:
+                f = open(os.path.join(self.log_dir, file_name), 'rb')
+            except OSError:
+                continue
+            with f:
+                f.seek(start)
+                remaining = end - start
+                decompressor = zlib.decompressobj(31)
+                pending = ''
+                while remaining > 0:
+                    data = f.read(min(READ_CHUNK_SIZE, remaining))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    while data:
+                        try:
+                            pending += decompressor.decompress(data).decode('utf-8', errors='replace')
+                        except zlib.error:
+                            # Unvollständig geschriebenes Member (z.B. nach einem Absturz)
+                            remaining = 0
+                            break
+                        data = b''
+                        if decompressor.eof:
+                            data = decompressor.unused_data
+                            decompressor = zlib.decompressobj(31)
+                    *complete, pending = pending.split('\n')
+                    yield from complete
+                if pending:
+                    yield pending
+
+    def _run(self):
+        """Schreib-Thread: lädt den Index, sammelt Ereignisse und schreibt in festen Abständen."""
+        try:
+            self._load()
+        finally:
+            self._loaded.set()
+        next_flush = time.monotonic() + SESSION_LOG_FLUSH_INTERVAL
+        while True:
+            try:
+                event = self._queue.get(timeout=max(0, next_flush - time.monotonic()))
+            except queue.Empty:
+                event = None
+            try:
+                if event is not None and event[0] == 'flush':
+                    self._flush_pending()
+                    event[1].set()
+                elif event is not None:
+                    self._handle(event)
+                if time.monotonic() >= next_flush:
+                    self._flush_pending()
+                    next_flush = time.monotonic() + SESSION_LOG_FLUSH_INTERVAL
+            except Exception as e:
+                print(f"Fehler beim Schreiben der Sitzungsprotokolle: {e}")
+
+    def _handle(self, event):
+        """Übernimmt ein Ereignis in den Index bzw. in die gesammelten Zeilen."""
+        kind, session_id = event[0], event[1]
+        if kind == 'begin':
+            session = {'id': session_id, 'tunnel': event[2], 'started': event[3], 'ended': None, 'result': None,
+                       'detail': None, 'lines': 0, 'connected_line': None, 'markers': [], 'segments': []}
+            with self._lock:
+                self.index['sessions'].append(session)
+                self.index['next_id'] = session_id + 1
+                del self.index['sessions'][:-SESSION_LOG_MAX_SESSIONS]
+            self._pending[session_id] = (session, [])
+            self.store.save()
+            return
+        if session_id not in self._pending:
+            return
+        session, lines = self._pending[session_id]
+        if kind == 'lines':
+            for line in event[2]:
+                if len(session['markers']) < SESSION_LOG_MAX_MARKERS and self.failure_regex.search(line):
+                    session['markers'].append(session['lines'] + len(lines))
+                lines.append(line)
+        elif kind == 'connected':
+            session['connected_line'] = session['lines'] + len(lines)
+        elif kind == 'end':
+            self._write_member(session, lines)
+            del self._pending[session_id]
+            with self._lock:
+                session.update(result=event[2], detail=event[3], ended=event[4])
+            self.store.save()
+
+    def _flush_pending(self):
+        """Schreibt die gesammelten Zeilen aller offenen Sitzungen."""
+        for session, lines in self._pending.values():
+            self._write_member(session, lines)
+
+    def _write_member(self, session, lines):
+        """Hängt die Zeilen als gzip-Member an die aktuelle Datei der Verbindung an."""
+        import gzip
+        if not lines:
+            return
+        data = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'), compresslevel=6, mtime=0)
+        file_name = self._current_file(session['tunnel'], len(data))
+        path = os.path.join(self.log_dir, file_name)
+        with open(path, 'ab') as f:
+            start = f.tell()
+            f.write(data)
+            end = f.tell()
+        with self._lock:
+            segments = session['segments']
+            if segments and segments[-1][0] == file_name and segments[-1][2] == start:
+                segments[-1][2] = end
+            else:
+                segments.append([file_name, start, end])
+            session['lines'] += len(lines)
+            self.index['files'][file_name] = end
+        lines.clear()
+        self._enforce_total_size()
+        self.store.save()
+
+    def _current_file(self, tunnel, size):
+        """Gibt die Datei zurück, in die eine Verbindung schreibt; beginnt bei Bedarf eine neue."""
+        streams = self.index['streams']
+        file_name = streams.get(tunnel)
+        written = self.index['files'].get(file_name)
+        if written is None or (written and written + size > self.max_file_size):
+            # Fortlaufende Nummer vorne, damit die ältesten Dateien zuerst gelöscht werden
+            slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', tunnel)[:40]
+            digest = hashlib.sha1(tunnel.encode('utf-8')).hexdigest()[:8]
+            with self._lock:
+                file_name = f"{self.index['next_file']:06d}-{slug}-{digest}.log.gz"
+                self.index['next_file'] += 1
+                self.index['files'][file_name] = 0
+                streams[tunnel] = file_name
+        return file_name
+
+    def _enforce_total_size(self):
+        """Löscht die ältesten Dateien, bis alle zusammen höchstens max_total_size groß sind."""
+        files = self.index['files']
+        current = set(self.index['streams'].values())
+        total = sum(files.values())
+        for file_name in sorted(files):
+            if total <= self.max_total_size:
+                break
+            if file_name in current:
+                continue
+            try:
+                os.remove(os.path.join(self.log_dir, file_name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Fehler beim Löschen von '{file_name}': {e}")
+                continue
+            with self._lock:
+                total -= files.pop(file_name)
+                for session in self.index['sessions']:
+                    session['segments'] = [s for s in session['segments'] if s[0] != file_name]
+                # Beendete Sitzungen ohne gespeicherte Zeilen entfallen
+                self.index['sessions'] = [s for s in self.index['sessions'] if s['segments'] or s['ended'] is None or not s['lines']]
+
+class HistoryStore:
+    """Verlauf aller Verbindungen in einer SQLite-Datenbank.
+
+    record() legt einen Eintrag nur in eine Warteschlange; ein Hintergrund-Thread
+    schreibt alle HISTORY_FLUSH_INTERVAL Sekunden gesammelt in einer Transaktion.
+    Abfragen schreiben vorher ausstehende Einträge und öffnen eine eigene
+    Verbindung, damit sie aus jedem Thread möglich sind. Die Datenbank wird erst
+    bei der ersten Verwendung geöffnet und angelegt, nicht beim Start.
+    """
+
+    COLUMNS = ('profile', 'started', 'ready_after', 'duration', 'exit_code', 'restarts', 'result', 'failure', 'failover')
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self._next_purge = None
+
+    def start(self):
+        """Startet den Schreib-Thread."""
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _ensure_schema(self, conn):
+        """Legt Tabellen und Index an bzw. ergänzt sie (einmal je Prozess, bei der ersten Verwendung)."""
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'id INTEGER PRIMARY KEY, profile TEXT NOT NULL, started REAL NOT NULL, ready_after REAL, '
+                'duration REAL NOT NULL, exit_code INTEGER, restarts INTEGER NOT NULL, result TEXT NOT NULL, failure TEXT, '
+                'failover TEXT)'
+            )
+            # Ältere Datenbanken um die Spalte für das Ausweichprofil ergänzen
+            if 'failover' not in [row[1] for row in conn.execute('PRAGMA table_info(sessions)')]:
+                conn.execute('ALTER TABLE sessions ADD COLUMN failover TEXT')
+            conn.execute('CREATE INDEX IF NOT EXISTS sessions_profile_started ON sessions (profile, started)')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)')
+            conn.commit()
+            self._schema_ready = True
+
+    def _purge_if_due(self, conn):
+        """Löscht Einträge, die älter als HISTORY_RETENTION_DAYS sind, höchstens alle HISTORY_PURGE_INTERVAL Sekunden."""
+        now = time.time()
+        if self._next_purge is None:
+            # Zeitpunkt der letzten Löschung über Neustarts hinweg merken
+            row = conn.execute("SELECT value FROM meta WHERE key = 'last_purge'").fetchone()
+            self._next_purge = row[0] + HISTORY_PURGE_INTERVAL if row else now
+        if now < self._next_purge:
+            return
+        conn.execute('DELETE FROM sessions WHERE started < ?', (now - HISTORY_RETENTION_DAYS * 86400,))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_purge', ?)", (now,))
+        self._next_purge = now + HISTORY_PURGE_INTERVAL
+
+    def record(self, **row):
+        """Merkt einen Eintrag mit den Feldern aus COLUMNS zum Schreiben vor."""
+        self._queue.put(tuple(row.get(column) for column in self.COLUMNS))
+
+    def flush(self, timeout=5):
+        """Schreibt alle vorgemerkten Einträge und wartet darauf."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def _run(self):
+        """Schreib-Thread: sammelt Einträge und schreibt sie gebündelt."""
+        import sqlite3
+        conn = None
+        insert = f"INSERT INTO sessions ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})"
+        while True:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + HISTORY_FLUSH_INTERVAL
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    if conn is None:
+                        conn = sqlite3.connect(self.path)
+                    self._ensure_schema(conn)
+                    with conn:
+                        self._purge_if_due(conn)
+                        conn.executemany(insert, batch)
+            except sqlite3.Error as e:
+                print(f"Fehler beim Schreiben des Verlaufs: {e}")
+            for waiter in waiters:
+                waiter.set()
+
+    def _query(self, sql, args=(), flush=True):
+        import sqlite3
+        if flush:
+            self.flush()
+        if not self._schema_ready and not os.path.exists(self.path):
+            # Noch nichts aufgezeichnet: die Datenbank nicht nur für eine Abfrage anlegen
+            return []
+        try:
+            with contextlib.closing(sqlite3.connect(self.path)) as conn:
+                self._ensure_schema(conn)
+                conn.row_factory = sqlite3.Row
+                return [dict(row) for row in conn.execute(sql, args)]
+        except sqlite3.Error as e:
+            print(f"Fehler beim Lesen des Verlaufs: {e}")
+            return []
+
+    def recent(self, profile=None, limit=100):
+        """Gibt die letzten Einträge zurück (neueste zuerst), optional nur für eine Verbindung."""
+        columns = ', '.join(('id',) + self.COLUMNS)
+        if profile is None:
+            return self._query(f'SELECT {columns} FROM sessions ORDER BY started DESC LIMIT ?', (limit,))
+        return self._query(f'SELECT {columns} FROM sessions WHERE profile = ? ORDER BY started DESC LIMIT ?', (profile, limit))
+
+    def profile_stats(self, days=HISTORY_STATS_DAYS, flush=True):
+        """Wertet die letzten days Tage je Verbindung aus, geordnet nach der Rangfolge.
+
+        Gerechnet wird mit dem Median der Zeit bis zur Verbindung geteilt durch die
+        Erfolgsquote, also der zu erwartenden Zeit bis zu einer stehenden
+        Verbindung. Verbindungen ohne Erfolg stehen am Ende. Ohne flush fehlen
+        die noch nicht geschriebenen Einträge.
+        """
+        import statistics
+        rows = self._query(
+            'SELECT profile, ready_after, duration, restarts, result FROM sessions WHERE started >= ?',
+            (time.time() - days * 86400,), flush
+        )
+        profiles = {}
+        for row in rows:
+            profiles.setdefault(row['profile'], []).append(row)
+        stats = []
+        for profile, sessions in profiles.items():
+            ready_times = [s['ready_after'] for s in sessions if s['ready_after'] is not None]
+            failures = sum(1 for s in sessions if s['result'] == STATE_FAILED)
+            median_connect = statistics.median(ready_times) if ready_times else None
+            success_rate = len(ready_times) / len(sessions)
+            stats.append({
+                'profile': profile,
+                'sessions': len(sessions),
+                'median_connect': median_connect,
+                'failure_rate': failures / len(sessions),
+                'drops': sum(s['restarts'] for s in sessions),
+                'total_duration': sum(s['duration'] for s in sessions),
+                'score': median_connect / success_rate if ready_times else None,
+            })
+        stats.sort(key=lambda s: (s['score'] is None, s['score'] or 0, s['failure_rate']))
+        return stats
+
+def format_bytes(value):
+    """Formatiert eine Byte-Anzahl mit passender Einheit (z.B. '1.5 MB')."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024 or unit == 'GB':
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+
+class TrafficStats:
+    """Zählerstände und Durchsatzverlauf einer Verbindung.
+
+    update() übernimmt neue Zählerstände (z.B. aus der Ausgabe von wiresock-client),
+    sample() hält in festen Abständen den Durchsatz seit dem letzten Messpunkt fest.
+    Der Verlauf liegt in Ringpuffern (array) fester Größe, der Speicherbedarf
+    bleibt also auch bei langen Sitzungen konstant. Setzt ein Neustart des
+    Prozesses die Zähler zurück, wird ab dem letzten Stand weitergezählt.
+    """
+
+    def __init__(self, size=TRAFFIC_HISTORY_SIZE):
+        self.size = size
+        self.times = array.array('d', bytes(8 * size))
+        self.rx_rates = array.array('d', bytes(8 * size))
+        self.tx_rates = array.array('d', bytes(8 * size))
+        self.count = 0
+        self.rx_bytes = None
+        self.tx_bytes = None
+        self.last_handshake = None
+        self._raw = {'rx': 0, 'tx': 0}
+        self._base = {'rx': 0, 'tx': 0}
+        self._last_sample = None
+        self._lock = threading.Lock()
+
+    def update(self, rx=None, tx=None, handshake=None):
+        """Übernimmt neue Zählerstände (Bytes seit Prozessstart) und die Zeit des letzten Handshakes."""
+        with self._lock:
+            if rx is not None:
+                self.rx_bytes = self._accumulate('rx', rx)
+            if tx is not None:
+                self.tx_bytes = self._accumulate('tx', tx)
+            if handshake:
+                self.last_handshake = handshake
+
+    def _accumulate(self, counter, value):
+        """Rechnet einen Zählerstand des Prozesses in einen Gesamtstand der Sitzung um."""
+        if value < self._raw[counter]:
+            # Der Prozess wurde neu gestartet und zählt wieder ab 0
+            self._base[counter] += self._raw[counter]
+        self._raw[counter] = value
+        return self._base[counter] + value
+
+    def sample(self, now=None):
+        """Speichert den Durchsatz seit dem letzten Messpunkt im Ringpuffer."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            rx, tx = self.rx_bytes or 0, self.tx_bytes or 0
+            if self._last_sample is not None:
+                last_time, last_rx, last_tx = self._last_sample
+                elapsed = now - last_time
+                if elapsed > 0:
+                    index = self.count % self.size
+                    self.times[index] = now
+                    self.rx_rates[index] = max(0, rx - last_rx) / elapsed
+                    self.tx_rates[index] = max(0, tx - last_tx) / elapsed
+                    self.count += 1
+            self._last_sample = (now, rx, tx)
+
+    def rates(self):
+        """Gibt den Durchsatz (Bytes/s) des letzten Messpunkts zurück."""
+        with self._lock:
+            if not self.count:
+                return 0.0, 0.0
+            index = (self.count - 1) % self.size
+            return self.rx_rates[index], self.tx_rates[index]
+
+    def history(self):
+        """Gibt den Verlauf vom ältesten zum neuesten Messpunkt als Listen zurück."""
+        with self._lock:
+            length = min(self.count, self.size)
+            start = (self.count - length) % self.size
+            order = [(start + i) % self.size for i in range(length)]
+            return {
+                'times': [self.times[i] for i in order],
+                'rx_rate': [self.rx_rates[i] for i in order],
+                'tx_rate': [self.tx_rates[i] for i in order],
+            }
+
+    def snapshot(self):
+        """Gibt Zählerstände, Durchsatz und Alter des letzten Handshakes als Dict zurück."""
+        rx_rate, tx_rate = self.rates()
+        handshake_age = None if self.last_handshake is None else max(0.0, time.time() - self.last_handshake)
+        return {'rx_bytes': self.rx_bytes, 'tx_bytes': self.tx_bytes, 'rx_rate': rx_rate, 'tx_rate': tx_rate, 'handshake_age': handshake_age}
+
+class TunnelSession:
+    """Startet einen Wiresock-Prozess und verfolgt dessen Zustand anhand der Ausgabe.
+
+    Läuft komplett in einem eigenen Thread. Die Ausgabe wird blockweise gelesen
+    und in den Ringpuffer self.log geschrieben. Zustandswechsel und Ausgabeblöcke
+    werden über die Callbacks on_state(session, state, detail) und
+    on_output(session, lines) gemeldet; diese werden im Lese-Thread aufgerufen.
+    Zählerstände und Handshakes in der Ausgabe (traffic_patterns) werden an
+    traffic (TrafficStats) übergeben.
+
+    Zugleich die Schnittstelle eines Backends (siehe TUNNEL_BACKENDS): run()
+    bzw. start(), stop() und abort() steuern die Verbindung, Ereignisse kommen
+    über on_state, Statistiken über traffic. Andere Backends überschreiben
+    _on_spawned() und _scan_output().
+    """
+
+    def __init__(self, name, cmd, ready_patterns=None, timeout=DEFAULT_CONNECT_TIMEOUT, on_state=None, on_output=None, log=None,
+                 traffic=None, traffic_patterns=None):
+        self.name = name
+        self.cmd = cmd
+        self.timeout = timeout
+        self.on_state = on_state
+        self.on_output = on_output
+        self.state = STATE_IDLE
+        self.detail = None
+        self.process = None
+        self.log = log or LogBuffer()
+        self.last_output = time.monotonic()
+        self._abort_reason = None
+        self.ready_regexes = [re.compile(p, re.IGNORECASE) for p in (ready_patterns or DEFAULT_READY_PATTERNS)]
+        self.traffic = traffic
+        self.traffic_regexes = [re.compile(p, re.IGNORECASE) for p in (traffic_patterns or DEFAULT_TRAFFIC_PATTERNS)]
+        self._lock = threading.Lock()
+        self._stop_requested = False
+        self._timer = None
+        self._spawned_at = None  # perf_counter() nach dem Start des Prozesses, bis zur ersten Ausgabe
+        self._handshake_start = None
+
+    def start(self):
+        """Startet den Verbindungsaufbau in einem Hintergrund-Thread."""
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        """Startet den Prozess und liest seine Ausgabe, bis er beendet wird (blockierend)."""
+        if not self._set_state(STATE_SPAWNING):
+            return
+        start = time.perf_counter()
+        try:
+            self.process = subprocess.Popen(
+                self.cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+            )
+        except Exception as e:
+            self._set_state(STATE_FAILED, e)
+            return
+        self._spawned_at = self._handshake_start = time.perf_counter()
+        METRICS.observe('spawn', self._spawned_at - start)
+
+        # Falls stop() während des Starts aufgerufen wurde
+        if self._stop_requested:
+            self._terminate()
+            self._set_state(STATE_IDLE)
+            return
+
+        self._set_state(STATE_HANDSHAKING)
+        self._timer = threading.Timer(self.timeout, self._on_timeout)
+        self._timer.daemon = True
+        self._timer.start()
+        self._on_spawned()
+
+        self._read_output()
+
+        self._timer.cancel()
+        exit_code = self.process.wait()
+        if self._stop_requested:
+            self._set_state(STATE_IDLE)
+        else:
+            self._set_state(STATE_FAILED, self._abort_reason or exit_code)
+
+    def _on_spawned(self):
+        """Wird nach dem Start des Prozesses aufgerufen, bevor dessen Ausgabe gelesen wird."""
+        pass
+
+    def _read_output(self):
+        """Liest die Ausgabe blockweise statt zeilenweise, bis der Prozess sie schließt."""
+        pending = b''
+        while True:
+            chunk = self.process.stdout.read1(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            pending += chunk
+            complete, newline, pending = pending.rpartition(b'\n')
+            if not newline:
+                # Sehr lange Zeilen ohne Umbruch nicht unbegrenzt sammeln
+                if len(pending) >= READ_CHUNK_SIZE:
+                    complete, pending = pending, b''
+                else:
+                    continue
+            self._handle_output(complete)
+        if pending:
+            self._handle_output(pending)
+
+    def _handle_output(self, data):
+        """Dekodiert einen Ausgabeblock, puffert ihn und prüft ihn auf den Handshake."""
+        self.last_output = time.monotonic()
+        if self._spawned_at is not None:
+            METRICS.since('first_output', self._spawned_at)
+            self._spawned_at = None
+        text = data.decode('utf-8', errors='replace').replace('\r', '')
+        lines = text.split('\n')
+        self.log.extend(lines)
+        if self.on_output:
+            self.on_output(self, lines)
+        self._scan_output(text)
+
+    def _scan_output(self, text):
+        """Sucht in einem Ausgabeblock nach dem Handshake und nach Zählerständen."""
+        ready = self.is_ready_line(text)
+        if self.traffic:
+            self._update_traffic(text, ready)
+        if ready:
+            self._mark_connected()
+
+    def _mark_connected(self):
+        """Wechselt nach dem ersten Handshake in den Zustand 'connected'."""
+        if self.state == STATE_HANDSHAKING:
+            self._timer.cancel()
+            METRICS.since('handshake', self._handshake_start)
+            self._set_state(STATE_CONNECTED)
+
+    def _update_traffic(self, text, ready):
+        """Übernimmt die letzten Zählerstände eines Ausgabeblocks in die Verkehrsstatistik."""
+        values = {}
+        for regex in self.traffic_regexes:
+            for match in regex.finditer(text):
+                values.update((key, int(value)) for key, value in match.groupdict().items() if value is not None)
+        handshake = time.time() if ready else values.get('handshake')
+        if values or handshake:
+            self.traffic.update(rx=values.get('rx'), tx=values.get('tx'), handshake=handshake)
+
+    def is_ready_line(self, line):
+        """Prüft, ob eine Ausgabezeile einen erfolgreichen Handshake meldet."""
+        return any(regex.search(line) for regex in self.ready_regexes)
+
+    def stop(self, timeout=5):
+        """Beendet den Prozess (blockierend, daher nicht im UI-Thread aufrufen)."""
+        self._stop_requested = True
+        if self._timer:
+            self._timer.cancel()
+        self._terminate(timeout)
+
+    def abort(self, reason):
+        """Beendet den Prozess als Fehler (z.B. bei hängender Ausgabe), damit er neu gestartet wird."""
+        self._abort_reason = reason
+        self._terminate()
+
+    def _terminate(self, timeout=5):
+        """Beendet den Prozess, notfalls mit kill()."""
+        if not self.process or self.process.poll() is not None:
+            return
+        try:
+            self.process.terminate()
+            self.process.wait(timeout=timeout)
+        except Exception as e:
+            print(f"Fehler beim Beenden des Prozesses: {e}")
+            try:
+                self.process.kill()
+            except Exception:
+                pass
+
+    def _on_timeout(self):
+        """Wird aufgerufen, wenn der Handshake nicht rechtzeitig erfolgt ist."""
+        if self._set_state(STATE_FAILED, 'timeout'):
+            self._stop_requested = True
+            self._terminate()
+
+    def _set_state(self, state, detail=None):
+        """Setzt den Zustand und meldet ihn; nach 'failed' sind keine Wechsel mehr möglich."""
+        with self._lock:
+            if self.state == STATE_FAILED or (self._stop_requested and state != STATE_IDLE):
+                return False
+            self.state = state
+            self.detail = detail
+        if self.on_state:
+            self.on_state(self, state, detail)
+        return True
+
+class UapiClient:
+    """Client für das UAPI-Protokoll (Cross-Platform Userspace Interface) von WireGuard.
+
+    Jede Anfrage öffnet eine eigene Verbindung zum Steuer-Socket (Unix-Socket,
+    unter Windows Named Pipe). Antworten bestehen aus key=value-Zeilen und
+    enden mit errno=<n>; ein Wert ungleich 0 wird als OSError gemeldet.
+    """
+
+    def __init__(self, path, timeout=5):
+        self.path = path
+        self.timeout = timeout
+
+    def get(self):
+        """Fragt den Zustand ab und gibt die Felder des Interfaces mit der Liste 'peers' zurück."""
+        interface = {'peers': []}
+        section = interface
+        for key, value in self._request('get=1\n\n'):
+            if key == 'public_key':
+                section = {'public_key': value, 'allowed_ips': []}
+                interface['peers'].append(section)
+            elif key == 'allowed_ip':
+                section['allowed_ips'].append(value)
+            else:
+                section[key] = int(value) if value.isdigit() else value
+        return interface
+
+    def set(self, lines):
+        """Überträgt Konfigurationszeilen (key=value)."""
+        self._request('set=1\n' + ''.join(f'{line}\n' for line in lines) + '\n')
+
+    def _request(self, text):
+        """Sendet eine Anfrage und gibt die Antwort als Liste von (key, value) zurück."""
+        if sys.platform == 'win32':
+            with open(self.path, 'r+b', buffering=0) as stream:
+                return self._exchange(stream, text)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            with sock.makefile('rwb') as stream:
+                return self._exchange(stream, text)
+
+    def _exchange(self, stream, text):
+        """Schreibt die Anfrage und liest die Antwort bis zur errno-Zeile."""
+        stream.write(text.encode('utf-8'))
+        stream.flush()
+        pairs = []
+        while True:
+            line = stream.readline()
+            if not line:
+                raise ConnectionError(f"UAPI-Verbindung '{self.path}' wurde vorzeitig geschlossen")
+            key, _, value = line.decode('utf-8', errors='replace').rstrip('\n').partition('=')
+            if key == 'errno':
+                if value != '0':
+                    raise OSError(int(value) if value.isdigit() else 0, f"UAPI-Fehler {value}")
+                return pairs
+            if key:
+                pairs.append((key, value))
+
+def wireguard_key_to_hex(value):
+    """Wandelt einen Base64-Schlüssel aus einer WireGuard-Konfiguration in die Hex-Form von UAPI um."""
+    import base64
+    try:
+        key = base64.b64decode(value, validate=True)
+    except ValueError:
+        key = b''
+    if len(key) != 32:
+        raise ValueError('invalid_key')
+    return key.hex()
+
+def build_uapi_config(text, resolver=None):
+    """Wandelt eine WireGuard-Konfiguration in die Zeilen einer UAPI-set-Anfrage um.
+
+    Endpunkte mit Hostnamen werden aufgelöst, mit resolver (EndpointResolver)
+    bevorzugt aus dessen Zwischenspeicher. Address, DNS und MTU gehören nicht
+    zu UAPI; Adressen und Routen muss das System bzw. die Implementierung setzen.
+    """
+    interface, peers = read_wireguard_sections(text)
+    if not interface or 'privatekey' not in interface:
+        raise ValueError('missing_private_key')
+    lines = [f"private_key={wireguard_key_to_hex(interface['privatekey'])}", 'replace_peers=true']
+    if 'listenport' in interface:
+        lines.append(f"listen_port={int(interface['listenport'])}")
+    for peer in peers:
+        lines.append(f"public_key={wireguard_key_to_hex(peer.get('publickey', ''))}")
+        if 'presharedkey' in peer:
+            lines.append(f"preshared_key={wireguard_key_to_hex(peer['presharedkey'])}")
+        if 'endpoint' in peer:
+            host, port = split_endpoint(peer['endpoint'])
+            addresses = resolver.lookup(host) if resolver else []
+            address = addresses[0] if addresses else socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0][4][0]
+            lines.append(f"endpoint=[{address}]:{port}" if ':' in address else f"endpoint={address}:{port}")
+        if 'persistentkeepalive' in peer:
+            lines.append(f"persistent_keepalive_interval={int(peer['persistentkeepalive'])}")
+        lines.append('replace_allowed_ips=true')
+        lines.extend(f"allowed_ip={network}" for network in parse_networks(peer.get('allowedips', '')))
+    return lines
+
+class UapiTunnelSession(TunnelSession):
+    """Verbindung über eine WireGuard-Userspace-Implementierung (z.B. wireguard-go, boringtun).
+
+    Der Prozess wird wie bei TunnelSession gestartet, seine Ausgabe aber nur
+    protokolliert. Nach dem Start wird die Konfiguration (config_lines) über den
+    Steuer-Socket uapi_path übertragen; Handshake und Zählerstände werden danach
+    abgefragt (bis zum Handshake alle UAPI_HANDSHAKE_POLL_INTERVAL, dann alle
+    UAPI_POLL_INTERVAL Sekunden) statt aus der Ausgabe gelesen.
+    """
+
+    def __init__(self, name, cmd, uapi_path, config_lines, **kwargs):
+        super().__init__(name, cmd, **kwargs)
+        self.uapi = UapiClient(uapi_path)
+        self.config_lines = config_lines
+
+    def _on_spawned(self):
+        """Startet die Abfrage des Steuer-Sockets."""
+        threading.Thread(target=self._poll_uapi, args=(self.process,), daemon=True).start()
+
+    def _scan_output(self, text):
+        """Die Ausgabe wird nur protokolliert; Zustand und Zählerstände liefert der Steuer-Socket."""
+        pass
+
+    def _poll_uapi(self, process):
+        """Überträgt die Konfiguration und fragt den Zustand ab, bis der Prozess endet."""
+        configured = False
+        while process.poll() is None and not self._stop_requested:
+            try:
+                if not configured:
+                    self.uapi.set(self.config_lines)
+                    configured = True
+                status = self.uapi.get()
+            except (FileNotFoundError, ConnectionRefusedError):
+                # Der Steuer-Socket wird erst kurz nach dem Start angelegt
+                time.sleep(UAPI_HANDSHAKE_POLL_INTERVAL)
+                continue
+            except OSError as e:
+                self.abort(str(e))
+                return
+            self.last_output = time.monotonic()
+            self._apply_status(status)
+            time.sleep(UAPI_POLL_INTERVAL if self.state == STATE_CONNECTED else UAPI_HANDSHAKE_POLL_INTERVAL)
+
+    def _apply_status(self, status):
+        """Übernimmt Zählerstände und Handshake aller Peers."""
+        peers = status['peers']
+        handshake = max((peer.get('last_handshake_time_sec', 0) for peer in peers), default=0)
+        if self.traffic:
+            self.traffic.update(
+                rx=sum(peer.get('rx_bytes', 0) for peer in peers),
+                tx=sum(peer.get('tx_bytes', 0) for peer in peers),
+                handshake=handshake or None
+            )
+        if handshake:
+            self._mark_connected()
+
+def uapi_interface_name(config_name):
+    """Leitet einen gültigen Interface-Namen (höchstens 15 Zeichen) aus dem Namen der Verbindung ab."""
+    return 'ss' + hashlib.sha1(config_name.encode('utf-8')).hexdigest()[:10]
+
+def create_wiresock_session(settings, config_name, config_path, resolver=None, **kwargs):
+    """Backend 'wiresock': startet wiresock-client und wertet dessen Ausgabe aus."""
+    cmd = [settings["wiresock_path"], 'run', '-config', f'{config_path}']
+    return TunnelSession(
+        config_name,
+        cmd,
+        ready_patterns=settings["ready_patterns"],
+        timeout=settings["connect_timeout"],
+        traffic_patterns=settings["traffic_patterns"],
+        **kwargs
+    )
+
+def create_uapi_session(settings, config_name, config_path, resolver=None, **kwargs):
+    """Backend 'uapi': startet uapi_command und steuert die Verbindung über den UAPI-Steuer-Socket.
+
+    In uapi_command werden {interface}, {socket} und {config} ersetzt.
+    """
+    with open(config_path, 'r', encoding='utf-8', errors='replace') as f:
+        config_lines = build_uapi_config(f.read(), resolver)
+    interface = uapi_interface_name(config_name)
+    if sys.platform == 'win32':
+        uapi_path = UAPI_PIPE_PREFIX + interface
+    else:
+        uapi_path = os.path.join(UAPI_SOCKET_DIR, f'{interface}.sock')
+    cmd = [part.format(interface=interface, socket=uapi_path, config=config_path) for part in settings["uapi_command"]]
+    if not shutil.which(cmd[0]):
+        raise ValueError(f"'{cmd[0]}' wurde nicht gefunden")
+    return UapiTunnelSession(config_name, cmd, uapi_path, config_lines, timeout=settings["connect_timeout"], **kwargs)
+
+# Backend-Name (Einstellung "backend") -> Funktion, die eine noch nicht gestartete Sitzung erzeugt;
+# resolver ist der EndpointResolver des Dienstes
+TUNNEL_BACKENDS = {
+    'wiresock': create_wiresock_session,
+    'uapi': create_uapi_session,
+}
+
+class ConnectionSupervisor:
+    """Überwacht eine Verbindung und startet sie nach Abstürzen mit Backoff neu.
+
+    session_factory(name, log, on_state, traffic) erzeugt eine neue, noch nicht gestartete
+    TunnelSession. Nach einem unerwarteten Ende einer bereits aufgebauten Verbindung
+    (oder hängender Ausgabe) wird mit exponentiellem Backoff und Jitter neu gestartet,
+    höchstens max_restarts-mal pro restart_window. Nach failover_after Fehlversuchen
+    in Folge wird auf die Ersatzverbindung aus failover (Name -> Name) gewechselt;
+    key bleibt dabei der Name, unter dem die Verbindung gestartet wurde (Standard: name).
+    Zustände werden wie bei TunnelSession über on_state(supervisor, state, detail) gemeldet.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, name, session_factory, on_state=None, policy=None, failover=None, key=None):
+        self.id = next(ConnectionSupervisor._ids)
+        self.name = name
+        self.key = name if key is None else key
+        self.session_factory = session_factory
+        self.on_state = on_state
+        self.policy = dict(DEFAULT_RECONNECT_POLICY, **(policy or {}))
+        self.failover = failover or {}
+        self.log = LogBuffer()
+        self.traffic = TrafficStats()
+        self.session = None
+        self.state = STATE_IDLE
+        self.connected_once = False
+        # Statistik dieser Sitzung
+        self.started_at = time.time()
+        self._created_at = time.perf_counter()
+        self.restarts = 0
+        self.ready_after = None  # Sekunden bis zum ersten Handshake
+        self.downtime = 0.0
+        self._down_since = None
+        self._failures_in_row = 0
+        self._restart_times = collections.deque()
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Startet die Überwachung in einem Hintergrund-Thread."""
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        """Startet Sitzungen, bis stop() aufgerufen wird oder kein Neustart mehr erlaubt ist (blockierend)."""
+        threading.Thread(target=self._watch_output, daemon=True).start()
+        while not self._stop_event.is_set():
+            try:
+                self.session = self.session_factory(self.name, self.log, self._on_session_state, self.traffic)
+            except Exception as e:
+                self._report(STATE_FAILED, e)
+                return
+            self.session.run()
+            if self._stop_event.is_set():
+                break
+
+            # Die Sitzung wurde unerwartet beendet
+            if self._down_since is None:
+                self._down_since = time.monotonic()
+            detail = self.session.detail
+            if not self.connected_once or not self.policy["enabled"]:
+                self._report(STATE_FAILED, detail)
+                return
+            if not self._allow_restart():
+                self._report(STATE_FAILED, 'restart_limit')
+                return
+
+            self._failures_in_row += 1
+            alternate = self.failover.get(self.name)
+            if alternate and self._failures_in_row >= self.policy["failover_after"]:
+                self.name = alternate
+                self._failures_in_row = 0
+
+            delay = self._backoff_delay()
+            self.restarts += 1
+            self._report(STATE_RECONNECTING, delay)
+            if self._stop_event.wait(delay):
+                break
+        self._report(STATE_IDLE)
+
+    def request_stop(self):
+        """Markiert die Überwachung als beendet, ohne auf den Prozess zu warten."""
+        self._stop_event.set()
+
+    @property
+    def stop_requested(self):
+        """True, sobald die Verbindung vom Benutzer getrennt wurde."""
+        return self._stop_event.is_set()
+
+    def stop(self, timeout=5):
+        """Beendet die Überwachung und die laufende Sitzung (blockierend)."""
+        self._stop_event.set()
+        if self.session:
+            with METRICS.measure('disconnect'):
+                self.session.stop(timeout)
+
+    def _backoff_delay(self):
+        """Exponentielle Wartezeit mit Jitter (50-100 %) für den nächsten Neustart."""
+        delay = min(self.policy["max_delay"], self.policy["base_delay"] * 2 ** (self._failures_in_row - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _allow_restart(self):
+        """Begrenzt die Zahl der Neustarts innerhalb des Zeitfensters."""
+        now = time.monotonic()
+        while self._restart_times and now - self._restart_times[0] > self.policy["restart_window"]:
+            self._restart_times.popleft()
+        if len(self._restart_times) >= self.policy["max_restarts"]:
+            return False
+        self._restart_times.append(now)
+        return True
+
+    def _finish_downtime(self):
+        """Addiert eine laufende Unterbrechung zur Ausfallzeit."""
+        if self._down_since is not None:
+            self.downtime += time.monotonic() - self._down_since
+            self._down_since = None
+
+    def _watch_output(self):
+        """Bricht eine verbundene Sitzung ab, wenn sie zu lange keine Ausgabe mehr liefert."""
+        stall_timeout = self.policy["stall_timeout"]
+        if not stall_timeout:
+            return
+        while not self._stop_event.wait(1):
+            session = self.session
+            if session and session.state == STATE_CONNECTED and time.monotonic() - session.last_output > stall_timeout:
+                session.abort('stalled')
+
+    def _on_session_state(self, session, state, detail):
+        """Leitet Zustände der aktuellen Sitzung weiter; Fehler behandelt run()."""
+        if session is not self.session or state in (STATE_FAILED, STATE_IDLE):
+            return
+        if state == STATE_CONNECTED:
+            if not self.connected_once:
+                self.ready_after = METRICS.since('connect_total', self._created_at)
+            elif self._down_since is not None:
+                METRICS.observe('reconnect', time.monotonic() - self._down_since)
+            self.connected_once = True
+            self._failures_in_row = 0
+            self._finish_downtime()
+        self._report(state, detail)
+
+    def _report(self, state, detail=None):
+        """Meldet einen Zustandswechsel an on_state."""
+        self.state = state
+        if state in (STATE_FAILED, STATE_IDLE):
+            self._finish_downtime()
+        if self.on_state:
+            self.on_state(self, state, detail)
+
+    def stats(self):
+        """Gibt Neustarts und Ausfallzeit dieser Sitzung zurück."""
+        downtime = self.downtime
+        if self._down_since is not None:
+            downtime += time.monotonic() - self._down_since
+        return {'name': self.name, 'started_at': self.started_at, 'restarts': self.restarts, 'downtime': downtime}
+
+    def info(self):
+        """Gibt Zustand und Statistik als JSON-taugliches Dict zurück (für die Oberfläche und den IPC-Endpunkt)."""
+        return dict(self.stats(), id=self.id, state=self.state, connected_once=self.connected_once, stopped=self.stop_requested)
+
+class TunnelManager:
+    """Verwaltet mehrere gleichzeitig laufende Verbindungen, je ein ConnectionSupervisor pro Verbindung.
+
+    Jede Verbindung hat ihren eigenen Prozess, Lese-Thread, Zustand und Ausgabepuffer.
+    Schlüssel ist der Name, unter dem die Verbindung gestartet wurde (bei einem
+    Failover kann sich supervisor.name davon unterscheiden).
+    """
+
+    def __init__(self, session_factory, on_state=None):
+        self.session_factory = session_factory
+        self.on_state = on_state
+        self.tunnels = {}
+        # Neue Verbindung -> aufgebaute Verbindungen, die sie nach ihrem Handshake ersetzt
+        self._pending_replace = {}
+        self._lock = threading.Lock()
+
+    def connect(self, name, policy=None, failover=None, replace=(), make_before_break=False):
+        """Startet eine Verbindung; die in replace genannten Verbindungen werden vorher beendet.
+
+        Mit make_before_break bleiben bereits aufgebaute Verbindungen aus replace
+        bestehen, bis die neue verbunden ist, und werden erst dann beendet.
+        Schlägt die neue Verbindung fehl, laufen sie weiter.
+        """
+        with self._lock:
+            if name in self.tunnels:
+                return self.tunnels[name]
+            supervisor = ConnectionSupervisor(name, self.session_factory, on_state=self._on_state, policy=policy, failover=failover, key=name)
+            replaced = [self.tunnels[n] for n in replace if n in self.tunnels]
+            if make_before_break:
+                # Nur aufgebaute Verbindungen halten; laufende Verbindungsversuche gleich abbrechen
+                kept = [old for old in replaced if old.state == STATE_CONNECTED]
+                if kept:
+                    self._pending_replace[supervisor] = kept
+                replaced = [old for old in replaced if old not in kept]
+            previous = [self.tunnels.pop(old.key) for old in replaced]
+            self.tunnels[name] = supervisor
+        for old_supervisor in previous:
+            old_supervisor.request_stop()
+        threading.Thread(target=self._run, args=(supervisor, previous), daemon=True).start()
+        return supervisor
+
+    def _run(self, supervisor, previous):
+        """Beendet die zu ersetzenden Verbindungen und überwacht danach die neue (im Hintergrund-Thread)."""
+        if previous:
+            with METRICS.measure('stop_previous'):
+                for old_supervisor in previous:
+                    old_supervisor.stop()
+        supervisor.run()
+
+    def _on_state(self, supervisor, state, detail):
+        """Entfernt beendete Verbindungen, bevor der Zustandswechsel weitergemeldet wird.
+
+        Ist eine Verbindung mit make_before_break verbunden, werden die von ihr
+        ersetzten Verbindungen beendet.
+        """
+        replaced = []
+        if state in (STATE_FAILED, STATE_IDLE):
+            with self._lock:
+                if self.tunnels.get(supervisor.key) is supervisor:
+                    del self.tunnels[supervisor.key]
+                self._pending_replace.pop(supervisor, None)
+        elif state == STATE_CONNECTED and supervisor in self._pending_replace:
+            with self._lock:
+                for old_supervisor in self._pending_replace.pop(supervisor, ()):
+                    if self.tunnels.get(old_supervisor.key) is old_supervisor:
+                        del self.tunnels[old_supervisor.key]
+                        replaced.append(old_supervisor)
+        for old_supervisor in replaced:
+            old_supervisor.request_stop()
+            threading.Thread(target=old_supervisor.stop, daemon=True).start()
+        if self.on_state:
+            self.on_state(supervisor, state, detail)
+
+    def disconnect(self, name, wait=False):
+        """Beendet eine Verbindung; ohne wait im Hintergrund, damit die UI nicht blockiert."""
+        with self._lock:
+            supervisor = self.tunnels.pop(name, None)
+        if not supervisor:
+            return None
+        supervisor.request_stop()
+        if wait:
+            supervisor.stop()
+        else:
+            threading.Thread(target=supervisor.stop, daemon=True).start()
+        return supervisor
+
+    def disconnect_all(self, wait=False):
+        """Beendet alle Verbindungen."""
+        for name in list(self.snapshot()):
+            self.disconnect(name, wait)
+
+    def get(self, name):
+        """Gibt den Supervisor einer laufenden Verbindung zurück."""
+        return self.tunnels.get(name)
+
+    def snapshot(self):
+        """Gibt eine Kopie der laufenden Verbindungen (Name -> Supervisor) zurück."""
+        with self._lock:
+            return dict(self.tunnels)
+
+def aggregate_state(tunnels):
+    """Fasst die Zustände mehrerer Verbindungen (Schlüssel -> info()) zu 'connected', 'connecting' oder 'disconnected' zusammen."""
+    states = [info['state'] for info in tunnels.values()]
+    if not states:
+        return 'disconnected'
+    if all(state == STATE_CONNECTED for state in states):
+        return 'connected'
+    return 'connecting'
+
+def traffic_overlay(traffic):
+    """Wählt das Icon-Overlay für den Durchsatz (Schlüssel -> snapshot()): Balken je nach Stufe, darunter der Aktivitätspunkt."""
+    rate = sum(stats['rx_rate'] + stats['tx_rate'] for stats in traffic.values())
+    level = bisect.bisect_right(TRAFFIC_LEVEL_RATES, rate)
+    if level:
+        return f'traffic{level}'
+    return OVERLAY_ACTIVITY if rate > 0 else None
+
+def describe_detail(detail):
+    """Wandelt das Detail eines Zustandswechsels in einen JSON-tauglichen Wert um."""
+    if isinstance(detail, FileNotFoundError):
+        return 'wiresock_not_found'
+    if isinstance(detail, KeyError):
+        return 'config_not_found'
+    if isinstance(detail, Exception):
+        return str(detail)
+    return detail
+
+class TunnelService:
+    """Verbindungslogik ohne Oberfläche: startet und trennt Verbindungen anhand der Einstellungen.
+
+    Wird vom Tray-Icon im eigenen Prozess oder im Dienst-Modus (--daemon) hinter
+    einem ControlServer verwendet. Zustandswechsel werden als Ereignis-Dict
+    {"event": "state", "tunnel": <Schlüssel>, "state": ..., "detail": ..., <info()>}
+    an alle mit subscribe() registrierten Callbacks gemeldet (im Lese-Thread).
+    Ein Hintergrund-Thread nimmt alle TRAFFIC_SAMPLE_INTERVAL Sekunden einen
+    Messpunkt der Verkehrsstatistik aller Verbindungen auf.
+    Mit settings_store werden geänderte Einstellungen vor jedem Verbindungsaufbau
+    neu eingelesen, damit der Dienst Importe des Tray-Icons übernimmt.
+    Mit dns_prefetch werden die Hostnamen aller Endpunkte im Hintergrund
+    aufgelöst und aktuell gehalten (resolver); mit dns_rewrite_endpoints erhält
+    der Client eine Kopie der Konfiguration mit den aufgelösten Adressen.
+    Mit log_dir und session_logs wird die Ausgabe jeder Sitzung dauerhaft
+    gespeichert (session_logs, siehe SessionLogStore), mit history_path und
+    connection_history jede beendete Verbindung im Verlauf (history, siehe HistoryStore).
+    Mit config_index werden die Konfigurationen aus dem Index gelesen (siehe
+    ConfigIndex), statt die Dateien bei jedem Verbindungsaufbau neu zu parsen.
+    """
+
+    remote = False
+
+    def __init__(self, settings, configs_dir, settings_store=None, log_dir=None, history_path=None, config_index=None):
+        self.settings = settings
+        self.configs_dir = configs_dir
+        self.settings_store = settings_store
+        self.config_index = config_index
+        self.tunnels = TunnelManager(self.create_session, on_state=self._on_state)
+        # Zuletzt beendete Verbindung je Schlüssel, damit ihre letzte Ausgabe noch abgeholt werden kann
+        self._finished = {}
+        self._subscribers = []
+        self._settings_stamp = self._get_settings_stamp()
+        self.resolver = EndpointResolver(settings["dns_server"])
+        self.runtime_dir = None
+        self._runtime_lock = threading.Lock()
+        self.session_logs = None
+        if log_dir and settings["session_logs"]:
+            self.session_logs = SessionLogStore(log_dir, settings["session_log_max_file_size"], settings["session_log_max_total_size"])
+            self.session_logs.start()
+        self.history = None
+        if history_path and settings["connection_history"]:
+            self.history = HistoryStore(history_path)
+            self.history.start()
+        threading.Thread(target=self._sample_traffic, daemon=True).start()
+        if settings["dns_prefetch"]:
+            self.resolver.start()
+            threading.Thread(target=self.prefetch_endpoints, daemon=True).start()
+
+    def connect(self, name):
+        """Startet eine Verbindung und gibt bei einem Fehler dessen Code zurück, sonst None.
+
+        Ohne die Einstellung multiple_tunnels ersetzt die neue Verbindung die laufenden.
+        Mit fast_switch werden diese erst nach dem Handshake der neuen Verbindung
+        beendet, sofern sich die Konfigurationen nicht in Routen, Adressen oder
+        Peers überschneiden.
+        """
+        start = time.perf_counter()
+        self.reload_settings()
+        if self.tunnels.get(name):
+            return 'already_active'
+        config_file = self.settings["configs"].get(name)
+        if not config_file:
+            return 'config_not_found'
+        if not os.path.exists(os.path.join(self.configs_dir, config_file)):
+            return 'file_not_found'
+
+        # Laufende Verbindungen werden im Hintergrund beendet, bevor die neue startet
+        replace = () if self.settings["multiple_tunnels"] else list(self.tunnels.snapshot())
+        self.tunnels.connect(
+            name,
+            policy=self.settings["reconnect"],
+            failover=self.settings["failover_configs"],
+            replace=replace,
+            make_before_break=self._can_make_before_break(name, replace)
+        )
+        METRICS.since('connect_request', start)
+        return None
+
+    def _can_make_before_break(self, name, replace):
+        """Prüft, ob die neue Verbindung neben den zu ersetzenden aufgebaut werden kann."""
+        if not replace or not self.settings["fast_switch"]:
+            return False
+        entry = self._read_config_entry(name)
+        if entry is None:
+            return False
+        for key in replace:
+            supervisor = self.tunnels.get(key)
+            # Nach einem Failover läuft unter dem Schlüssel eine andere Konfiguration
+            other = self._read_config_entry(supervisor.name) if supervisor else None
+            if other is None or configs_conflict(entry, other):
+                return False
+        return True
+
+    def _read_config_entry(self, name):
+        """Gibt die geparste Konfiguration einer Verbindung zurück; None, falls sie fehlt.
+
+        Mit config_index wird die Datei nur neu gelesen, wenn sie sich geändert hat.
+        """
+        config_file = self.settings["configs"].get(name)
+        if not config_file:
+            return None
+        if self.config_index:
+            return self.config_index.update(config_file)
+        try:
+            with open(os.path.join(self.configs_dir, config_file), 'r', encoding='utf-8', errors='replace') as f:
+                return parse_wireguard_config(f.read())
+        except OSError:
+            return None
+
+    def disconnect(self, name=None, wait=False):
+        """Trennt eine Verbindung (ohne Namen alle); gibt False zurück, wenn sie nicht lief."""
+        if name is None:
+            self.tunnels.disconnect_all(wait)
+            return True
+        return self.tunnels.disconnect(name, wait) is not None
+
+    def status(self):
+        """Gibt die laufenden Verbindungen als Schlüssel -> info() zurück."""
+        return {key: supervisor.info() for key, supervisor in self.tunnels.snapshot().items()}
+
+    def list_configs(self):
+        """Gibt die Namen aller importierten Verbindungen zurück."""
+        self.reload_settings()
+        return list(self.settings["configs"])
+
+    def drain_log(self, key):
+        """Holt die gepufferte Ausgabe einer (auch gerade beendeten) Verbindung ab."""
+        supervisor = self.tunnels.get(key) or self._finished.get(key)
+        if not supervisor:
+            return [], 0
+        return supervisor.log.drain()
+
+    def traffic(self):
+        """Gibt die Verkehrsstatistik der laufenden Verbindungen als Schlüssel -> snapshot() zurück."""
+        return {key: supervisor.traffic.snapshot() for key, supervisor in self.tunnels.snapshot().items()}
+
+    def traffic_history(self, key):
+        """Gibt den Durchsatzverlauf einer laufenden Verbindung zurück."""
+        supervisor = self.tunnels.get(key)
+        return supervisor.traffic.history() if supervisor else None
+
+    def prefetch_endpoints(self):
+        """Löst die Hostnamen der Endpunkte aller Verbindungen im Hintergrund auf."""
+        hosts = []
+        for name in list(self.settings["configs"]):
+            entry = self._read_config_entry(name)
+            for peer in entry['peers'] if entry else ():
+                try:
+                    hosts.append(split_endpoint(peer['endpoint'])[0])
+                except ValueError:
+                    pass
+        self.resolver.prefetch(hosts)
+
+    def session_log_index(self, name=None):
+        """Gibt die gespeicherten Sitzungen zurück (neueste zuerst), optional nur für eine Verbindung."""
+        return self.session_logs.sessions(name) if self.session_logs else []
+
+    def read_session_log(self, session_id, start=0, limit=SESSION_LOG_READ_LIMIT):
+        """Liest Zeilen einer gespeicherten Sitzung; gibt (Zeilen, weitere vorhanden) oder None zurück."""
+        return self.session_logs.read(session_id, start, limit) if self.session_logs else None
+
+    def connection_history(self, name=None, limit=100):
+        """Gibt die letzten beendeten Verbindungen zurück (neueste zuerst)."""
+        return self.history.recent(name, limit) if self.history else []
+
+    def connection_stats(self, flush=True):
+        """Gibt die Auswertung je Verbindung in der Reihenfolge der Rangfolge zurück (flush siehe HistoryStore.profile_stats)."""
+        return self.history.profile_stats(flush=flush) if self.history else []
+
+    def metrics_summary(self):
+        """Gibt Anzahl, p50 und p95 der gemessenen Phasen zurück."""
+        return METRICS.summary()
+
+    def metrics_text(self):
+        """Gibt die gemessenen Phasen im Textformat von Prometheus zurück."""
+        return METRICS.export_text()
+
+    def _sample_traffic(self):
+        """Nimmt in festen Abständen einen Messpunkt für jede laufende Verbindung auf."""
+        while True:
+            time.sleep(TRAFFIC_SAMPLE_INTERVAL)
+            now = time.monotonic()
+            for supervisor in self.tunnels.snapshot().values():
+                supervisor.traffic.sample(now)
+
+    def subscribe(self, callback):
+        """Registriert einen Callback für Ereignisse."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Entfernt einen mit subscribe() registrierten Callback."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def close(self):
+        """Gibt Ressourcen frei; laufende Verbindungen bleiben davon unberührt."""
+        if self.session_logs:
+            self.session_logs.flush()
+        if self.history:
+            self.history.flush()
+        if self.runtime_dir:
+            shutil.rmtree(self.runtime_dir, ignore_errors=True)
+            self.runtime_dir = None
+
+    def create_session(self, config_name, log, on_state, traffic=None):
+        """Erzeugt eine neue Sitzung des eingestellten Backends für die angegebene Verbindung (für den ConnectionSupervisor)."""
+        config_file = self.settings["configs"].get(config_name)
+        if not config_file:
+            raise KeyError(config_name)
+        full_config_path = os.path.join(self.configs_dir, config_file)
+        create = TUNNEL_BACKENDS.get(self.settings["backend"])
+        if not create:
+            raise ValueError(f"Unbekanntes Backend '{self.settings['backend']}'")
+        if self.settings["dns_rewrite_endpoints"]:
+            # Laufzeitkopie mit aufgelösten Endpunkten, damit der Client nicht selbst auflösen muss
+            with self._runtime_lock:
+                if not self.runtime_dir:
+                    import tempfile
+                    self.runtime_dir = tempfile.mkdtemp(prefix=f'{APP_NAME.lower()}-')
+            full_config_path = write_runtime_config(full_config_path, self.runtime_dir, self.resolver)
+        if not self.session_logs:
+            return create(self.settings, config_name, full_config_path, resolver=self.resolver, on_state=on_state, log=log, traffic=traffic)
+
+        # Ausgabe und Ergebnis der Sitzung zusätzlich dauerhaft speichern
+        session_logs = self.session_logs
+        session_id = None
+
+        def on_session_state(session, state, detail):
+            if state == STATE_CONNECTED:
+                session_logs.mark_connected(session_id)
+            elif state in (STATE_FAILED, STATE_IDLE):
+                session_logs.end(session_id, state, describe_detail(detail))
+            on_state(session, state, detail)
+
+        session = create(self.settings, config_name, full_config_path, resolver=self.resolver, on_state=on_session_state, log=log,
+                         traffic=traffic, on_output=lambda session, lines: session_logs.write(session_id, lines))
+        session_id = session_logs.begin(config_name)
+        return session
+
+    def reload_settings(self):
+        """Liest die Einstellungen neu ein, wenn die Datei seit dem letzten Lesen geändert wurde."""
+        if not self.settings_store:
+            return
+        stamp = self._get_settings_stamp()
+        if stamp != self._settings_stamp:
+            self._settings_stamp = stamp
+            self.settings = apply_settings_defaults(self.settings_store.load())
+            self.resolver.server = self.settings["dns_server"]
+            if self.settings["dns_prefetch"]:
+                threading.Thread(target=self.prefetch_endpoints, daemon=True).start()
+
+    def _get_settings_stamp(self):
+        """Änderungszeit und Größe der Einstellungsdatei, um Änderungen günstig zu erkennen."""
+        if not self.settings_store:
+            return None
+        try:
+            stat = os.stat(self.settings_store.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _on_state(self, supervisor, state, detail):
+        """Meldet einen Zustandswechsel an alle Abonnenten."""
+        if state in (STATE_FAILED, STATE_IDLE):
+            self._finished[supervisor.key] = supervisor
+            if self.history:
+                self._record_history(supervisor, state, detail)
+        event = dict(event='state', tunnel=supervisor.key, **supervisor.info())
+        event.update(state=state, detail=describe_detail(detail))
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Fehler beim Melden eines Ereignisses: {e}")
+
+    def _record_history(self, supervisor, state, detail):
+        """Trägt eine beendete Verbindung in den Verlauf ein."""
+        session = supervisor.session
+        exit_code = session.process.returncode if session and session.process else None
+        # Gezählt wird die gewählte Verbindung, auch wenn zuletzt ihr Ausweichprofil lief
+        self.history.record(
+            profile=supervisor.key,
+            started=supervisor.started_at,
+            ready_after=supervisor.ready_after,
+            duration=time.time() - supervisor.started_at,
+            exit_code=exit_code,
+            restarts=supervisor.restarts,
+            result=state,
+            failure=None if state == STATE_IDLE else str(describe_detail(detail)),
+            failover=supervisor.name if supervisor.name != supervisor.key else None,
+        )
+
+def get_ipc_address():
+    """Gibt die Adresse des lokalen Steuer-Endpunkts zurück (Named Pipe unter Windows, sonst Unix-Socket)."""
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\{APP_NAME}-{os.environ.get("USERNAME", "user")}'
+    import tempfile
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f'{APP_NAME.lower()}-{os.getuid()}.sock')
+
+def get_ipc_key(app_dir):
+    """Liest den Schlüssel für den Steuer-Endpunkt oder legt ihn beim ersten Aufruf an."""
+    key_path = os.path.join(app_dir, IPC_KEY_FILE)
+    try:
+        with open(key_path, 'x', encoding='ascii') as f:
+            f.write(os.urandom(32).hex())
+    except FileExistsError:
+        pass
+    with open(key_path, 'r', encoding='ascii') as f:
+        return f.read().strip().encode('ascii')
+
+def get_instance_address():
+    """Gibt die Adresse des Endpunkts zurück, über den ein zweiter Start das laufende Tray-Icon erreicht."""
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\{APP_NAME}-gui-{os.environ.get("USERNAME", "user")}'
+    import tempfile
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f'{APP_NAME.lower()}-gui-{os.getuid()}.sock')
+
+def parse_instance_request(args):
+    """Wandelt die Kommandozeile des Tray-Icons in eine Anfrage an die laufende Instanz um.
+
+    --connect <Name> startet eine Verbindung, sonst (oder mit --settings) wird das
+    Einstellungsfenster angezeigt.
+    """
+    if '--connect' in args and args.index('--connect') + 1 < len(args):
+        return {"cmd": 'activate', "action": 'connect', "name": args[args.index('--connect') + 1]}
+    return {"cmd": 'activate', "action": 'settings'}
+
+class InstanceGuard:
+    """Sorgt dafür, dass je Benutzer nur ein Tray-Icon läuft.
+
+    acquire() sperrt INSTANCE_LOCK_FILE ohne zu warten; das Betriebssystem gibt die
+    Sperre auch nach einem Absturz frei. Die Instanz mit der Sperre nimmt über
+    listen() Anfragen eines zweiten Starts entgegen, der sie mit forward()
+    weiterreicht und sich dann beendet. Beides kommt ohne Tkinter, Pillow und
+    pystray aus.
+    """
+
+    def __init__(self, app_dir, address=None):
+        self.lock_path = os.path.join(app_dir, INSTANCE_LOCK_FILE)
+        self.address = address or get_instance_address()
+        self.authkey = get_ipc_key(app_dir)
+        self.listener = None
+        self._lock_file = None
+        self._closed = False
+
+    def acquire(self):
+        """Versucht, die Sperre zu erhalten; False, wenn bereits eine Instanz läuft."""
+        lock_file = open(self.lock_path, 'a+b')
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def forward(self, request, timeout=INSTANCE_CONNECT_TIMEOUT):
+        """Sendet eine Anfrage an die laufende Instanz und gibt deren Antwort zurück.
+
+        Startet die Instanz gerade erst, wird bis zu timeout Sekunden auf ihren Endpunkt gewartet.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                client = ControlClient(self.address, self.authkey)
+                break
+            except (OSError, EOFError):
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+        with client:
+            return client.request(request["cmd"], **{k: v for k, v in request.items() if k != "cmd"})
+
+    def listen(self, handler):
+        """Öffnet den Endpunkt; handler(request) wird im Hintergrund aufgerufen und gibt die Antwort zurück."""
+        import multiprocessing.connection
+        is_socket_path = not self.address.startswith('\\\\')
+        if is_socket_path and os.path.exists(self.address):
+            # Überrest einer abgestürzten Instanz; die Sperre schließt eine laufende aus
+            os.remove(self.address)
+        self.listener = multiprocessing.connection.Listener(self.address, authkey=self.authkey)
+        if is_socket_path:
+            os.chmod(self.address, 0o600)
+        threading.Thread(target=self._accept_loop, args=(handler,), daemon=True).start()
+
+    def _accept_loop(self, handler):
+        """Beantwortet je Verbindung eine Anfrage."""
+        import multiprocessing.connection
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                continue
+            try:
+                with conn:
+                    request = json.loads(conn.recv_bytes().decode('utf-8'))
+                    if isinstance(request, dict) and request.get("cmd") == 'activate':
+                        response = handler(request)
+                    else:
+                        response = {"ok": False, "error": 'unknown_command'}
+                    conn.send_bytes(json.dumps(response).encode('utf-8'))
+            except (OSError, EOFError, ValueError, UnicodeDecodeError) as e:
+                print(f"Fehler bei einer Anfrage an die laufende Instanz: {e}")
+
+    def close(self):
+        """Schließt den Endpunkt und gibt die Sperre frei."""
+        self._closed = True
+        if self.listener:
+            self.listener.close()
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+class ControlServer:
+    """Lokaler Steuer-Endpunkt (Named Pipe bzw. Unix-Socket) für einen TunnelService.
+
+    Jede Nachricht ist ein JSON-Objekt. Anfragen haben die Form {"cmd": <Befehl>, ...},
+    Antworten {"ok": true, ...} bzw. {"ok": false, "error": <Code>}. Befehle:
+    connect/disconnect (name, bei disconnect optional), status, list, log (name),
+    traffic, history (name), metrics, sessions (name optional), session_log
+    (id, start, limit), connection_history (name optional, limit),
+    connection_stats (flush optional) und subscribe. Nach subscribe sendet der Server auf derselben Verbindung
+    alle Ereignisse des Dienstes, bis der Client sie schließt. Nur Prozesse mit
+    dem Schlüssel aus IPC_KEY_FILE können sich verbinden.
+    """
+
+    def __init__(self, service, address, authkey):
+        self.service = service
+        self.address = address
+        self.authkey = authkey
+        self.listener = None
+        self._closed = False
+
+    def start(self):
+        """Öffnet den Endpunkt und nimmt Verbindungen in einem Hintergrund-Thread an."""
+        import multiprocessing.connection
+        is_socket_path = not self.address.startswith('\\\\')
+        if is_socket_path and os.path.exists(self.address):
+            # Überrest eines abgestürzten Prozesses; ein laufender Dienst wurde vorher ausgeschlossen
+            os.remove(self.address)
+        self.listener = multiprocessing.connection.Listener(self.address, authkey=self.authkey)
+        if is_socket_path:
+            os.chmod(self.address, 0o600)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def close(self):
+        """Schließt den Endpunkt."""
+        self._closed = True
+        if self.listener:
+            self.listener.close()
+
+    def _accept_loop(self):
+        """Nimmt Verbindungen an und bearbeitet jede in einem eigenen Thread."""
+        import multiprocessing.connection
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        """Beantwortet die Anfragen einer Verbindung, bis der Client sie schließt."""
+        send_lock = threading.Lock()
+        subscriptions = []
+
+        def send(message):
+            with send_lock:
+                conn.send_bytes(json.dumps(message).encode('utf-8'))
+
+        try:
+            while True:
+                try:
+                    request = json.loads(conn.recv_bytes().decode('utf-8'))
+                except (ValueError, UnicodeDecodeError):
+                    send({"ok": False, "error": 'invalid_request'})
+                    continue
+                if isinstance(request, dict) and request.get("cmd") == 'subscribe':
+                    subscriptions.append(self._subscribe(send))
+                    send({"ok": True, "status": self.service.status()})
+                else:
+                    send(self.handle_request(request))
+        except (OSError, EOFError):
+            pass
+        finally:
+            for callback in subscriptions:
+                self.service.unsubscribe(callback)
+            conn.close()
+
+    def _subscribe(self, send):
+        """Leitet Ereignisse über eine Warteschlange weiter, damit die Lese-Threads nie blockieren."""
+        events = queue.Queue(IPC_EVENT_QUEUE_SIZE)
+
+        def callback(event):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                # Der Client liest nicht mehr mit; er erfährt den Zustand über "status"
+                self.service.unsubscribe(callback)
+
+        def forward():
+            try:
+                while True:
+                    send(events.get())
+            except (OSError, EOFError):
+                self.service.unsubscribe(callback)
+
+        threading.Thread(target=forward, daemon=True).start()
+        self.service.subscribe(callback)
+        return callback
+
+    def handle_request(self, request):
+        """Führt einen Befehl aus und gibt die Antwort zurück."""
+        if not isinstance(request, dict):
+            return {"ok": False, "error": 'invalid_request'}
+        cmd = request.get("cmd")
+        name = request.get("name")
+        if name is not None and not isinstance(name, str):
+            return {"ok": False, "error": 'invalid_request'}
+
+        if cmd == 'connect':
+            if name is None:
+                return {"ok": False, "error": 'invalid_request'}
+            error = self.service.connect(name)
+            return {"ok": False, "error": error} if error else {"ok": True}
+        if cmd == 'disconnect':
+            if not self.service.disconnect(name):
+                return {"ok": False, "error": 'not_connected'}
+            return {"ok": True}
+        if cmd == 'status':
+            return {"ok": True, "status": self.service.status()}
+        if cmd == 'list':
+            return {"ok": True, "configs": self.service.list_configs()}
+        if cmd == 'log':
+            lines, dropped = self.service.drain_log(name)
+            return {"ok": True, "lines": lines, "dropped": dropped}
+        if cmd == 'traffic':
+            return {"ok": True, "traffic": self.service.traffic()}
+        if cmd == 'history':
+            history = self.service.traffic_history(name)
+            return {"ok": True, "history": history} if history else {"ok": False, "error": 'not_connected'}
+        if cmd == 'metrics':
+            return {"ok": True, "summary": self.service.metrics_summary(), "text": self.service.metrics_text()}
+        if cmd == 'sessions':
+            return {"ok": True, "sessions": self.service.session_log_index(name)}
+        if cmd == 'session_log':
+            session_id = request.get("id")
+            start = request.get("start", 0)
+            limit = request.get("limit", SESSION_LOG_READ_LIMIT)
+            if not all(isinstance(value, int) and value >= 0 for value in (session_id, start, limit)):
+                return {"ok": False, "error": 'invalid_request'}
+            result = self.service.read_session_log(session_id, start, limit)
+            if result is None:
+                return {"ok": False, "error": 'session_not_found'}
+            lines, more = result
+            return {"ok": True, "lines": lines, "more": more}
+        if cmd == 'connection_history':
+            limit = request.get("limit", 100)
+            if not isinstance(limit, int) or limit < 0:
+                return {"ok": False, "error": 'invalid_request'}
+            return {"ok": True, "history": self.service.connection_history(name, limit)}
+        if cmd == 'connection_stats':
+            flush = request.get("flush", True)
+            if not isinstance(flush, bool):
+                return {"ok": False, "error": 'invalid_request'}
+            return {"ok": True, "stats": self.service.connection_stats(flush)}
+        return {"ok": False, "error": 'unknown_command'}
+
+class ControlClient:
+    """Verbindung zu einem laufenden ControlServer."""
+
+    def __init__(self, address, authkey):
+        import multiprocessing.connection
+        self.conn = multiprocessing.connection.Client(address, authkey=authkey)
+        self._lock = threading.Lock()
+
+    def request(self, cmd, **args):
+        """Sendet einen Befehl und wartet auf die Antwort."""
+        with self._lock:
+            self.conn.send_bytes(json.dumps(dict(args, cmd=cmd)).encode('utf-8'))
+            return self.receive()
+
+    def receive(self):
+        """Wartet auf die nächste Nachricht des Servers."""
+        return json.loads(self.conn.recv_bytes().decode('utf-8'))
+
+    def close(self):
+        """Schließt die Verbindung."""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class StateStore:
+    """Thread-sicherer Zustand der laufenden Verbindungen, aus dem Tray und Fenster ihre Anzeige ableiten.
+
+    Geändert wird er nur über die Übergänge reset(), apply_event(), remove(),
+    sample() und touch(). Danach werden die Eingaben der Anzeigeteile (menu,
+    icon, title, traffic) mit dem vorigen Stand verglichen; die Menge der
+    geänderten Teile wird an die Abonnenten gemeldet, im Thread des Übergangs
+    und außerhalb der Sperre. Abonnenten müssen sie selbst in ihre Schleife
+    weiterreichen (siehe WiresockApp._on_state_changed).
+    """
+
+    def __init__(self):
+        self._tunnels = {}
+        self._traffic = {}
+        self._views = self._compute_views()
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Registriert callback(views) für die Meldung geänderter Anzeigeteile."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Meldet einen Abonnenten ab."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def tunnels(self):
+        """Gibt die laufenden Verbindungen als Schlüssel -> info() zurück."""
+        with self._lock:
+            return dict(self._tunnels)
+
+    def traffic(self):
+        """Gibt die zuletzt übernommene Verkehrsstatistik als Schlüssel -> snapshot() zurück."""
+        with self._lock:
+            return dict(self._traffic)
+
+    def reset(self, tunnels):
+        """Übernimmt den vollständigen Zustand, z.B. von status() nach dem (Neu-)Start des Dienstes."""
+        with self._lock:
+            self._tunnels = dict(tunnels)
+            self._traffic = {key: stats for key, stats in self._traffic.items() if key in self._tunnels}
+        self._publish()
+
+    def apply_event(self, event):
+        """Übernimmt den Zustandswechsel aus einem Ereignis des Dienstes; gibt False zurück, wenn er verworfen wurde.
+
+        Ereignisse einer älteren (kleineren id) oder bereits getrennten Verbindung
+        ändern den Zustand nicht, ebenso Wechsel, die TUNNEL_TRANSITIONS nicht
+        vorsieht (verspätet zugestellte Ereignisse derselben Verbindung).
+        """
+        key = event.get("tunnel")
+        with self._lock:
+            current = self._tunnels.get(key)
+            if event["state"] in (STATE_FAILED, STATE_IDLE):
+                # Nur entfernen, wenn unter dem Schlüssel nicht schon eine neue Verbindung läuft
+                if not current or current["id"] != event["id"]:
+                    return False
+                del self._tunnels[key]
+                self._traffic.pop(key, None)
+            elif event["stopped"] or (current and current["id"] > event["id"]):
+                return False
+            elif (current and current["id"] == event["id"] and event["state"] != current["state"]
+                    and event["state"] not in TUNNEL_TRANSITIONS.get(current["state"], ())):
+                print(f"Zustandswechsel {current['state']} -> {event['state']} von '{key}' verworfen")
+                return False
+            else:
+                self._tunnels[key] = {k: v for k, v in event.items() if k not in ("event", "tunnel", "detail")}
+        self._publish()
+        return True
+
+    def remove(self, key=None):
+        """Entfernt eine getrennte Verbindung (ohne Schlüssel alle), ohne auf deren Ereignis zu warten."""
+        with self._lock:
+            if key is None:
+                self._tunnels.clear()
+                self._traffic.clear()
+            else:
+                self._tunnels.pop(key, None)
+                self._traffic.pop(key, None)
+        self._publish()
+
+    def sample(self, traffic, tunnels=None):
+        """Übernimmt einen Messpunkt: Verkehrsstatistik und, falls angegeben, Neustarts und Ausfallzeit aus status()."""
+        with self._lock:
+            self._traffic = {key: stats for key, stats in traffic.items() if key in self._tunnels}
+            for key, info in (tunnels or {}).items():
+                current = self._tunnels.get(key)
+                # Der Zustand selbst ändert sich nur über Ereignisse
+                if current and current["id"] == info["id"]:
+                    current.update(restarts=info["restarts"], downtime=info["downtime"])
+        self._publish()
+
+    def touch(self, *views):
+        """Meldet Anzeigeteile (ohne Angabe alle) als geändert, z.B. nach einem Sprachwechsel."""
+        self._publish(set(views or self._views))
+
+    def _compute_views(self):
+        """Berechnet die Eingaben aller Anzeigeteile (unter der Sperre aufgerufen)."""
+        tunnels = self._tunnels
+        traffic = tuple(
+            (key, stats['rx_bytes'], stats['tx_bytes'], stats['rx_rate'], stats['tx_rate'],
+             None if stats['handshake_age'] is None else int(stats['handshake_age']))
+            for key, stats in self._traffic.items())
+        return {
+            'menu': tuple((key, info['name'], info['state'] == STATE_CONNECTED) for key, info in tunnels.items()),
+            'icon': (aggregate_state(tunnels), traffic_overlay(self._traffic)),
+            'title': (tuple((key, info['name'], info['state'], info['restarts'], int(info['downtime']))
+                            for key, info in tunnels.items()), traffic),
+            'traffic': (tuple(tunnels), traffic),
+        }
+
+    def _publish(self, views=None):
+        """Vergleicht die Anzeigeteile mit dem vorigen Stand und meldet die geänderten."""
+        with self._lock:
+            new_views = self._compute_views()
+            changed = {view for view, value in new_views.items() if self._views[view] != value}
+            self._views = new_views
+        changed |= views or set()
+        if not changed:
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"Fehler beim Melden einer Zustandsänderung: {e}")
+
+class RemoteTunnelService:
+    """Stellt einen über den ControlServer erreichbaren Dienst mit der Schnittstelle von TunnelService bereit.
+
+    Der Zustand der Verbindungen wird lokal gespiegelt und über ein Abonnement
+    aktuell gehalten, sodass status() ohne Anfrage an den Dienst auskommt.
+    Bricht die Verbindung zum Dienst ab, wird {"event": "service_lost"} gemeldet.
+    before_request wird vor Befehlen aufgerufen, die Einstellungen lesen (z.B. um sie zu schreiben).
+    """
+
+    remote = True
+
+    def __init__(self, address, authkey, before_request=None):
+        self.client = ControlClient(address, authkey)
+        self.before_request = before_request
+        self._state_store = StateStore()
+        self._subscribers = []
+        self._closed = False
+
+        self.events = ControlClient(address, authkey)
+        response = self.events.request('subscribe')
+        self._state_store.reset(response["status"])
+        threading.Thread(target=self._receive_events, daemon=True).start()
+
+    def connect(self, name):
+        """Startet eine Verbindung im Dienst und gibt bei einem Fehler dessen Code zurück, sonst None."""
+        if self.before_request:
+            self.before_request()
+        response = self._request('connect', name=name)
+        return None if response["ok"] else response["error"]
+
+    def disconnect(self, name=None, wait=False):
+        """Trennt eine Verbindung im Dienst (ohne Namen alle); wait ist hier ohne Bedeutung."""
+        args = {} if name is None else {"name": name}
+        if not self._request('disconnect', **args)["ok"]:
+            return False
+        self._state_store.remove(name)
+        return True
+
+    def status(self):
+        """Gibt den gespiegelten Zustand der Verbindungen zurück."""
+        return self._state_store.tunnels()
+
+    def list_configs(self):
+        """Gibt die Namen aller Verbindungen zurück, die der Dienst kennt."""
+        if self.before_request:
+            self.before_request()
+        return self._request('list').get("configs", [])
+
+    def drain_log(self, key):
+        """Holt die gepufferte Ausgabe einer Verbindung vom Dienst ab."""
+        response = self._request('log', name=key)
+        return response.get("lines", []), response.get("dropped", 0)
+
+    def traffic(self):
+        """Fragt die Verkehrsstatistik der laufenden Verbindungen beim Dienst ab."""
+        return self._request('traffic').get("traffic", {})
+
+    def traffic_history(self, key):
+        """Fragt den Durchsatzverlauf einer Verbindung beim Dienst ab."""
+        return self._request('history', name=key).get("history")
+
+    def session_log_index(self, name=None):
+        """Fragt die gespeicherten Sitzungen beim Dienst ab."""
+        args = {"name": name} if name is not None else {}
+        return self._request('sessions', **args).get("sessions", [])
+
+    def read_session_log(self, session_id, start=0, limit=SESSION_LOG_READ_LIMIT):
+        """Liest Zeilen einer gespeicherten Sitzung aus dem Dienst; None, falls sie nicht existiert."""
+        response = self._request('session_log', id=session_id, start=start, limit=limit)
+        return (response["lines"], response["more"]) if response["ok"] else None
+
+    def connection_history(self, name=None, limit=100):
+        """Fragt die letzten beendeten Verbindungen beim Dienst ab."""
+        args = {"name": name} if name is not None else {}
+        return self._request('connection_history', limit=limit, **args).get("history", [])
+
+    def connection_stats(self, flush=True):
+        """Fragt die Auswertung je Verbindung beim Dienst ab."""
+        return self._request('connection_stats', flush=flush).get("stats", [])
+
+    def metrics_summary(self):
+        """Fragt Anzahl, p50 und p95 der im Dienst gemessenen Phasen ab."""
+        return self._request('metrics').get("summary", {})
+
+    def metrics_text(self):
+        """Fragt die im Dienst gemessenen Phasen im Textformat von Prometheus ab."""
+        return self._request('metrics').get("text", '')
+
+    def subscribe(self, callback):
+        """Registriert einen Callback für Ereignisse."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Entfernt einen mit subscribe() registrierten Callback."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def close(self):
+        """Trennt die Verbindung zum Dienst; dessen Verbindungen laufen weiter."""
+        self._closed = True
+        self.client.close()
+        self.events.close()
+
+    def _request(self, cmd, **args):
+        """Sendet einen Befehl; ist der Dienst nicht erreichbar, wird ein Fehler zurückgegeben."""
+        try:
+            return self.client.request(cmd, **args)
+        except (OSError, EOFError):
+            return {"ok": False, "error": 'service_unavailable'}
+
+    def _receive_events(self):
+        """Spiegelt die Ereignisse des Dienstes und leitet sie an die Abonnenten weiter."""
+        try:
+            while True:
+                event = self.events.receive()
+                self._state_store.apply_event(event)
+                self._notify(event)
+        except (OSError, EOFError, ValueError):
+            if self._closed:
+                return
+        self._state_store.reset({})
+        self._notify({"event": 'service_lost'})
+
+    def _notify(self, event):
+        """Meldet ein Ereignis an alle Abonnenten."""
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Fehler beim Melden eines Ereignisses: {e}")
+
+class VirtualListbox:
+    """Listbox, die nur die sichtbaren Zeilen einer beliebig langen Liste enthält.
+
+    Die Einträge liegen in self.items; die Tk-Listbox zeigt ab self.offset nur so
+    viele, wie hineinpassen. Scrollleiste, Mausrad und Pfeiltasten verschieben den
+    Ausschnitt. Die Auswahl wird über den Namen gehalten, damit sie beim Scrollen
+    und Filtern erhalten bleibt.
+    """
+
+    def __init__(self, parent, on_select=None):
+        from tkinter import font as tkfont
+        self.on_select = on_select
+        self.items = []
+        self.offset = 0
+        self.selected = None
+        self.listbox = tk.Listbox(parent, exportselection=False)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.line_height = tkfont.Font(font=self.listbox.cget('font')).metrics('linespace') + 1
+        self.rows = int(self.listbox.cget('height'))
+        self.listbox.bind("<Configure>", self._on_configure)
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, 'units'))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-1, 'units'))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(1, 'units'))
+        self.listbox.bind("<Up>", lambda event: self.move_selection(-1))
+        self.listbox.bind("<Down>", lambda event: self.move_selection(1))
+        self.listbox.bind("<Prior>", lambda event: self.move_selection(-self.rows))
+        self.listbox.bind("<Next>", lambda event: self.move_selection(self.rows))
+
+    def _on_configure(self, event):
+        """Passt die Anzahl der sichtbaren Zeilen an die Höhe an."""
+        border = 2 * (int(self.listbox.cget('borderwidth')) + int(self.listbox.cget('highlightthickness')))
+        rows = max(1, (event.height - border) // self.line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+
+    def set_items(self, items):
+        """Ersetzt alle Einträge, z.B. nach einer neuen Suche."""
+        self.items = list(items)
+        self.offset = 0
+        self.render()
+
+    def insert(self, index, item):
+        """Fügt einen Eintrag ein; neu gezeichnet wird nur, wenn er im sichtbaren Bereich liegt."""
+        self.items.insert(index, item)
+        if index < self.offset:
+            self.offset += 1
+            self._update_scrollbar()
+        elif index < self.offset + self.rows:
+            self.render()
+        else:
+            self._update_scrollbar()
+
+    def remove(self, item):
+        """Entfernt einen Eintrag, falls er in der Liste steht."""
+        try:
+            index = self.items.index(item)
+        except ValueError:
+            return
+        del self.items[index]
+        if item == self.selected:
+            self.selected = None
+        if index < self.offset:
+            self.offset -= 1
+            self._update_scrollbar()
+        elif index < self.offset + self.rows:
+            self.render()
+        else:
+            self._update_scrollbar()
+
+    def render(self):
+        """Füllt die Listbox mit dem sichtbaren Ausschnitt."""
+        self.offset = max(0, min(self.offset, len(self.items) - self.rows))
+        visible = self.items[self.offset:self.offset + self.rows]
+        self.listbox.delete(0, tk.END)
+        if visible:
+            self.listbox.insert(tk.END, *visible)
+        if self.selected in visible:
+            self.listbox.selection_set(visible.index(self.selected))
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.items)
+        if total <= self.rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.rows) / total))
+
+    def yview(self, *args):
+        """Befehl der Scrollleiste ('moveto', Anteil) bzw. ('scroll', Anzahl, Einheit)."""
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.items))
+            self.render()
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]), args[2])
+
+    def scroll(self, count, unit):
+        """Verschiebt den Ausschnitt um Zeilen ('units') oder Seiten ('pages')."""
+        self.offset += count * (self.rows if unit == 'pages' else 1)
+        self.render()
+        return "break"
+
+    def select(self, item):
+        """Wählt einen Eintrag aus und verschiebt den Ausschnitt bei Bedarf, damit er sichtbar ist."""
+        self.selected = item
+        if item in self.items:
+            index = self.items.index(item)
+            if index < self.offset:
+                self.offset = index
+            elif index >= self.offset + self.rows:
+                self.offset = index - self.rows + 1
+        self.render()
+        if self.on_select:
+            self.on_select()
+
+    def move_selection(self, count):
+        """Bewegt die Auswahl mit den Pfeil- bzw. Bildtasten."""
+        if self.items:
+            current = self.items.index(self.selected) if self.selected in self.items else self.offset - 1
+            self.select(self.items[max(0, min(len(self.items) - 1, current + count))])
+        return "break"
+
+    def _on_listbox_select(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.items[self.offset + selection[0]]
+            if self.on_select:
+                self.on_select()
 
 class WiresockApp:
-    def __init__(self, root):
+    def __init__(self, root, startup_timer=None, instance_guard=None):
         self.root = root
+        self.startup_timer = startup_timer or StartupTimer()
+        self.instance_guard = instance_guard
         # Initialisierung der Anwendungs- und UI-Zustände
-        self.is_connected = False
-        self.active_connection_name = None
-        self.wiresock_process = None
+        self.service = None
+        self.control_server = None
+        self.metrics_exporter = None
+        # Zustand der Verbindungen für Tray und Fenster; geänderte Teile werden gebündelt neu gezeichnet
+        self.state_store = StateStore()
+        self.state_store.subscribe(self._on_state_changed)
+        self.dirty_views = set()
+        self.dirty_views_lock = threading.Lock()
+        self.announced_tunnels = set()
         self.settings = {}
         self.settings_window = None
         self.status_window = None
+        self.status_tunnel = None
+        self.traffic_window = None
         self.lang_var = None
 
         # Sicherstellen, dass die Verzeichnisse existieren
@@ -107,101 +3961,67 @@ class WiresockApp:
         os.makedirs(self.lang_dir, exist_ok=True)
 
         # Sicherstellen, dass die Standard-Sprachdatei existiert und gefüllt ist
-        default_lang_path = os.path.join(self.lang_dir, f"{DEFAULT_LANG}.json")
-        if not os.path.exists(default_lang_path) or os.path.getsize(default_lang_path) == 0:
-            initial_translations = {
-                "app_name": "SimpleSock",
-                "tray_menu_connect": "Connect ({name})",
-                "tray_menu_disconnect": "Disconnect ({name})",
-                "tray_menu_no_connections": "No connections available",
-                "tray_menu_settings": "Settings",
-                "tray_menu_help_info": "Help & Info",
-                "tray_menu_exit": "Exit",
-                "win_title_settings": "Wiresock Settings",
-                "win_title_info": "About SimpleSock",
-                "info_text_version": "Version {version}",
-                "info_text_author": "Author: {author}",
-                "info_text_github": "GitHub: {github}",
-                "settings_path_frame": "Path to Wiresock Installation",
-                "settings_path_button": "Save",
-                "settings_import_frame": "Import Configuration File",
-                "settings_import_name_label": "Name for connection:",
-                "settings_import_button": "Import",
-                "settings_connections_frame": "Manage Connections",
-                "settings_connections_delete": "Delete",
-                "settings_connections_rename": "Rename",
-                "settings_connections_edit": "Edit",
-                "settings_startup_frame": "Startup Settings",
-                "settings_autostart_checkbox": "Start automatically with Windows",
-                "settings_default_connection_label": "Default connection on startup:",
-                "settings_default_connection_none": "None",
-                "msg_box_title_success": "Success",
-                "msg_box_title_warning": "Warning",
-                "msg_box_title_error": "Error",
-                "msg_box_title_confirm": "Confirm",
-                "msg_box_title_autostart": "Autostart",
-                "msg_box_wiresock_not_found": "Wiresock was not found at '{path}'. Do you want to install it now via Winget?",
-                "msg_box_autostart_enabled": "The application will now start automatically with Windows.",
-                "msg_box_autostart_disabled": "Automatic startup has been disabled.",
-                "msg_box_path_saved": "The path has been successfully updated. The application will now use this path.",
-                "msg_box_path_invalid": "Invalid path. Please check if the file exists.",
-                "msg_box_name_required": "Please enter a name for the connection.",
-                "msg_box_name_exists": "The name '{name}' already exists. Please choose another one.",
-                "msg_box_import_success": "'{name}' was imported successfully.",
-                "msg_box_delete_confirm": "Are you sure you want to delete '{name}'?",
-                "msg_box_delete_success": "'{name}' was deleted successfully.",
-                "msg_box_rename_success": "'{old_name}' was renamed to '{new_name}'.",
-                "msg_box_rename_title": "Rename",
-                "msg_box_connect_active": "A connection is already active: {name}",
-                "msg_box_config_not_found": "The configuration '{name}' was not found.",
-                "msg_box_file_not_found": "The configuration file '{path}' was not found.",
-                "msg_box_wiresock_not_found_connect": "The file '{path}' was not found. Please install Wiresock or correct the path in the settings.",
-                "msg_box_connection_success": "Connection with '{name}' was successfully established.",
-                "msg_box_disconnect_success": "The connection was successfully disconnected.",
-                "msg_box_select_connection_delete": "Please select a connection to delete.",
-                "msg_box_select_connection_rename": "Please select a connection to rename.",
-                "msg_box_select_connection_edit": "Please select a connection to edit.",
-                "msg_box_install_failed": "The installation could not be verified. Please try it manually.",
-                "msg_box_install_error": "An error occurred during the Winget installation: {error}",
-                "msg_box_app_exit_info": "The application cannot be executed without Wiresock.",
-                "msg_box_default_set": "Standard connection set to '{name}'.",
-                "msg_box_open_error": "An error occurred while opening the file: {error}",
-                "settings_language_label": "Language:",
-                "settings_language_frame": "Language Settings",
-                "settings_close_button": "Close",
-                "settings_import_title": "Select a Wiresock configuration file (.conf)",
-                "settings_file_type": "Configuration files",
-                "win_title_status": "Status",
-                "status_connecting": "Connecting to {name}...",
-                "status_disconnecting": "Disconnecting...",
-                "status_closing": "Closing...",
-                "status_connected": "Connected",
-                "status_connection_failed": "Connection failed"
-            }
-            with open(default_lang_path, 'w', encoding='utf-8') as f:
-                json.dump(initial_translations, f, indent=4)
+        ensure_default_translations(self.lang_dir)
 
         # Konfigurationen und Anwendungseinstellungen laden
+        self.settings_store = SettingsStore(os.path.join(self.app_dir, SETTINGS_FILE))
         self.load_settings()
-        
+        self.startup_timer.mark('settings')
+
+        # Index der Konfigurationsdateien laden (ohne die Dateien zu lesen), der Dienst nutzt ihn mit
+        self.config_index = ConfigIndex(self.configs_dir, os.path.join(self.app_dir, CONFIG_INDEX_FILE))
+        self.config_index.load()
+
+        # Mit einem laufenden Dienst verbinden oder die Verbindungen selbst verwalten
+        self.start_service()
+        self.startup_timer.mark('service')
+
+        # Die Standardverbindung startet parallel zum Aufbau des Tray-Icons
+        self.run_default_on_startup()
+        self.startup_timer.mark('autostart_connect')
+
+        # Index der Konfigurationsdateien im Hintergrund abgleichen
+        threading.Thread(target=self.config_index.refresh, args=(list(self.settings["configs"].values()),), daemon=True).start()
+        self.latency_prober = LatencyProber(self.settings["probe_method"], self.settings["probe_timeout"])
+        # Außerhalb der Anwendung hinzugefügte, geänderte oder gelöschte Dateien übernehmen
+        self.config_watcher = ConfigWatcher(self.configs_dir, self._on_configs_changed)
+        self.config_watcher.start()
+        self.startup_timer.mark('config_index')
+
         # UI initialisieren
+        self.icon_cache = IconCache(self.app_dir)
         self.tray_icon = None
+        self.tray_icon_state = None
+        self.menu_cache = {}
+        self.group_items_cache = {}
+        self.connect_section = None
+        self.connect_item_names = {}
+        self.disconnect_item_names = {}
+        self.connection_groups = None
+        # Suchindex der Einstellungen, wird beim ersten Öffnen aufgebaut
+        self.connection_search = None
+        # Position je Verbindung in der Rangfolge des Verlaufs (menu_sort_by_ranking), im Hintergrund abgefragt
+        self.connection_ranking = None
+        self.connection_ranking_version = 0
+        self.connection_ranking_request = None
         self.create_tray_icon()
+        self.startup_timer.mark('tray_icon')
+        self.root.after(int(TRAFFIC_SAMPLE_INTERVAL * 1000), self._refresh_traffic)
+        # Restliche Icon-Varianten im Hintergrund vorbereiten
+        threading.Thread(target=self.icon_cache.preload, daemon=True).start()
+        # Anfragen weiterer Starts (z.B. Autostart und Klick) übernimmt diese Instanz
+        if self.instance_guard:
+            try:
+                self.instance_guard.listen(self.handle_instance_request)
+            except OSError as e:
+                print(f"Endpunkt '{self.instance_guard.address}' konnte nicht geöffnet werden: {e}")
         
     def load_settings(self):
         """Lädt die Anwendungseinstellungen aus der JSON-Datei."""
-        settings_path = os.path.join(self.app_dir, SETTINGS_FILE)
-        if os.path.exists(settings_path):
-            with open(settings_path, 'r', encoding='utf-8') as f:
-                self.settings = json.load(f)
-        else:
-            self.settings = {}
+        self.settings = self.settings_store.load()
         
         # Sicherstellen, dass alle Schlüssel vorhanden sind
-        self.settings.setdefault("wiresock_path", DEFAULT_WIRESOCK_PATH)
-        self.settings.setdefault("configs", {})
-        self.settings.setdefault("startup_config", None)
-        self.settings.setdefault("autostart_enabled", False)
+        apply_settings_defaults(self.settings)
         # Standard-Sprache basierend auf den Systemeinstellungen festlegen
         if "language" not in self.settings:
             # Check if system language file exists, otherwise use default
@@ -213,14 +4033,56 @@ class WiresockApp:
         
         # Sprachdateien laden
         load_translations(self.settings["language"])
-
-        self.save_settings()
+        # Nicht speichern: ergänzte Standardwerte werden erst mit der nächsten Änderung geschrieben
 
     def save_settings(self):
-        """Speichert die Anwendungseinstellungen in der JSON-Datei."""
-        settings_path = os.path.join(self.app_dir, SETTINGS_FILE)
-        with open(settings_path, 'w', encoding='utf-8') as f:
-            json.dump(self.settings, f, indent=4)
+        """Speichert die Anwendungseinstellungen gebündelt im Hintergrund in der JSON-Datei."""
+        self.settings_store.save()
+
+    def start_service(self):
+        """Verbindet sich mit dem Dienst (--daemon) oder verwaltet die Verbindungen im eigenen Prozess.
+
+        Ohne Dienst stellt die Anwendung den Steuer-Endpunkt selbst bereit, damit
+        Skripte die Verbindungen auch dann steuern können.
+        """
+        import multiprocessing.connection
+        address = get_ipc_address()
+        authkey = get_ipc_key(self.app_dir)
+        try:
+            # Geänderte Einstellungen (z.B. Importe) schreiben, bevor der Dienst sie liest
+            self.service = RemoteTunnelService(address, authkey, before_request=self.settings_store.flush)
+        except multiprocessing.AuthenticationError as e:
+            # Der Endpunkt gehört einem anderen Prozess; ihn nicht übernehmen
+            print(f"Steuer-Endpunkt '{address}' ist belegt: {e}")
+            self.service = TunnelService(self.settings, self.configs_dir, log_dir=os.path.join(self.app_dir, SESSION_LOG_DIR),
+                                         history_path=os.path.join(self.app_dir, HISTORY_FILE), config_index=self.config_index)
+        except (OSError, EOFError):
+            self.service = TunnelService(self.settings, self.configs_dir, log_dir=os.path.join(self.app_dir, SESSION_LOG_DIR),
+                                         history_path=os.path.join(self.app_dir, HISTORY_FILE), config_index=self.config_index)
+            self.control_server = ControlServer(self.service, address, authkey)
+            try:
+                self.control_server.start()
+            except OSError as e:
+                print(f"Steuer-Endpunkt '{address}' konnte nicht geöffnet werden: {e}")
+                self.control_server = None
+        if not self.service.remote:
+            # Die Messwerte exportiert der Prozess, der die Verbindungen verwaltet
+            self.metrics_exporter = start_metrics_exporter(self.settings, self.app_dir)
+        self.service.subscribe(self._on_service_event)
+        # Nach dem Abonnieren abfragen, damit kein Zustandswechsel verloren geht
+        self.state_store.reset(self.service.status())
+
+    def replace_service(self):
+        """Gibt den bisherigen Dienst mit Abonnement, Steuer-Endpunkt und Exporter frei und verbindet neu."""
+        self.service.unsubscribe(self._on_service_event)
+        self.service.close()
+        if self.control_server:
+            self.control_server.close()
+            self.control_server = None
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        self.start_service()
 
     def set_language(self, event=None):
         """Ändert die Sprache der Anwendung."""
@@ -232,12 +4094,14 @@ class WiresockApp:
             # UI-Elemente aktualisieren
             if self.settings_window and self.settings_window.winfo_exists():
                 self.update_settings_ui()
-            self.update_tray_menu()
+            self.invalidate_menu()
+            self.state_store.touch('title')
 
 
     def set_autostart(self, enable):
         """Aktiviert oder deaktiviert den automatischen Start mit Windows."""
         try:
+            import winreg
             key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
             key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_SET_VALUE)
             
@@ -260,22 +4124,19 @@ class WiresockApp:
         except Exception as e:
             messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_autostart_error", error=e))
 
+    def get_icon_key(self):
+        """Gibt Zustand und Overlay (Durchsatz, siehe traffic_overlay) des Icons zurück."""
+        # Grün nur, wenn alle Verbindungen stehen; gelb, solange eine noch aufgebaut wird
+        tunnels = self.state_store.tunnels()
+        overlay = None
+        if tunnels and self.settings["tray_traffic_overlay"]:
+            overlay = traffic_overlay(self.state_store.traffic())
+        return aggregate_state(tunnels), overlay
+
     def get_icon_image(self):
-        """Wählt das Icon basierend auf dem Verbindungsstatus aus."""
-        icon_path = ""
-        if self.is_connected:
-            icon_path = os.path.join(self.app_dir, 'icon_green.png')
-        elif self.active_connection_name:
-             # Aktive Verbindung, aber nicht verbunden (z.B. Verbindungsversuch)
-            icon_path = os.path.join(self.app_dir, 'icon_yellow.png')
-        else:
-            icon_path = os.path.join(self.app_dir, 'icon_red.png')
-        
-        if not os.path.exists(icon_path):
-            # Fallback zu einem generischen Icon, falls keines gefunden wird
-            return Image.new('RGB', (64, 64), color='gray')
-            
-        return Image.open(icon_path)
+        """Gibt das zwischengespeicherte Icon für den aktuellen Verbindungsstatus und Durchsatz zurück."""
+        state, overlay = self.tray_icon_state = self.get_icon_key()
+        return self.icon_cache.get(state, overlay=overlay)
 
     def create_tray_icon(self):
         """Erstellt das System-Tray-Icon und sein Menü."""
@@ -290,36 +4151,253 @@ class WiresockApp:
         )
         
         # Startet das Icon in einem separaten Thread, damit es nicht blockiert
-        threading.Thread(target=self.tray_icon.run, daemon=True).start()
+        threading.Thread(target=self.tray_icon.run, kwargs={'setup': self._on_tray_ready}, daemon=True).start()
+
+    def _on_tray_ready(self, icon):
+        """Zeigt das Tray-Icon an, sobald es bereit ist, und schließt die Startmessung ab."""
+        icon.visible = True
+        self.startup_timer.mark('tray_visible')
+        self.root.after(0, self._finish_startup_timing)
+
+    def _finish_startup_timing(self):
+        """Gibt die Startmessung aus, sobald die Hauptschleife läuft."""
+        self.startup_timer.mark('main_loop')
+        self.startup_timer.report()
 
     def create_menu_items(self):
+        """Gibt das Menü für den aktuellen Zustand zurück und baut es nur bei Bedarf neu auf."""
+        tunnels = self.state_store.tunnels()
+        key = tuple((name, info['name'], info['state'] == STATE_CONNECTED) for name, info in tunnels.items())
+
+        menu = self.menu_cache.get(key)
+        if menu is None:
+            # Neben dem Menü ohne Verbindungen nur das zuletzt benutzte behalten; nur diese
+            # enthalten Einträge zum Trennen, deren Zuordnung mit ihnen verworfen wird
+            for old_key in [k for k in self.menu_cache if k]:
+                del self.menu_cache[old_key]
+            self.disconnect_item_names.clear()
+            with METRICS.measure('menu_rebuild'):
+                menu = self._build_menu(tunnels)
+            self.menu_cache[key] = menu
+        return menu
+
+    def _build_menu(self, tunnels):
         """Erstellt das Menü für das System-Tray-Icon basierend auf dem aktuellen Zustand."""
         menu_items = []
 
-        if self.is_connected:
-            menu_items.append(pystray.MenuItem(get_text("tray_menu_disconnect", name=self.active_connection_name), lambda icon, item: self.disconnect()))
-        else:
-            if not self.settings["configs"]:
-                menu_items.append(pystray.MenuItem(get_text("tray_menu_no_connections"), None, enabled=False))
+        # Ein Eintrag pro laufender Verbindung zum Trennen bzw. Abbrechen
+        for name, info in tunnels.items():
+            if info['state'] == STATE_CONNECTED:
+                text = get_text("tray_menu_disconnect", name=info['name'])
             else:
-                for name in self.settings["configs"]:
-                    # Helferfunktion, um den Verbinden-Callback zu erstellen
-                    def create_connect_handler(connection_name):
-                        return lambda icon, item: self.connect(connection_name)
-                    menu_items.append(pystray.MenuItem(get_text("tray_menu_connect", name=name), create_connect_handler(name)))
+                text = get_text("tray_menu_cancel", name=info['name'])
+            item = pystray.MenuItem(text, self._on_disconnect_item)
+            self.disconnect_item_names[item] = name
+            menu_items.append(item)
+            entry = self.config_index.get(self.settings["configs"].get(info['name'], ''))
+            if entry and entry['endpoint']:
+                menu_items.append(pystray.MenuItem(get_text("tray_menu_endpoint", endpoint=entry['endpoint']), None, enabled=False))
+        if len(tunnels) > 1:
+            menu_items.append(pystray.MenuItem(get_text("tray_menu_disconnect_all"), lambda icon, item: self.root.after(0, self.disconnect_all)))
+        if tunnels:
+            menu_items.append(pystray.MenuItem(get_text("tray_menu_traffic"), lambda icon, item: self.root.after(0, self.show_traffic_window)))
+            menu_items.append(pystray.Menu.SEPARATOR)
+
+        menu_items.extend(self.get_connect_section())
 
         menu_items.append(pystray.Menu.SEPARATOR)
-        menu_items.append(pystray.MenuItem(get_text("tray_menu_settings"), lambda icon, item: self.show_settings_window()))
-        menu_items.append(pystray.MenuItem(get_text("tray_menu_help_info"), lambda icon, item: self.show_info_window()))
-        menu_items.append(pystray.MenuItem(get_text("tray_menu_exit"), lambda icon, item: self.quit_app()))
+        menu_items.append(pystray.MenuItem(get_text("tray_menu_settings"), lambda icon, item: self.root.after(0, self.show_settings_window)))
+        menu_items.append(pystray.MenuItem(get_text("tray_menu_help_info"), lambda icon, item: self.root.after(0, self.show_info_window)))
+        menu_items.append(pystray.MenuItem(get_text("tray_menu_exit"), lambda icon, item: self.root.after(0, self.quit_app)))
         
         return pystray.Menu(*menu_items)
 
+    def get_connect_section(self):
+        """Liefert die Einträge zum Verbinden; sie sind unabhängig vom Zustand und werden nur einmal erzeugt."""
+        if self.connect_section is not None:
+            return self.connect_section
+
+        menu_items = []
+        if not self.settings["configs"]:
+            menu_items.append(pystray.MenuItem(get_text("tray_menu_no_connections"), None, enabled=False))
+        else:
+            groups, ungrouped = self.get_connection_groups()
+            if len(self.settings["configs"]) > 1:
+                menu_items.append(pystray.MenuItem(get_text("tray_menu_connect_fastest"), lambda icon, item: self.root.after(0, self.connect_fastest)))
+                menu_items.append(pystray.Menu.SEPARATOR)
+            for group, names in groups.items():
+                # Der Inhalt der Untermenüs wird erst beim ersten Anzeigen erzeugt
+                submenu = pystray.Menu(functools.partial(self._group_menu_items, group))
+                menu_items.append(pystray.MenuItem(get_text("tray_menu_group", group=group, count=len(names)), submenu))
+            for name in ungrouped:
+                menu_items.append(self._create_connect_item(name))
+
+        self.connect_section = tuple(menu_items)
+        return self.connect_section
+
+    def get_connection_group(self, name):
+        """Ermittelt die Gruppe einer Verbindung aus ihrem Tag oder dem Namenspräfix."""
+        group = self.settings["config_groups"].get(name)
+        if group:
+            return group
+        if MENU_GROUP_SEPARATOR in name:
+            return name.split(MENU_GROUP_SEPARATOR, 1)[0].strip() or None
+        return None
+
+    def get_connection_groups(self):
+        """Teilt die Verbindungen in Gruppen und Verbindungen ohne Gruppe auf.
+
+        Bei sehr vielen Verbindungen ohne Gruppe werden diese nach dem Anfangsbuchstaben gruppiert.
+        """
+        if self.connection_groups is not None:
+            return self.connection_groups
+
+        groups = {}
+        ungrouped = []
+        for name in self.get_ordered_connection_names():
+            group = self.get_connection_group(name)
+            if group:
+                groups.setdefault(group, []).append(name)
+            else:
+                ungrouped.append(name)
+
+        if len(ungrouped) > MENU_FLAT_LIMIT:
+            for name in ungrouped:
+                groups.setdefault(name[:1].upper(), []).append(name)
+            ungrouped = []
+
+        self.connection_groups = (groups, ungrouped)
+        return self.connection_groups
+
+    def get_ordered_connection_names(self):
+        """Namen der Verbindungen in der Reihenfolge des Imports oder, mit menu_sort_by_ranking, der Rangfolge."""
+        names = list(self.settings["configs"])
+        if not self.settings["menu_sort_by_ranking"]:
+            return names
+        if self.connection_ranking is None:
+            # Bis die Rangfolge vorliegt, bleibt die Reihenfolge des Imports
+            self.request_connection_ranking()
+            return names
+        # Verbindungen ohne Verlauf behalten ihre Reihenfolge am Ende
+        return sorted(names, key=lambda name: self.connection_ranking.get(name, len(self.connection_ranking)))
+
+    def load_connection_stats(self, callback, flush=True):
+        """Fragt die Auswertung des Verlaufs im Hintergrund ab und übergibt sie callback im Tk-Thread."""
+        def query():
+            stats = self.service.connection_stats(flush)
+            self.root.after(0, callback, stats)
+
+        threading.Thread(target=query, daemon=True).start()
+
+    def request_connection_ranking(self):
+        """Fragt die Rangfolge für das Menü ab, ohne auf noch nicht geschriebene Einträge zu warten."""
+        if self.connection_ranking_request == self.connection_ranking_version:
+            return
+        version = self.connection_ranking_request = self.connection_ranking_version
+        self.load_connection_stats(lambda stats: self._apply_connection_ranking(stats, version), flush=False)
+
+    def _apply_connection_ranking(self, stats, version):
+        """Übernimmt eine abgefragte Rangfolge und ordnet das Menü neu."""
+        if version != self.connection_ranking_version:
+            # Inzwischen verworfen; der nächste Menüaufbau fragt erneut ab
+            return
+        self.connection_ranking = {entry['profile']: position for position, entry in enumerate(stats)}
+        self.invalidate_menu()
+
+    def invalidate_connection_ranking(self):
+        """Verwirft die Rangfolge, z.B. nach einer beendeten Verbindung, und baut das Menü neu auf."""
+        self.connection_ranking = None
+        self.connection_ranking_version += 1
+        self.invalidate_menu()
+
+    def _group_menu_items(self, group):
+        """Liefert die Einträge eines Untermenüs; sie werden nur einmal erzeugt."""
+        items = self.group_items_cache.get(group)
+        if items is None:
+            groups, _ = self.get_connection_groups()
+            names = groups.get(group, [])
+            items = tuple(self._create_connect_item(name) for name in names)
+            if len(names) > 1:
+                fastest_item = pystray.MenuItem(get_text("tray_menu_connect_fastest_group", group=group), lambda icon, item: self.root.after(0, self.connect_fastest, group))
+                items = (fastest_item, pystray.Menu.SEPARATOR) + items
+            self.group_items_cache[group] = items
+        return items
+
+    def _create_connect_item(self, name):
+        """Erstellt einen Menüeintrag zum Verbinden; alle Einträge teilen sich einen Handler."""
+        item = pystray.MenuItem(get_text("tray_menu_connect", name=name), self._on_connect_item)
+        self.connect_item_names[item] = name
+        return item
+
+    def _on_connect_item(self, icon, item):
+        """Verbindet mit der zum angeklickten Menüeintrag gehörenden Verbindung (aus dem Tray-Thread)."""
+        name = self.connect_item_names.get(item)
+        if name:
+            self.root.after(0, self.connect, name)
+
+    def _on_disconnect_item(self, icon, item):
+        """Trennt die zum angeklickten Menüeintrag gehörende Verbindung (aus dem Tray-Thread)."""
+        name = self.disconnect_item_names.get(item)
+        if name:
+            self.root.after(0, self.disconnect, name)
+
+    def invalidate_menu(self):
+        """Verwirft die zwischengespeicherten Menüs, z.B. nach Änderungen an den Verbindungen."""
+        self.menu_cache.clear()
+        self.group_items_cache.clear()
+        self.connect_section = None
+        self.connect_item_names.clear()
+        self.disconnect_item_names.clear()
+        self.connection_groups = None
+        self.state_store.touch('menu')
+
+    def invalidate_menu_entries(self, names):
+        """Verwirft nur die Menüteile, in denen die angegebenen Verbindungen vorkommen."""
+        self.menu_cache.clear()
+        self.connect_section = None
+        self.connection_groups = None
+        for name in names:
+            # Je nach Anzahl steht eine Verbindung in ihrer Gruppe oder unter ihrem Anfangsbuchstaben
+            self.group_items_cache.pop(self.get_connection_group(name), None)
+            self.group_items_cache.pop(name[:1].upper(), None)
+        for item in [item for item, name in self.connect_item_names.items() if name in names]:
+            del self.connect_item_names[item]
+        self.state_store.touch('menu')
+
+    def _on_state_changed(self, views):
+        """Merkt geänderte Anzeigeteile vor und lässt sie einmal gebündelt im Tk-Thread zeichnen (aus beliebigem Thread)."""
+        with self.dirty_views_lock:
+            scheduled = bool(self.dirty_views)
+            self.dirty_views |= views
+        if not scheduled:
+            self.root.after(0, self._render_dirty_views)
+
+    def _render_dirty_views(self):
+        """Zeichnet nur die Teile von Tray und Fenstern neu, deren Eingaben sich geändert haben."""
+        with self.dirty_views_lock:
+            views, self.dirty_views = self.dirty_views, set()
+        if 'menu' in views:
+            self.update_tray_menu()
+        if 'icon' in views:
+            self.update_tray_icon()
+        if 'title' in views:
+            self.update_tray_title()
+        if 'traffic' in views and self.traffic_window and self.traffic_window.winfo_exists():
+            self._draw_traffic_window()
+
     def update_tray_menu(self):
-        """Aktualisiert das Menü des Tray-Icons und dessen Icon."""
+        """Aktualisiert das Menü des Tray-Icons."""
+        if self.tray_icon:
+            menu = self.create_menu_items()
+            if menu is not self.tray_icon.menu:
+                self.tray_icon.menu = menu
+
+    def update_tray_icon(self):
+        """Tauscht das Icon, wenn sich Verbindungsstatus oder Durchsatzstufe tatsächlich geändert haben."""
         if self.tray_icon:
-            self.tray_icon.menu = self.create_menu_items()
-            self.tray_icon.icon = self.get_icon_image()
+            if self.get_icon_key() != self.tray_icon_state:
+                with METRICS.measure('icon_swap'):
+                    self.tray_icon.icon = self.get_icon_image()
 
 
     def show_connection_progress_window(self, name):
@@ -335,8 +4413,8 @@ class WiresockApp:
         # Verhindert, dass das Fenster geschlossen wird
         self.status_window.protocol("WM_DELETE_WINDOW", lambda: None)
         
-        status_text_label = ttk.Label(self.status_window, text=get_text("status_connecting", name=name), padding=10)
-        status_text_label.pack()
+        self.status_label = ttk.Label(self.status_window, text=get_text("status_connecting", name=name), padding=10)
+        self.status_label.pack()
 
         # Textfeld für die Ausgabe von Wiresock
         self.status_text = tk.Text(self.status_window, wrap=tk.WORD, height=10)
@@ -352,126 +4430,301 @@ class WiresockApp:
         self.status_window.geometry(f'+{x}+{y}')
         
         self.status_window.update()
-        
-    def _read_stdout(self):
-        """Liest die Ausgabe von Wiresock und schreibt sie in das Textfeld."""
-        while self.wiresock_process and self.wiresock_process.poll() is None:
-            output_line = self.wiresock_process.stdout.readline()
-            if output_line:
-                self.status_window.after(0, self._update_status_text, output_line.decode('utf-8'))
-        
-        # Schließt das Fenster, wenn der Prozess beendet wurde
-        self.status_window.after(2000, self.status_window.destroy)
-        self.is_connected = False
-        self.active_connection_name = None
-        self.update_tray_menu()
+        self.status_window.after(STATUS_REFRESH_MS, self._drain_status_log)
 
+    def _drain_status_log(self):
+        """Überträgt die gepufferte Ausgabe in festen Abständen gebündelt in das Statusfenster."""
+        if not self.status_window or not self.status_window.winfo_exists():
+            return
+        if self.status_tunnel:
+            lines, dropped = self.service.drain_log(self.status_tunnel)
+            if dropped:
+                lines.insert(0, get_text("status_lines_dropped", count=dropped))
+            if lines:
+                self._update_status_text('\n'.join(lines) + '\n')
+        self.status_window.after(STATUS_REFRESH_MS, self._drain_status_log)
 
     def _update_status_text(self, text_to_add):
-        """Aktualisiert das Textfeld im Statusfenster mit neuer Ausgabe."""
+        """Aktualisiert das Textfeld im Statusfenster mit neuer Ausgabe und kürzt alte Zeilen."""
         if self.status_window and self.status_window.winfo_exists():
             self.status_text.config(state=tk.NORMAL)
             self.status_text.insert(tk.END, text_to_add)
+            # Älteste Zeilen entfernen, sobald die Obergrenze überschritten ist
+            line_count = int(self.status_text.index('end-1c').split('.')[0])
+            excess = line_count - self.settings["status_max_lines"]
+            if excess > 0:
+                self.status_text.delete('1.0', f'{excess + 1}.0')
             self.status_text.see(tk.END)
             self.status_text.config(state=tk.DISABLED)
 
+    def _on_service_event(self, event):
+        """Übernimmt ein Ereignis des Dienstes in dessen Thread und leitet es an den Tk-Thread weiter."""
+        if event["event"] == 'service_lost':
+            self.state_store.reset({})
+        else:
+            self.state_store.apply_event(event)
+        self.root.after(0, self._handle_service_event, event)
 
-    def connect(self, config_name):
-        """Stellt die Verbindung her und startet den Wiresock-Prozess."""
-        if self.is_connected:
-            messagebox.showinfo(get_text("msg_box_title_success"), get_text("msg_box_connect_active", name=self.active_connection_name))
+    def _handle_service_event(self, event):
+        """Reagiert im Tk-Thread auf die Zustandswechsel einer Verbindung (Meldungen und Fenster).
+
+        Menü, Icon und Tooltip folgen dem state_store und werden hier nicht angefasst.
+        """
+        if event["event"] == 'service_lost':
+            # Der Dienst wurde beendet: die Verbindungen wieder selbst verwalten
+            self.replace_service()
             return
-        
-        # Prüfen, ob eine Instanz von Wiresock läuft und diese beenden
-        self.disconnect()
-        time.sleep(1) # Kurze Pause, um dem Prozess Zeit zum Beenden zu geben
-        
-        self.show_connection_progress_window(config_name)
-        self.status_window.update()
 
-        self.active_connection_name = config_name
-        self.update_tray_menu()
+        key, state, detail = event["tunnel"], event["state"], event["detail"]
+        if state in (STATE_FAILED, STATE_IDLE) and self.settings["menu_sort_by_ranking"]:
+            # Die beendete Verbindung wird im Verlauf eingetragen; die Rangfolge neu abfragen
+            self.invalidate_connection_ranking()
+        # Meldungen einer bereits getrennten oder ersetzten Verbindung nur für die Anzeige verwenden
+        if event["stopped"]:
+            if state == STATE_IDLE:
+                self.announced_tunnels.discard(key)
+            return
 
-        config_file = self.settings["configs"].get(config_name)
-        if not config_file:
-            messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_config_not_found", name=config_name))
-            self.active_connection_name = None
-            self.update_tray_menu()
+        if state == STATE_HANDSHAKING:
+            if key == self.status_tunnel and self.status_window and self.status_window.winfo_exists():
+                self.status_label.config(text=get_text("status_handshaking", name=event["name"]))
+        elif state == STATE_CONNECTED:
+            # Erfolgsmeldung nur beim ersten Aufbau, nicht nach automatischen Neustarts
+            if key not in self.announced_tunnels:
+                self.announced_tunnels.add(key)
+                if key == self.status_tunnel:
+                    self._close_status_window()
+                messagebox.showinfo(get_text("msg_box_title_success"), get_text("msg_box_connection_success", name=event["name"]))
+        elif state in (STATE_FAILED, STATE_IDLE):
+            self.announced_tunnels.discard(key)
+            if state == STATE_FAILED and (not event["connected_once"] or detail == 'restart_limit'):
+                self._show_connect_error(event, detail)
+            # Fenster bleibt kurz offen, um die letzte Ausgabe anzuzeigen
+            if key == self.status_tunnel and self.status_window and self.status_window.winfo_exists():
+                self.status_window.after(2000, self._close_status_window)
+
+    def _show_connect_error(self, info, detail):
+        """Zeigt die passende Fehlermeldung für einen fehlgeschlagenen Verbindungsaufbau."""
+        if detail == 'timeout':
+            message = get_text("msg_box_connect_timeout", name=info["name"], seconds=self.settings["connect_timeout"])
+        elif detail == 'restart_limit':
+            message = get_text("msg_box_reconnect_failed", name=info["name"], restarts=info["restarts"])
+        elif detail == 'wiresock_not_found':
+            message = get_text("msg_box_wiresock_not_found_connect", path=self.settings["wiresock_path"])
+        elif detail == 'config_not_found':
+            message = get_text("msg_box_config_not_found", name=info["name"])
+        elif isinstance(detail, str):
+            message = get_text("msg_box_connect_error", error=detail)
+        else:
+            message = get_text("status_connection_failed")
+        messagebox.showerror(get_text("msg_box_title_error"), message)
+
+    def _close_status_window(self):
+        """Schließt das Statusfenster, falls es noch existiert."""
+        if self.status_window and self.status_window.winfo_exists():
             self.status_window.destroy()
-            return
 
-        full_config_path = os.path.join(self.configs_dir, config_file)
-        if not os.path.exists(full_config_path):
+    def connect(self, config_name):
+        """Startet den Verbindungsaufbau, ohne den UI-Thread zu blockieren.
+
+        Ohne die Einstellung multiple_tunnels ersetzt die neue Verbindung die laufenden.
+        """
+        self._finish_connect(config_name, self.service.connect(config_name))
+
+    def _finish_connect(self, config_name, error):
+        """Zeigt nach dem Start einer Verbindung den Fehler oder das Statusfenster an."""
+        if error == 'already_active':
+            messagebox.showinfo(get_text("msg_box_title_success"), get_text("msg_box_connect_active", name=config_name))
+            return
+        if error == 'config_not_found':
+            messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_config_not_found", name=config_name))
+            return
+        if error == 'file_not_found':
+            full_config_path = os.path.join(self.configs_dir, self.settings["configs"].get(config_name, ''))
             messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_file_not_found", path=full_config_path))
-            self.active_connection_name = None
-            self.update_tray_menu()
-            self.status_window.destroy()
             return
+        if error:
+            messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_connect_error", error=error))
+            return
+
+        self.status_tunnel = config_name
+        self.show_connection_progress_window(config_name)
+
+    def update_tray_title(self):
+        """Zeigt alle Verbindungen mit Zustand, Neustarts und Ausfallzeit im Tooltip des Tray-Icons."""
+        if not self.tray_icon:
+            return
+        lines = [APP_NAME]
+        tunnels = self.state_store.tunnels()
+        traffic = self.state_store.traffic()
+        for key, info in tunnels.items():
+            line = get_text("tray_tooltip_tunnel", name=info['name'], state=get_text(f"state_{info['state']}"))
+            if info['restarts']:
+                line += ' ' + get_text("tray_tooltip_restarts", restarts=info['restarts'], downtime=int(info['downtime']))
+            lines.append(line)
+            stats = traffic.get(key)
+            if stats:
+                details = []
+                if stats['rx_bytes'] is not None or stats['tx_bytes'] is not None:
+                    details.append(get_text("tray_tooltip_traffic", rx=format_bytes(stats['rx_rate']), tx=format_bytes(stats['tx_rate'])))
+                if stats['handshake_age'] is not None:
+                    details.append(get_text("tray_tooltip_handshake", seconds=int(stats['handshake_age'])))
+                if details:
+                    lines.append('  ' + ', '.join(details))
+        title = '\n'.join(lines)
+        if title != self.tray_icon.title:
+            self.tray_icon.title = title
 
+    def _refresh_traffic(self):
+        """Übernimmt im Takt der Messpunkte Verkehrsstatistik, Neustarts und Ausfallzeit in den state_store.
+
+        Läuft der Dienst in einem eigenen Prozess, wird im Hintergrund abgefragt;
+        der nächste Takt beginnt erst, wenn die Antwort da ist.
+        """
+        if not self.state_store.tunnels():
+            self.root.after(int(TRAFFIC_SAMPLE_INTERVAL * 1000), self._refresh_traffic)
+        elif self.service.remote:
+            threading.Thread(target=self._fetch_traffic, args=(self.service,), daemon=True).start()
+        else:
+            self._fetch_traffic(self.service)
+
+    def _fetch_traffic(self, service):
+        """Fragt die Verkehrsstatistik ab und plant den nächsten Takt im Tk-Thread."""
         try:
-            # Korrigierter Befehl mit 'run -config' und Anführungszeichen für den Pfad
-            cmd = [self.settings["wiresock_path"], 'run', '-config', f'{full_config_path}']
-            
-            # Starte den Wiresock-Prozess und leite die Ausgabe um
-            self.wiresock_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                creationflags=subprocess.CREATE_NO_WINDOW
+            # Tooltip und Verkehrsfenster zeichnen sich nur neu, wenn sich die Werte geändert haben
+            self.state_store.sample(service.traffic(), service.status())
+        finally:
+            self.root.after(int(TRAFFIC_SAMPLE_INTERVAL * 1000), self._refresh_traffic)
+
+    def show_traffic_window(self):
+        """Zeigt ein Fenster mit dem Durchsatzverlauf einer laufenden Verbindung an."""
+        if self.traffic_window and self.traffic_window.winfo_exists():
+            self.traffic_window.lift()
+            return
+
+        self.traffic_window = tk.Toplevel(self.root)
+        self.traffic_window.title(get_text("win_title_traffic"))
+        self.traffic_window.resizable(False, False)
+
+        self.traffic_tunnel_var = tk.StringVar()
+        self.traffic_tunnel_dropdown = ttk.Combobox(self.traffic_window, textvariable=self.traffic_tunnel_var, state="readonly")
+        self.traffic_tunnel_dropdown.pack(fill="x", padx=10, pady=(10, 5))
+        self.traffic_tunnel_dropdown.bind("<<ComboboxSelected>>", lambda event: self._draw_traffic_window())
+
+        self.traffic_canvas = tk.Canvas(self.traffic_window, width=TRAFFIC_GRAPH_WIDTH, height=TRAFFIC_GRAPH_HEIGHT, background="white")
+        self.traffic_canvas.pack(padx=10, pady=5)
+        self.traffic_label = ttk.Label(self.traffic_window, text="", justify="left", anchor="w")
+        self.traffic_label.pack(fill="x", padx=10, pady=(0, 10))
+
+        self._draw_traffic_window()
+
+    def _draw_traffic_window(self):
+        """Zeichnet den Verlauf von Empfangs- (grün) und Senderate (blau) der gewählten Verbindung."""
+        tunnels = self.state_store.tunnels()
+        self.traffic_tunnel_dropdown.config(values=list(tunnels))
+        key = self.traffic_tunnel_var.get()
+        if key not in tunnels:
+            key = next(iter(tunnels), '')
+            self.traffic_tunnel_var.set(key)
+
+        canvas = self.traffic_canvas
+        canvas.delete("all")
+        history = self.service.traffic_history(key) if key else None
+        stats = self.state_store.traffic().get(key) if key else None
+        if not history or not stats:
+            self.traffic_label.config(text="")
+            return
+
+        # Die Skala passt sich dem höchsten Wert im Verlauf an (mindestens 1 KB/s)
+        peak = max([1024.0] + history['rx_rate'] + history['tx_rate'])
+        step = TRAFFIC_GRAPH_WIDTH / max(1, TRAFFIC_HISTORY_SIZE - 1)
+        offset = TRAFFIC_HISTORY_SIZE - len(history['rx_rate'])
+        for values, color in ((history['rx_rate'], '#00a000'), (history['tx_rate'], '#0060ff')):
+            if len(values) < 2:
+                continue
+            points = []
+            for i, value in enumerate(values):
+                points.extend(((offset + i) * step, TRAFFIC_GRAPH_HEIGHT - 2 - value / peak * (TRAFFIC_GRAPH_HEIGHT - 4)))
+            canvas.create_line(*points, fill=color)
+        canvas.create_text(4, 4, text=f"{format_bytes(peak)}/s", anchor="nw", fill="#808080")
+
+        if stats['rx_bytes'] is None and stats['tx_bytes'] is None:
+            text = get_text("traffic_window_no_data")
+        else:
+            text = get_text(
+                "traffic_window_rates",
+                rx=format_bytes(stats['rx_rate']),
+                tx=format_bytes(stats['tx_rate']),
+                rx_total=format_bytes(stats['rx_bytes'] or 0),
+                tx_total=format_bytes(stats['tx_bytes'] or 0)
             )
-            
-            # Starte Thread zum Lesen der Ausgabe
-            threading.Thread(target=self._read_stdout, daemon=True).start()
-            
-            # Warte kurz, um zu sehen, ob der Prozess sofort fehlschlägt
-            time.sleep(1)
-            
-            # Überprüfe den Status des Prozesses
-            if self.wiresock_process.poll() is None:
-                self.is_connected = True
-                self.update_tray_menu()
-                messagebox.showinfo(get_text("msg_box_title_success"), get_text("msg_box_connection_success", name=config_name))
-                self.status_window.destroy()
+        if stats['handshake_age'] is not None:
+            text += '\n' + get_text("traffic_window_handshake", seconds=int(stats['handshake_age']))
+        self.traffic_label.config(text=text)
+
+    def connect_fastest(self, group=None):
+        """Misst die Endpunkte aller (bzw. der Gruppen-)Verbindungen und verbindet mit der schnellsten."""
+        if group is None:
+            names = list(self.settings["configs"])
+        else:
+            names = self.get_connection_groups()[0].get(group, [])
+
+        candidates = {}
+        for name in names:
+            entry = self.config_index.get(self.settings["configs"][name]) or self.config_index.update(self.settings["configs"][name])
+            if entry and entry['endpoint']:
+                candidates[name] = entry['endpoint']
+
+        def probe():
+            name, _ = self.latency_prober.fastest(candidates)
+            if name:
+                self.root.after(0, self.connect, name)
             else:
-                self.is_connected = False
-                self.update_tray_menu()
-                # Fenster bleibt offen, um den Fehler anzuzeigen
-                messagebox.showerror(get_text("msg_box_title_error"), get_text("status_connection_failed"))
-            
-        except FileNotFoundError:
-            messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_wiresock_not_found_connect", path=self.settings['wiresock_path']))
-            self.wiresock_process = None
-            self.is_connected = False
-            self.status_window.destroy()
-        except Exception as e:
-            messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_connect_error", error=e))
-            self.wiresock_process = None
-            self.is_connected = False
-            self.status_window.destroy()
-            
-    def disconnect(self):
-        """Trennt die aktuelle Verbindung und beendet den Wiresock-Prozess."""
-        if not self.wiresock_process:
+                self.root.after(0, messagebox.showerror, get_text("msg_box_title_error"), get_text("msg_box_no_reachable_endpoint"))
+
+        threading.Thread(target=probe, daemon=True).start()
+
+    def disconnect(self, name=None, wait=False):
+        """Trennt eine Verbindung (ohne Namen alle) und beendet den Wiresock-Prozess.
+
+        Ohne wait wird der Prozess im Hintergrund beendet, damit die UI nicht blockiert.
+        """
+        if not self.service.disconnect(name, wait):
             return
+        self.state_store.remove(name)
 
-        try:
-            self.wiresock_process.terminate()
-            self.wiresock_process.wait(timeout=5)
-        except Exception as e:
-            print(f"Fehler beim Beenden des Prozesses: {e}")
-            try:
-                self.wiresock_process.kill()
-            except Exception:
-                pass
+    def disconnect_all(self):
+        """Trennt alle laufenden Verbindungen."""
+        self.disconnect()
 
-        self.wiresock_process = None
-        self.is_connected = False
-        self.active_connection_name = None
-        self.update_tray_menu()
+    def handle_instance_request(self, request):
+        """Führt die Anfrage eines weiteren Starts aus (im Hintergrund aufgerufen, siehe InstanceGuard)."""
+        if request.get("action") == 'connect':
+            name = request.get("name")
+            if name not in self.settings["configs"]:
+                return {"ok": False, "error": 'config_not_found'}
+            self.root.after(0, self.connect, name)
+        else:
+            self.root.after(0, self.show_settings_window)
+        return {"ok": True}
 
     def quit_app(self):
-        """Beendet die Anwendung, inklusive laufendem Wiresock-Prozess."""
-        self.disconnect()
+        """Beendet die Anwendung, inklusive laufendem Wiresock-Prozess.
+
+        Läuft der Dienst in einem eigenen Prozess, bleiben dessen Verbindungen bestehen.
+        """
+        if not self.service.remote:
+            self.disconnect(wait=True)
+        self.service.close()
+        if self.control_server:
+            self.control_server.close()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        if self.instance_guard:
+            self.instance_guard.close()
+        self.config_watcher.stop()
+        self.settings_store.flush()
+        self.config_index.store.flush()
         if self.tray_icon:
             self.tray_icon.stop()
         self.root.destroy()
@@ -500,7 +4753,7 @@ class WiresockApp:
         # Link zum GitHub-Repository erstellen
         github_label = ttk.Label(text_frame, text=get_text("info_text_github", github=APP_GITHUB), foreground="blue", cursor="hand2")
         github_label.pack(anchor="w")
-        github_label.bind("<Button-1>", lambda e: webbrowser.open(APP_GITHUB))
+        github_label.bind("<Button-1>", lambda e: self.open_github())
 
         # Bild-Container
         image_path = os.path.join(self.app_dir, 'icon.png')
@@ -518,6 +4771,11 @@ class WiresockApp:
         close_button.pack(pady=10)
 
 
+    def open_github(self):
+        """Öffnet das GitHub-Repository im Standardbrowser."""
+        import webbrowser
+        webbrowser.open(APP_GITHUB)
+
     def show_settings_window(self):
         """Zeigt das Einstellungsfenster an."""
         if self.settings_window and self.settings_window.winfo_exists():
@@ -526,12 +4784,21 @@ class WiresockApp:
             
         self.settings_window = tk.Toplevel(self.root)
         self.settings_window.title(get_text("win_title_settings"))
-        self.settings_window.geometry("600x570")
+        self.settings_window.geometry("600x760")
         self.settings_window.resizable(False, False)
         self.settings_window.protocol("WM_DELETE_WINDOW", lambda: self.settings_window.destroy())
 
+        # Registerkarten: Einstellungen und Auswertung des Verlaufs
+        self.settings_notebook = ttk.Notebook(self.settings_window)
+        self.settings_notebook.pack(fill="both", expand=True)
+        self.settings_general_tab = ttk.Frame(self.settings_notebook)
+        self.settings_notebook.add(self.settings_general_tab, text=get_text("settings_tab_general"))
+        stats_tab = ttk.Frame(self.settings_notebook)
+        self.settings_notebook.add(stats_tab, text=get_text("settings_tab_statistics"))
+        self.create_stats_tab(stats_tab)
+
         # Frame für den Pfad zur Wiresock-Installation
-        path_frame = tk.LabelFrame(self.settings_window, text=get_text("settings_path_frame"), padx=10, pady=10)
+        path_frame = tk.LabelFrame(self.settings_general_tab, text=get_text("settings_path_frame"), padx=10, pady=10)
         path_frame.pack(fill="x", padx=10, pady=5)
         self.path_entry = ttk.Entry(path_frame)
         self.path_entry.insert(0, self.settings["wiresock_path"])
@@ -539,7 +4806,7 @@ class WiresockApp:
         ttk.Button(path_frame, text=get_text("settings_path_button"), command=self.update_wiresock_path).pack(side="left", padx=(5,0))
 
         # Frame für die Spracheinstellungen
-        lang_frame = tk.LabelFrame(self.settings_window, text=get_text("settings_language_frame"), padx=10, pady=5)
+        lang_frame = tk.LabelFrame(self.settings_general_tab, text=get_text("settings_language_frame"), padx=10, pady=5)
         lang_frame.pack(fill="x", padx=10, pady=5)
         
         tk.Label(lang_frame, text=get_text("settings_language_label")).pack(side="left", padx=(0, 5))
@@ -551,24 +4818,22 @@ class WiresockApp:
         self.lang_dropdown.bind("<<ComboboxSelected>>", self.set_language)
 
         # Frame für den Import-Bereich
-        import_frame = tk.LabelFrame(self.settings_window, text=get_text("settings_import_frame"), padx=10, pady=5)
+        import_frame = tk.LabelFrame(self.settings_general_tab, text=get_text("settings_import_frame"), padx=10, pady=5)
         import_frame.pack(fill="x", padx=10, pady=5)
 
         tk.Label(import_frame, text=get_text("settings_import_name_label")).pack(side="left", padx=(0, 5))
         self.config_name_entry = ttk.Entry(import_frame)
         self.config_name_entry.pack(side="left", expand=True, fill="x")
         ttk.Button(import_frame, text=get_text("settings_import_button"), command=self.import_config).pack(side="left", padx=(5, 0))
+        ttk.Button(import_frame, text=get_text("settings_import_folder_button"), command=self.import_config_folder).pack(side="left", padx=(5, 0))
+        ttk.Button(import_frame, text=get_text("settings_import_archive_button"), command=self.import_config_archive).pack(side="left", padx=(5, 0))
 
         # Frame für die Verbindungsliste
-        connections_frame = tk.LabelFrame(self.settings_window, text=get_text("settings_connections_frame"), padx=10, pady=5)
+        connections_frame = tk.LabelFrame(self.settings_general_tab, text=get_text("settings_connections_frame"), padx=10, pady=5)
         connections_frame.pack(fill="both", expand=True, padx=10, pady=5)
         
-        self.connections_listbox = tk.Listbox(connections_frame)
-        self.connections_listbox.pack(side="left", fill="both", expand=True)
-        
-        connections_scrollbar = ttk.Scrollbar(connections_frame, orient="vertical", command=self.connections_listbox.yview)
-        connections_scrollbar.pack(side="right", fill="y")
-        self.connections_listbox.config(yscrollcommand=connections_scrollbar.set)
+        # Nur die sichtbaren Zeilen werden in die Listbox eingetragen
+        self.connections_list = VirtualListbox(connections_frame, on_select=self.show_connection_details)
 
         # Buttons zum Löschen, Umbenennen und Bearbeiten
         actions_frame = ttk.Frame(connections_frame)
@@ -577,27 +4842,157 @@ class WiresockApp:
         ttk.Button(actions_frame, text=get_text("settings_connections_rename"), command=self.rename_config).pack(pady=5)
         ttk.Button(actions_frame, text=get_text("settings_connections_edit"), command=self.edit_config).pack(pady=5)
 
+        # Suchfeld über der Liste; filtert bei jeder Eingabe
+        search_frame = ttk.Frame(connections_frame)
+        search_frame.pack(side="top", fill="x", pady=(0, 5), before=self.connections_list.listbox)
+        tk.Label(search_frame, text=get_text("settings_connections_search")).pack(side="left", padx=(0, 5))
+        self.connection_search_var = tk.StringVar()
+        self.connection_search_var.trace_add("write", lambda *args: self.update_connections_list())
+        ttk.Entry(search_frame, textvariable=self.connection_search_var).pack(side="left", fill="x", expand=True)
+
+        # Frame für die Details der ausgewählten Verbindung
+        details_frame = tk.LabelFrame(self.settings_general_tab, text=get_text("settings_details_frame"), padx=10, pady=5)
+        details_frame.pack(fill="x", padx=10, pady=5)
+        self.connection_details_label = ttk.Label(details_frame, text="", justify="left", anchor="w")
+        self.connection_details_label.pack(fill="x")
+
+        # Dauer der gemessenen Phasen, nur mit der Einstellung debug_overlay
+        if self.settings["debug_overlay"]:
+            metrics_frame = tk.LabelFrame(self.settings_general_tab, text=get_text("settings_metrics_frame"), padx=10, pady=5)
+            metrics_frame.pack(fill="x", padx=10, pady=5)
+            self.metrics_label = ttk.Label(metrics_frame, text="", justify="left", anchor="w", font=("TkFixedFont", 9))
+            self.metrics_label.pack(fill="x")
+            self._refresh_metrics_overlay()
+
+        # Neustart bei ausbleibender Ausgabe (opt-in); zuletzt erzeugt, damit die Namen der übrigen Frames gleich bleiben
+        self.reconnect_frame = tk.LabelFrame(self.settings_general_tab, text=get_text("settings_reconnect_frame"), padx=10, pady=5)
+        self.reconnect_frame.pack(fill="x", padx=10, pady=5, after=lang_frame)
+        self.stall_timeout_label = tk.Label(self.reconnect_frame, text=get_text("settings_stall_timeout_label"))
+        self.stall_timeout_label.grid(row=0, column=0, sticky="w")
+        self.stall_timeout_var = tk.StringVar(value=str(self.settings["reconnect"].get("stall_timeout", DEFAULT_RECONNECT_POLICY["stall_timeout"])))
+        stall_timeout_spinbox = ttk.Spinbox(self.reconnect_frame, from_=0, to=3600, increment=10, width=6,
+                                            textvariable=self.stall_timeout_var, command=self.set_stall_timeout)
+        stall_timeout_spinbox.grid(row=0, column=1, padx=(5, 0))
+        stall_timeout_spinbox.bind("<FocusOut>", self.set_stall_timeout)
+        stall_timeout_spinbox.bind("<Return>", self.set_stall_timeout)
+        self.stall_timeout_hint = ttk.Label(self.reconnect_frame, text=get_text("settings_stall_timeout_hint"), foreground="gray")
+        self.stall_timeout_hint.grid(row=1, column=0, columnspan=2, sticky="w")
+
+        self.update_connections_list()
+
+    def create_stats_tab(self, parent):
+        """Erstellt die Rangfolge der Verbindungen nach Median der Aufbauzeit und Fehlerquote."""
+        columns = ('profile', 'sessions', 'median_connect', 'failure_rate', 'drops')
+        self.stats_tree = ttk.Treeview(parent, columns=columns, show="headings", selectmode="none")
+        for column, width in zip(columns, (200, 80, 110, 90, 70)):
+            self.stats_tree.column(column, width=width, anchor="w" if column == 'profile' else "e")
+        self._set_stats_headings()
+        self.stats_tree.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+
+        actions = ttk.Frame(parent)
+        actions.pack(fill="x", padx=10, pady=(0, 10))
+        self.stats_sort_var = tk.BooleanVar(value=self.settings["menu_sort_by_ranking"])
+        self.stats_sort_check = ttk.Checkbutton(actions, text=get_text("settings_stats_sort_menu"), variable=self.stats_sort_var,
+                                                command=self.set_menu_sort_by_ranking)
+        self.stats_sort_check.pack(side="left")
+        self.stats_refresh_button = ttk.Button(actions, text=get_text("settings_stats_refresh"), command=self.refresh_connection_stats)
+        self.stats_refresh_button.pack(side="right")
+        self.settings_notebook.bind("<<NotebookTabChanged>>", self._on_settings_tab_changed)
+
+    def _on_settings_tab_changed(self, event=None):
+        """Fragt die Auswertung erst ab, wenn ihre Registerkarte geöffnet wird."""
+        if self.settings_notebook.index("current") == 1:
+            self.refresh_connection_stats()
+
+    def _set_stats_headings(self):
+        for column in ('profile', 'sessions', 'median_connect', 'failure_rate', 'drops'):
+            self.stats_tree.heading(column, text=get_text(f"settings_stats_{column}"))
+
+    def refresh_connection_stats(self):
+        """Fragt die aktuelle Auswertung des Verlaufs im Hintergrund ab und zeigt sie an."""
+        version = self.connection_ranking_version
+        self.load_connection_stats(lambda stats: self._show_connection_stats(stats, version))
+
+    def _show_connection_stats(self, stats, version):
+        """Trägt die Auswertung in die Registerkarte ein, falls das Fenster noch offen ist."""
+        if version == self.connection_ranking_version:
+            self.connection_ranking = {entry['profile']: position for position, entry in enumerate(stats)}
+        if not self.settings_window or not self.settings_window.winfo_exists():
+            return
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for entry in stats:
+            median = f"{entry['median_connect'] * 1000:.0f} ms" if entry['median_connect'] is not None else '-'
+            self.stats_tree.insert('', tk.END, values=(
+                entry['profile'], entry['sessions'], median, f"{entry['failure_rate'] * 100:.0f} %", entry['drops']
+            ))
+
+    def set_menu_sort_by_ranking(self):
+        """Ordnet das Tray-Menü nach der Rangfolge oder wieder in der Reihenfolge des Imports."""
+        self.settings["menu_sort_by_ranking"] = self.stats_sort_var.get()
+        self.save_settings()
+        self.invalidate_connection_ranking()
+
+    def _refresh_metrics_overlay(self):
+        """Zeigt p50/p95 der gemessenen Phasen an und aktualisiert die Anzeige jede Sekunde."""
+        if not self.settings_window or not self.settings_window.winfo_exists():
+            return
+        summary = self.service.metrics_summary()
+        if self.service.remote:
+            # Menü, Icon und Einstellungen misst das Tray-Icon selbst
+            summary.update(METRICS.summary())
+        lines = [
+            get_text("settings_metrics_line", phase=phase, p50=values['p50'] * 1000, p95=values['p95'] * 1000, count=values['count'])
+            for phase, values in sorted(summary.items()) if values['count']
+        ]
+        self.metrics_label.config(text="\n".join(lines) or get_text("settings_metrics_empty"))
+        self.settings_window.after(1000, self._refresh_metrics_overlay)
+
     def update_settings_ui(self):
         """Aktualisiert alle UI-Elemente im Einstellungsfenster basierend auf der aktuellen Sprache."""
         if not self.settings_window or not self.settings_window.winfo_exists():
             return
             
         self.settings_window.title(get_text("win_title_settings"))
-        self.settings_window.children['!labelframe'].config(text=get_text("settings_path_frame"))
-        self.settings_window.children['!labelframe2'].config(text=get_text("settings_language_frame"))
-        self.settings_window.children['!labelframe3'].config(text=get_text("settings_import_frame"))
-        self.settings_window.children['!labelframe4'].config(text=get_text("settings_connections_frame"))
+        self.settings_notebook.tab(0, text=get_text("settings_tab_general"))
+        self.settings_notebook.tab(1, text=get_text("settings_tab_statistics"))
+        self._set_stats_headings()
+        self.stats_sort_check.config(text=get_text("settings_stats_sort_menu"))
+        self.stats_refresh_button.config(text=get_text("settings_stats_refresh"))
+        self.settings_general_tab.children['!labelframe'].config(text=get_text("settings_path_frame"))
+        self.settings_general_tab.children['!labelframe2'].config(text=get_text("settings_language_frame"))
+        self.settings_general_tab.children['!labelframe3'].config(text=get_text("settings_import_frame"))
+        self.settings_general_tab.children['!labelframe4'].config(text=get_text("settings_connections_frame"))
+        self.settings_general_tab.children['!labelframe5'].config(text=get_text("settings_details_frame"))
+        if self.settings["debug_overlay"]:
+            self.settings_general_tab.children['!labelframe6'].config(text=get_text("settings_metrics_frame"))
+        self.reconnect_frame.config(text=get_text("settings_reconnect_frame"))
+        self.stall_timeout_label.config(text=get_text("settings_stall_timeout_label"))
+        self.stall_timeout_hint.config(text=get_text("settings_stall_timeout_hint"))
         
         # Labels und Buttons
-        self.settings_window.children['!labelframe'].children['!button'].config(text=get_text("settings_path_button"))
-        self.settings_window.children['!labelframe2'].children['!label'].config(text=get_text("settings_language_label"))
-        self.settings_window.children['!labelframe3'].children['!label'].config(text=get_text("settings_import_name_label"))
-        self.settings_window.children['!labelframe3'].children['!button'].config(text=get_text("settings_import_button"))
-        self.settings_window.children['!labelframe4'].children['!frame'].children['!button'].config(text=get_text("settings_connections_delete"))
-        self.settings_window.children['!labelframe4'].children['!frame'].children['!button2'].config(text=get_text("settings_connections_rename"))
-        self.settings_window.children['!labelframe4'].children['!frame'].children['!button3'].config(text=get_text("settings_connections_edit"))
+        self.settings_general_tab.children['!labelframe'].children['!button'].config(text=get_text("settings_path_button"))
+        self.settings_general_tab.children['!labelframe2'].children['!label'].config(text=get_text("settings_language_label"))
+        self.settings_general_tab.children['!labelframe3'].children['!label'].config(text=get_text("settings_import_name_label"))
+        self.settings_general_tab.children['!labelframe3'].children['!button'].config(text=get_text("settings_import_button"))
+        self.settings_general_tab.children['!labelframe3'].children['!button2'].config(text=get_text("settings_import_folder_button"))
+        self.settings_general_tab.children['!labelframe3'].children['!button3'].config(text=get_text("settings_import_archive_button"))
+        self.settings_general_tab.children['!labelframe4'].children['!frame'].children['!button'].config(text=get_text("settings_connections_delete"))
+        self.settings_general_tab.children['!labelframe4'].children['!frame'].children['!button2'].config(text=get_text("settings_connections_rename"))
+        self.settings_general_tab.children['!labelframe4'].children['!frame'].children['!button3'].config(text=get_text("settings_connections_edit"))
+        self.settings_general_tab.children['!labelframe4'].children['!frame2'].children['!label'].config(text=get_text("settings_connections_search"))
         
 
+    def set_stall_timeout(self, event=None):
+        """Übernimmt die Zeit ohne Ausgabe, nach der eine Verbindung neu gestartet wird (gilt ab der nächsten Verbindung)."""
+        try:
+            stall_timeout = max(0, int(self.stall_timeout_var.get()))
+        except ValueError:
+            stall_timeout = self.settings["reconnect"].get("stall_timeout", DEFAULT_RECONNECT_POLICY["stall_timeout"])
+        self.stall_timeout_var.set(str(stall_timeout))
+        if self.settings["reconnect"].get("stall_timeout", DEFAULT_RECONNECT_POLICY["stall_timeout"]) != stall_timeout:
+            self.settings["reconnect"]["stall_timeout"] = stall_timeout
+            self.save_settings()
+
     def update_wiresock_path(self):
         """Aktualisiert den Pfad zur Wiresock-Installation und speichert ihn."""
         new_path = self.path_entry.get().strip()
@@ -609,10 +5004,106 @@ class WiresockApp:
             messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_path_invalid"))
 
     def update_connections_list(self):
-        """Aktualisiert die Listbox mit den importierten Verbindungen."""
-        self.connections_listbox.delete(0, tk.END)
-        for name in self.settings["configs"]:
-            self.connections_listbox.insert(tk.END, name)
+        """Füllt die Liste der Verbindungen mit den Treffern des Suchfelds."""
+        if self.connection_search is None:
+            self.connection_search = ConnectionSearchIndex()
+            self.connection_search.rebuild(self.settings["configs"], self.config_index)
+        self.connections_list.set_items(self.connection_search.search(self.connection_search_var.get()))
+
+    def update_connection_rows(self, added=(), removed=(), changed=()):
+        """Übernimmt einzelne hinzugefügte, entfernte oder geänderte Verbindungen in Suchindex und Liste."""
+        search = self.connection_search
+        if search is None:
+            return
+        for name in removed:
+            search.remove(name)
+        for name in list(added) + list(changed):
+            search.add(name, self.config_index.get(self.settings["configs"][name]))
+        if not self.settings_window or not self.settings_window.winfo_exists():
+            return
+        query = self.connection_search_var.get()
+        for name in removed:
+            self.connections_list.remove(name)
+        for name in list(added) + list(changed):
+            listed = name in self.connections_list.items
+            if search.matches(name, query):
+                if not listed:
+                    self.connections_list.insert(search.insert_index(self.connections_list.items, name), name)
+            elif listed:
+                self.connections_list.remove(name)
+        self.show_connection_details()
+
+    def _on_configs_changed(self, added, modified, removed):
+        """Wird vom ConfigWatcher im Hintergrund aufgerufen; die Änderungen werden im UI-Thread übernommen."""
+        self.root.after(0, self._apply_config_changes, added, modified, removed)
+
+    def _apply_config_changes(self, added, modified, removed):
+        """Übernimmt geänderte Dateien im configs-Verzeichnis in Einstellungen, Index, Menü und Listbox.
+
+        Import, Löschen und Umbenennen laufen ebenfalls im UI-Thread; ihre eigenen
+        Dateien sind hier bereits in den Einstellungen eingetragen bzw. entfernt.
+        """
+        names_by_file = {file_name: name for name, file_name in self.settings["configs"].items()}
+        new_names = []
+        for file_name in sorted(added):
+            if file_name in names_by_file or not self.config_index.update(file_name):
+                continue
+            name = self.get_unique_config_name(os.path.splitext(file_name)[0])
+            self.settings["configs"][name] = file_name
+            new_names.append(name)
+
+        changed_names = []
+        for file_name in modified:
+            if file_name in names_by_file:
+                self.config_index.update(file_name)
+                changed_names.append(names_by_file[file_name])
+
+        removed_names = []
+        for file_name in removed:
+            self.config_index.remove(file_name)
+            name = names_by_file.get(file_name)
+            if name is None:
+                continue
+            del self.settings["configs"][name]
+            self.settings["config_groups"].pop(name, None)
+            if self.settings["startup_config"] == name:
+                self.settings["startup_config"] = None
+            removed_names.append(name)
+
+        if not (new_names or changed_names or removed_names):
+            return
+        if changed_names or removed_names:
+            # Endpunkte können sich geändert haben; Messungen von "Schnellste verbinden" verwerfen
+            self.latency_prober.invalidate()
+        if new_names or removed_names:
+            self.save_settings()
+        self.update_connection_rows(added=new_names, removed=removed_names, changed=changed_names)
+        self.invalidate_menu_entries(set(new_names) | set(changed_names) | set(removed_names))
+
+    def show_connection_details(self, event=None):
+        """Zeigt die indexierten Felder und Probleme der ausgewählten Verbindung an."""
+        name = self.connections_list.selected
+        if not name:
+            self.connection_details_label.config(text="")
+            return
+        file_name = self.settings["configs"].get(name)
+        entry = self.config_index.get(file_name) or self.config_index.update(file_name)
+        if not entry:
+            self.connection_details_label.config(text=get_text("msg_box_config_not_found", name=name))
+            return
+
+        text = get_text(
+            "settings_details_text",
+            endpoint=entry['endpoint'] or '-',
+            allowed_ips=entry['allowed_ips'] or '-',
+            dns=entry['dns'] or '-',
+            mtu=entry['mtu'] or '-',
+            peers=len(entry['peers'])
+        )
+        if entry['errors']:
+            errors = ', '.join(get_text(f"config_error_{code}") for code in entry['errors'])
+            text += '\n' + get_text("settings_details_errors", errors=errors)
+        self.connection_details_label.config(text=text)
 
     def update_startup_dropdown(self):
         """Diese Methode ist jetzt leer, da die Autostart-Funktion entfernt wurde."""
@@ -631,10 +5122,8 @@ class WiresockApp:
         if not file_path:
             return
 
-        config_name = self.config_name_entry.get().strip()
-        if not config_name:
-            messagebox.showwarning(get_text("msg_box_title_warning"), get_text("msg_box_name_required"))
-            return
+        # Ohne eingegebenen Namen wird der Dateiname verwendet
+        config_name = self.config_name_entry.get().strip() or os.path.splitext(os.path.basename(file_path))[0]
 
         # Überprüfen, ob der Name bereits existiert
         if config_name in self.settings["configs"]:
@@ -642,39 +5131,165 @@ class WiresockApp:
             return
 
         try:
-            filename = os.path.basename(file_path)
+            # Vorhandene Dateien mit gleichem Namen nicht überschreiben
+            filename = self.get_unique_config_filename(os.path.basename(file_path))
             destination = os.path.join(self.configs_dir, filename)
             
             # Kopieren der Datei in das Anwendungsverzeichnis
             with open(file_path, 'rb') as src, open(destination, 'wb') as dst:
-                dst.write(src.read())
+                shutil.copyfileobj(src, dst)
 
             self.settings["configs"][config_name] = filename
             self.save_settings()
-            self.update_connections_list()
-            self.update_tray_menu()
+            self.config_index.update(filename)
+            self.update_connection_rows(added=[config_name])
+            self.invalidate_menu()
             self.update_startup_dropdown()
             messagebox.showinfo(get_text("msg_box_title_success"), get_text("msg_box_import_success", name=config_name))
         except Exception as e:
             messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_import_error", error=e))
 
+    def get_unique_config_filename(self, filename, reserved=()):
+        """Gibt einen Dateinamen im configs-Verzeichnis zurück, der noch nicht belegt ist."""
+        stem, ext = os.path.splitext(filename)
+        candidate = filename
+        counter = 2
+        while candidate in reserved or os.path.exists(os.path.join(self.configs_dir, candidate)):
+            candidate = f"{stem}-{counter}{ext}"
+            counter += 1
+        return candidate
+
+    def get_unique_config_name(self, name):
+        """Hängt eine Nummer an den Namen an, falls er bereits vergeben ist."""
+        candidate = name
+        counter = 2
+        while candidate in self.settings["configs"]:
+            candidate = f"{name} ({counter})"
+            counter += 1
+        return candidate
+
+    def import_config_folder(self):
+        """Importiert alle .conf-Dateien aus einem Verzeichnis (inkl. Unterverzeichnissen)."""
+        folder = filedialog.askdirectory(title=get_text("settings_import_folder_title"))
+        if folder:
+            self.start_bulk_import(folder)
+
+    def import_config_archive(self):
+        """Importiert alle .conf-Dateien aus einem ZIP-Archiv."""
+        archive_path = filedialog.askopenfilename(
+            title=get_text("settings_import_archive_title"),
+            filetypes=[(get_text("settings_archive_file_type"), "*.zip")]
+        )
+        if archive_path:
+            self.start_bulk_import(archive_path)
+
+    def start_bulk_import(self, source_path):
+        """Startet den Import eines Verzeichnisses oder Archivs im Hintergrund."""
+        threading.Thread(target=self._bulk_import_worker, args=(source_path,), daemon=True).start()
+
+    def _bulk_import_worker(self, source_path):
+        """Kopiert und validiert alle Konfigurationen parallel in temporäre Dateien."""
+        import zipfile
+        results = []
+        try:
+            if zipfile.is_zipfile(source_path):
+                with zipfile.ZipFile(source_path) as archive:
+                    members = [m for m in archive.infolist() if not m.is_dir() and m.filename.lower().endswith('.conf')]
+                    results = self._copy_configs_parallel(
+                        [(m.filename, functools.partial(archive.open, m)) for m in members]
+                    )
+            else:
+                sources = []
+                for dir_path, _, file_names in os.walk(source_path):
+                    for file_name in sorted(file_names):
+                        if file_name.lower().endswith('.conf'):
+                            full_path = os.path.join(dir_path, file_name)
+                            relative_path = os.path.relpath(full_path, source_path).replace(os.sep, '/')
+                            sources.append((relative_path, functools.partial(open, full_path, 'rb')))
+                results = self._copy_configs_parallel(sources)
+        except Exception as e:
+            self.root.after(0, messagebox.showerror, get_text("msg_box_title_error"), get_text("msg_box_import_error", error=e))
+            return
+        self.root.after(0, self._finish_bulk_import, results)
+
+    def _copy_configs_parallel(self, sources):
+        """Kopiert und validiert (Pfad, Öffner)-Paare auf einem Worker-Pool.
+
+        Gibt eine Liste aus (relativer Pfad, temporäre Datei, Eintrag, Fehler) zurück.
+        """
+        import concurrent.futures
+
+        def copy_one(index, relative_path, opener):
+            temp_path = os.path.join(self.configs_dir, f".import-{os.getpid()}-{index}.tmp")
+            try:
+                with opener() as source:
+                    entry, errors = copy_config_file(source, temp_path)
+            except Exception as e:
+                entry, errors = None, [str(e)]
+            if errors and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return relative_path, temp_path, entry, errors
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as pool:
+            futures = [pool.submit(copy_one, i, path, opener) for i, (path, opener) in enumerate(sources)]
+            return [future.result() for future in futures]
+
+    def _finish_bulk_import(self, results):
+        """Übernimmt die validierten Dateien, verwirft Duplikate und zeigt eine Zusammenfassung."""
+        known_hashes = self.config_index.known_hashes()
+        imported = []
+        duplicates = 0
+        invalid = []
+        for relative_path, temp_path, entry, errors in results:
+            if errors:
+                invalid.append((relative_path, errors))
+                continue
+            if entry['hash'] in known_hashes:
+                duplicates += 1
+                os.remove(temp_path)
+                continue
+            known_hashes.add(entry['hash'])
+
+            # Name aus dem relativen Pfad ableiten; Unterverzeichnisse werden zu Gruppen
+            name = self.get_unique_config_name(os.path.splitext(relative_path)[0])
+            filename = self.get_unique_config_filename(os.path.basename(relative_path))
+            os.replace(temp_path, os.path.join(self.configs_dir, filename))
+            self.settings["configs"][name] = filename
+            self.config_index.put(filename, entry)
+            imported.append(name)
+
+        if imported:
+            self.save_settings()
+            self.update_connection_rows(added=imported)
+            self.invalidate_menu()
+            self.update_startup_dropdown()
+
+        report = get_text("msg_box_bulk_import_summary", imported=len(imported), duplicates=duplicates, invalid=len(invalid))
+        for relative_path, errors in invalid[:IMPORT_REPORT_MAX_LINES]:
+            reasons = ', '.join(get_text(f"config_error_{code}") if f"config_error_{code}" in CATALOG else code for code in errors)
+            report += '\n' + get_text("msg_box_bulk_import_invalid_entry", file=relative_path, errors=reasons)
+        if len(invalid) > IMPORT_REPORT_MAX_LINES:
+            report += '\n...'
+        messagebox.showinfo(get_text("msg_box_title_import"), report)
+
     def delete_config(self):
         """Löscht die ausgewählte Konfigurationsdatei und den Eintrag."""
-        selected_name = self.connections_listbox.get(tk.ACTIVE)
+        selected_name = self.connections_list.selected
         if not selected_name:
             messagebox.showwarning(get_text("msg_box_title_warning"), get_text("msg_box_select_connection_delete"))
             return
 
         if messagebox.askyesno(get_text("msg_box_title_confirm"), get_text("msg_box_delete_confirm", name=selected_name)):
             filename_to_delete = self.settings["configs"].pop(selected_name, None)
+            self.settings["config_groups"].pop(selected_name, None)
             
             # Standardverbindung zurücksetzen, wenn sie gelöscht wurde
             if self.settings["startup_config"] == selected_name:
                 self.settings["startup_config"] = None
                 
             self.save_settings()
-            self.update_connections_list()
-            self.update_tray_menu()
+            self.update_connection_rows(removed=[selected_name])
+            self.invalidate_menu()
             self.update_startup_dropdown()
             messagebox.showinfo(get_text("msg_box_title_success"), get_text("msg_box_delete_success", name=selected_name))
             # Löschen der physischen Datei
@@ -682,10 +5297,11 @@ class WiresockApp:
                 file_path = os.path.join(self.configs_dir, filename_to_delete)
                 if os.path.exists(file_path):
                     os.remove(file_path)
+                self.config_index.remove(filename_to_delete)
 
     def rename_config(self):
         """Ermöglicht das Umbenennen einer ausgewählten Verbindung."""
-        selected_name = self.connections_listbox.get(tk.ACTIVE)
+        selected_name = self.connections_list.selected
         if not selected_name:
             messagebox.showwarning(get_text("msg_box_title_warning"), get_text("msg_box_select_connection_rename"))
             return
@@ -698,20 +5314,23 @@ class WiresockApp:
 
             filename = self.settings["configs"].pop(selected_name)
             self.settings["configs"][new_name] = filename
+            if selected_name in self.settings["config_groups"]:
+                self.settings["config_groups"][new_name] = self.settings["config_groups"].pop(selected_name)
             
             # Standardverbindung aktualisieren, falls umbenannt
             if self.settings["startup_config"] == selected_name:
                 self.settings["startup_config"] = new_name
             
             self.save_settings()
-            self.update_connections_list()
-            self.update_tray_menu()
+            self.update_connection_rows(removed=[selected_name], added=[new_name])
+            self.connections_list.select(new_name)
+            self.invalidate_menu()
             self.update_startup_dropdown()
             messagebox.showinfo(get_text("msg_box_title_success"), get_text("msg_box_rename_success", old_name=selected_name, new_name=new_name))
 
     def edit_config(self):
         """Öffnet die ausgewählte Konfigurationsdatei in einem Texteditor."""
-        selected_name = self.connections_listbox.get(tk.ACTIVE)
+        selected_name = self.connections_list.selected
         if not selected_name:
             messagebox.showwarning(get_text("msg_box_title_warning"), get_text("msg_box_select_connection_edit"))
             return
@@ -732,23 +5351,160 @@ class WiresockApp:
             messagebox.showerror(get_text("msg_box_title_error"), get_text("msg_box_open_error", error=e))
 
     def run_default_on_startup(self):
-        """Stellt die Standardverbindung her, wenn der Autostart aktiviert ist."""
-        if self.settings["autostart_enabled"] and self.settings["startup_config"]:
-            self.root.after(500, self.connect, self.settings["startup_config"])
+        """Startet die Standardverbindung sofort, wenn der Autostart aktiviert ist.
+
+        Meldungen und Statusfenster folgen, sobald die Hauptschleife läuft. Läuft ein
+        eigener Dienst, stellt dieser die Standardverbindung selbst her.
+        """
+        config_name = self.settings["startup_config"]
+        if not (self.settings["autostart_enabled"] and config_name) or self.service.remote:
+            return
+        # Ohne Wiresock meldet sich die Installationsprüfung
+        if self.settings["backend"] == 'wiresock' and not os.path.exists(self.settings["wiresock_path"]):
+            return
+        error = self.service.connect(config_name)
+        self.root.after(0, self._finish_connect, config_name, error)
+
+
+def start_metrics_exporter(settings, app_dir):
+    """Startet den Export der Messwerte laut metrics_file/metrics_port; ohne beide None."""
+    file_path = settings["metrics_file"]
+    port = settings["metrics_port"]
+    if not file_path and not port:
+        return None
+    if file_path:
+        file_path = os.path.join(app_dir, file_path)
+    exporter = MetricsExporter(METRICS, file_path, port)
+    exporter.start()
+    return exporter
+
+def run_daemon(app_dir):
+    """Verwaltet die Verbindungen ohne Oberfläche und nimmt Befehle über den Steuer-Endpunkt entgegen."""
+    import multiprocessing.connection
+    import signal
+    address = get_ipc_address()
+    authkey = get_ipc_key(app_dir)
+    try:
+        ControlClient(address, authkey).close()
+        print(f"{APP_NAME} läuft bereits ({address}).", file=sys.stderr)
+        return 1
+    except (OSError, EOFError, multiprocessing.AuthenticationError):
+        pass
+
+    settings_store = SettingsStore(os.path.join(app_dir, SETTINGS_FILE))
+    settings = apply_settings_defaults(settings_store.load())
+    configs_dir = os.path.join(app_dir, 'configs')
+    config_index = ConfigIndex(configs_dir, os.path.join(app_dir, CONFIG_INDEX_FILE))
+    config_index.load()
+    service = TunnelService(settings, configs_dir, settings_store=settings_store, log_dir=os.path.join(app_dir, SESSION_LOG_DIR),
+                            history_path=os.path.join(app_dir, HISTORY_FILE), config_index=config_index)
+    # Ereignisse zeilenweise als JSON protokollieren
+    service.subscribe(lambda event: print(json.dumps(event), flush=True))
+    server = ControlServer(service, address, authkey)
+    server.start()
+    metrics_exporter = start_metrics_exporter(settings, app_dir)
+
+    if settings["autostart_enabled"] and settings["startup_config"]:
+        service.connect(settings["startup_config"])
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    try:
+        while not stop_event.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        service.disconnect(wait=True)
+        service.close()
+        config_index.store.flush()
+        if metrics_exporter:
+            metrics_exporter.stop()
+    return 0
+
+def run_ctl(app_dir, args):
+    """Sendet einen Befehl an den laufenden Dienst und gibt die Antwort als JSON aus.
+
+    Bei "subscribe" werden die Ereignisse fortlaufend zeilenweise ausgegeben.
+    "session_log <id> [start]" gibt die gespeicherten Zeilen einer Sitzung aus.
+    """
+    import multiprocessing.connection
+    if args[0] == 'session_log':
+        try:
+            request = {"id": int(args[1]), "start": int(args[2]) if len(args) > 2 else 0}
+        except (IndexError, ValueError):
+            print("Aufruf: --ctl session_log <id> [start]", file=sys.stderr)
+            return 2
+    else:
+        request = {"name": args[1]} if len(args) > 1 else {}
+    try:
+        client = ControlClient(get_ipc_address(), get_ipc_key(app_dir))
+    except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+        print(f"{APP_NAME} ist nicht erreichbar: {e}", file=sys.stderr)
+        return 2
+    with client:
+        response = client.request(args[0], **request)
+        if args[0] == 'subscribe' and response["ok"]:
+            try:
+                while True:
+                    print(json.dumps(client.receive()), flush=True)
+            except (OSError, EOFError, KeyboardInterrupt):
+                return 0
+    print(json.dumps(response, indent=4))
+    return 0 if response["ok"] else 1
 
 
 if __name__ == '__main__':
+    app_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+    # Dienst ohne Oberfläche bzw. Steuerung eines laufenden Dienstes für Skripte
+    if sys.argv[1:2] == ['--daemon']:
+        sys.exit(run_daemon(app_dir))
+    if sys.argv[1:2] == ['--ctl'] and len(sys.argv) > 2:
+        sys.exit(run_ctl(app_dir, sys.argv[2:]))
+    # Sprachdateien prüfen (z.B. vor dem Erstellen eines Releases)
+    if sys.argv[1:2] == ['--check-translations']:
+        problems = check_translations(os.path.join(app_dir, LANG_DIR))
+        for problem in problems:
+            print(problem)
+        sys.exit(1 if problems else 0)
+
+    # Dauer der Startphasen ausgeben
+    startup_timer = StartupTimer(enabled='--startup-timing' in sys.argv[1:])
+    startup_timer.mark('module_imports')
+
+    # Nur ein Tray-Icon je Benutzer: ein weiterer Start reicht --connect/--settings weiter
+    # und endet, bevor Tkinter, Pillow und pystray geladen werden
+    instance_request = parse_instance_request(sys.argv[1:])
+    instance_guard = InstanceGuard(app_dir)
+    if not instance_guard.acquire():
+        import multiprocessing.connection
+        try:
+            response = instance_guard.forward(instance_request)
+        except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+            print(f"{APP_NAME} läuft bereits, ist aber nicht erreichbar: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not response["ok"]:
+            print(f"{APP_NAME}: {response['error']}", file=sys.stderr)
+        sys.exit(0 if response["ok"] else 1)
+    startup_timer.mark('instance_guard')
+
+    import_gui_modules()
+    startup_timer.mark('gui_imports')
+
     # Laden der Pfadeinstellungen vor dem Installations-Check
     root = tk.Tk()
     root.withdraw()
+    startup_timer.mark('tk_root')
 
-    temp_app = WiresockApp(root)
+    # Die Standardverbindung wird bereits beim Erstellen der Anwendung gestartet
+    temp_app = WiresockApp(root, startup_timer, instance_guard)
+    if '--connect' in sys.argv[1:] or '--settings' in sys.argv[1:]:
+        temp_app.handle_instance_request(instance_request)
     
-    # Prüfen, ob Wiresock installiert ist, bevor die Anwendung startet
-    if check_wiresock_installation(temp_app.settings["wiresock_path"]):
+    # Prüfen, ob Wiresock installiert ist, bevor die Anwendung startet (nur für das Backend wiresock)
+    if temp_app.settings["backend"] != 'wiresock' or check_wiresock_installation(temp_app.settings["wiresock_path"]):
         app = temp_app
-        # Automatische Verbindung bei Start der Anwendung, falls konfiguriert
-        app.run_default_on_startup()
         
         # Tkinter Hauptschleife starten, damit Dialoge und Fenster funktionieren
         root.mainloop()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Ersatz für einen DNS-Server (UDP) für Tests des EndpointResolver.
+
+    python benchmarks/fake_dns_server.py <port> host=adresse [host=adresse ...]
+
+Beantwortet A- und AAAA-Anfragen für die angegebenen Hostnamen, alle anderen
+mit NXDOMAIN. Verhalten laut Umgebungsvariablen:
+
+    FAKE_DNS_TTL    TTL der Antworten in Sekunden (Standard 60)
+    FAKE_DNS_DELAY  Wartezeit vor jeder Antwort in Sekunden
+"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+def parse_question(packet):
+    """Gibt (Name, Typ, Ende der Frage) der ersten Frage zurück."""
+    labels = []
+    offset = 12
+    while packet[offset]:
+        length = packet[offset]
+        labels.append(packet[offset + 1:offset + 1 + length].decode('ascii').lower())
+        offset += length + 1
+    record_type, _ = struct.unpack('!HH', packet[offset + 1:offset + 5])
+    return '.'.join(labels), record_type, offset + 5
+
+def answer(packet, records, ttl):
+    """Erzeugt die Antwort auf eine Anfrage."""
+    query_id = struct.unpack('!H', packet[:2])[0]
+    name, record_type, end = parse_question(packet)
+    if name not in records:
+        return struct.pack('!HHHHHH', query_id, 0x8183, 1, 0, 0, 0) + packet[12:end]
+    answers = []
+    for address in records[name]:
+        family = socket.AF_INET6 if ':' in address else socket.AF_INET
+        if (record_type == 28) != (family == socket.AF_INET6):
+            continue
+        data = socket.inet_pton(family, address)
+        # Name als Zeiger auf die Frage (Offset 12)
+        answers.append(struct.pack('!HHHIH', 0xC00C, record_type, 1, ttl, len(data)) + data)
+    header = struct.pack('!HHHHHH', query_id, 0x8180, 1, len(answers), 0, 0)
+    return header + packet[12:end] + b''.join(answers)
+
+def main(args):
+    if len(args) < 1:
+        print(__doc__.strip().split('\n')[2], file=sys.stderr)
+        return 2
+    records = {}
+    for record in args[1:]:
+        host, _, address = record.partition('=')
+        records.setdefault(host.lower().rstrip('.'), []).append(address)
+    ttl = int(os.environ.get('FAKE_DNS_TTL', '60'))
+    delay = float(os.environ.get('FAKE_DNS_DELAY', '0'))
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', int(args[0])))
+    print(f"fake-dns: listening on 127.0.0.1:{sock.getsockname()[1]}", flush=True)
+
+    def reply(packet, address):
+        time.sleep(delay)
+        sock.sendto(answer(packet, records, ttl), address)
+
+    while True:
+        packet, address = sock.recvfrom(4096)
+        threading.Thread(target=reply, args=(packet, address), daemon=True).start()
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Ersatz für eine WireGuard-Userspace-Implementierung mit UAPI-Steuer-Socket (nur Unix-Sockets).
+
+Wird über die Einstellung uapi_command gestartet, z.B.
+["python3", "benchmarks/fake_uapi_server.py", "{socket}"], und beantwortet
+get- und set-Anfragen wie wireguard-go, ohne Pakete zu übertragen. Verhalten
+laut Umgebungsvariablen; alle Zeiten in Sekunden:
+
+    FAKE_UAPI_STARTUP_DELAY    Wartezeit bis zum Anlegen des Steuer-Sockets
+    FAKE_UAPI_HANDSHAKE_DELAY  Wartezeit zwischen set und dem ersten Handshake
+    FAKE_UAPI_HANDSHAKE        0, um nie einen Handshake zu melden
+    FAKE_UAPI_RATE             Bytes pro Sekunde, um die rx_bytes je Peer wachsen (tx ein Fünftel)
+"""
+
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+def env_float(name, default):
+    """Liest eine Zahl aus der Umgebung."""
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+class FakeDevice:
+    """Zustand eines Interfaces: Konfiguration aus set, Handshake und Zähler werden simuliert."""
+
+    def __init__(self):
+        self.handshake_delay = env_float('FAKE_UAPI_HANDSHAKE_DELAY', 0.05)
+        self.handshake = env_float('FAKE_UAPI_HANDSHAKE', 1) != 0
+        self.rate = env_float('FAKE_UAPI_RATE', 100000)
+        self.interface = {}
+        self.peers = []
+        self.configured_at = None
+        self.lock = threading.Lock()
+
+    def set(self, pairs):
+        """Übernimmt eine set-Anfrage; gibt die errno der Antwort zurück."""
+        with self.lock:
+            peer = None
+            for key, value in pairs:
+                if key == 'public_key':
+                    peer = {'public_key': value, 'allowed_ip': []}
+                    self.peers.append(peer)
+                elif key == 'replace_peers':
+                    self.peers = []
+                elif key == 'allowed_ip' and peer is not None:
+                    peer['allowed_ip'].append(value)
+                elif key == 'replace_allowed_ips':
+                    pass
+                elif peer is not None:
+                    peer[key] = value
+                elif key in ('private_key', 'listen_port', 'fwmark'):
+                    self.interface[key] = value
+                else:
+                    return 22  # EINVAL
+            self.configured_at = time.time()
+        return 0
+
+    def get(self):
+        """Gibt die Zeilen einer get-Antwort zurück."""
+        now = time.time()
+        with self.lock:
+            lines = [f"{key}={value}" for key, value in self.interface.items()]
+            connected = self.handshake and self.configured_at and now - self.configured_at >= self.handshake_delay
+            for peer in self.peers:
+                lines.extend(f"{key}={value}" for key, value in peer.items() if key != 'allowed_ip')
+                lines.extend(f"allowed_ip={network}" for network in peer['allowed_ip'])
+                if connected:
+                    handshake_at = self.configured_at + self.handshake_delay
+                    rx = int((now - handshake_at) * self.rate)
+                    lines += [f"last_handshake_time_sec={int(handshake_at)}", "last_handshake_time_nsec=0",
+                              f"rx_bytes={rx}", f"tx_bytes={rx // 5}"]
+                else:
+                    lines += ["last_handshake_time_sec=0", "last_handshake_time_nsec=0", "rx_bytes=0", "tx_bytes=0"]
+                lines.append("protocol_version=1")
+        return lines
+
+def serve(conn, device):
+    """Beantwortet die Anfragen einer Verbindung."""
+    with conn, conn.makefile('rwb') as stream:
+        while True:
+            operation = stream.readline().decode('utf-8').rstrip('\n')
+            if not operation:
+                return
+            pairs = []
+            while True:
+                line = stream.readline().decode('utf-8').rstrip('\n')
+                if not line:
+                    break
+                key, _, value = line.partition('=')
+                pairs.append((key, value))
+            if operation == 'get=1':
+                response = device.get() + ['errno=0']
+            elif operation == 'set=1':
+                response = [f"errno={device.set(pairs)}"]
+            else:
+                response = ['errno=22']
+            stream.write(('\n'.join(response) + '\n\n').encode('utf-8'))
+            stream.flush()
+
+def main(args):
+    if len(args) != 1:
+        print("Aufruf: fake_uapi_server.py <socket-pfad>", file=sys.stderr)
+        return 2
+    path = args[0]
+    time.sleep(env_float('FAKE_UAPI_STARTUP_DELAY', 0.0))
+    device = FakeDevice()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if os.path.exists(path):
+        os.remove(path)
+    server.bind(path)
+    server.listen()
+
+    def shutdown(signum, frame):
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, shutdown)
+    print(f"fake-uapi: listening on {path}", flush=True)
+    while True:
+        conn, _ = server.accept()
+        threading.Thread(target=serve, args=(conn, device), daemon=True).start()
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Skriptbarer Ersatz für wiresock-client für die Benchmarks.
+
+Wird wie das Original aufgerufen (run -config <Datei>) und verhält sich laut
+Umgebungsvariablen; alle Zeiten in Sekunden:
+
+    FAKE_WIRESOCK_STARTUP_DELAY    Wartezeit bis zur ersten Ausgabe
+    FAKE_WIRESOCK_BURST_LINES      Zeilen, die vor dem Handshake so schnell wie möglich ausgegeben werden
+    FAKE_WIRESOCK_HANDSHAKE_DELAY  Wartezeit zwischen erster Ausgabe und Handshake
+    FAKE_WIRESOCK_HANDSHAKE        0, um nie einen Handshake zu melden
+    FAKE_WIRESOCK_OUTPUT_RATE      Zeilen pro Sekunde nach dem Handshake (mit Zählerständen)
+    FAKE_WIRESOCK_CRASH_AFTER      Beendet sich so lange nach dem Handshake mit FAKE_WIRESOCK_EXIT_CODE
+    FAKE_WIRESOCK_EXIT_CODE        Exit-Code beim Absturz (Standard 1)
+    FAKE_WIRESOCK_SHUTDOWN_DELAY   Wartezeit nach SIGTERM bis zum Beenden (Abbau des Tunnels; nicht unter Windows)
+    FAKE_WIRESOCK_LIFETIME         Maximale Laufzeit, damit verwaiste Prozesse sich selbst beenden
+"""
+
+import os
+import signal
+import sys
+import time
+
+def env_float(name, default):
+    """Liest eine Zahl aus der Umgebung."""
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+def main(args):
+    startup_delay = env_float('FAKE_WIRESOCK_STARTUP_DELAY', 0.0)
+    burst_lines = int(env_float('FAKE_WIRESOCK_BURST_LINES', 0))
+    handshake_delay = env_float('FAKE_WIRESOCK_HANDSHAKE_DELAY', 0.05)
+    handshake = env_float('FAKE_WIRESOCK_HANDSHAKE', 1) != 0
+    output_rate = env_float('FAKE_WIRESOCK_OUTPUT_RATE', 0.0)
+    crash_after = env_float('FAKE_WIRESOCK_CRASH_AFTER', 0.0)
+    exit_code = int(env_float('FAKE_WIRESOCK_EXIT_CODE', 1))
+    lifetime = env_float('FAKE_WIRESOCK_LIFETIME', 600.0)
+    shutdown_delay = env_float('FAKE_WIRESOCK_SHUTDOWN_DELAY', 0.0)
+    config = args[args.index('-config') + 1] if '-config' in args else '?'
+    out = sys.stdout
+    if shutdown_delay and hasattr(signal, 'SIGTERM'):
+        def on_terminate(signum, frame):
+            time.sleep(shutdown_delay)
+            sys.exit(0)
+        signal.signal(signal.SIGTERM, on_terminate)
+
+    time.sleep(startup_delay)
+    out.write(f"fake-wiresock: loading configuration {config}\n")
+    for i in range(burst_lines):
+        out.write(f"fake-wiresock: debug line {i}\n")
+    out.flush()
+    if not handshake:
+        time.sleep(lifetime)
+        return 0
+
+    time.sleep(handshake_delay)
+    out.write("Handshake response received\n")
+    out.flush()
+
+    connected_at = time.monotonic()
+    interval = 1 / output_rate if output_rate else None
+    rx = tx = 0
+    while True:
+        elapsed = time.monotonic() - connected_at
+        if crash_after and elapsed >= crash_after:
+            out.write("fake-wiresock: simulated crash\n")
+            out.flush()
+            return exit_code
+        if elapsed >= lifetime:
+            return 0
+        if interval:
+            rx += 1500
+            tx += 300
+            out.write(f"fake-wiresock: peer stats rx_bytes={rx} tx_bytes={tx}\n")
+            out.flush()
+            time.sleep(interval)
+        else:
+            time.sleep(min(0.1, crash_after - elapsed) if crash_after else 0.1)
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except (BrokenPipeError, KeyboardInterrupt):
+        sys.exit(0)
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""Benchmarks für SimpleSock mit einem skriptbaren Ersatz für wiresock-client.
+
+Misst Verbindungsaufbau (auch über das Backend 'uapi' mit fake_uapi_server.py),
+Trennen, Wechsel der Verbindung, Neustart nach einem Absturz, Auflösung der
+Endpunkte (fake_dns_server.py), Durchsatz der Ausgabe bis ins Statusfenster,
+Aufbau des Tray-Menüs und Speichern der Einstellungen.
+Läuft ohne Windows und ohne WireSock; fake_wiresock_client.py spielt den
+Client. Die Ergebnisse werden an RESULTS_FILE angehängt und mit dem letzten
+Lauf verglichen, damit Verschlechterungen zwischen Versionen auffallen.
+
+    python benchmarks/run_benchmarks.py [--quick] [--only connect,menu] [--fail-on-regression]
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_FILE = os.path.join(BENCH_DIR, 'results.jsonl')
+FAKE_CLIENT = os.path.join(BENCH_DIR, 'fake_wiresock_client.py')
+FAKE_UAPI_SERVER = os.path.join(BENCH_DIR, 'fake_uapi_server.py')
+FAKE_DNS_SERVER = os.path.join(BENCH_DIR, 'fake_dns_server.py')
+REGRESSION_THRESHOLD = 0.2  # Relative Verschlechterung, ab der ein Ergebnis markiert wird
+
+# Die Tray-Einträge werden nur erzeugt, nie angezeigt
+os.environ.setdefault('PYSTRAY_BACKEND', 'dummy')
+sys.path.insert(0, REPO_DIR)
+import SimpleSock as S  # noqa: E402
+
+class StateWaiter:
+    """Sammelt die Zustandswechsel eines TunnelService und wartet auf bestimmte Zustände."""
+
+    def __init__(self, service):
+        self.events = []
+        self._condition = threading.Condition()
+        service.subscribe(self._on_event)
+
+    def _on_event(self, event):
+        with self._condition:
+            self.events.append((time.perf_counter(), event))
+            self._condition.notify_all()
+
+    def wait(self, tunnel, states, after, timeout=30):
+        """Gibt den Zeitpunkt zurück, an dem tunnel nach after einen der Zustände erreicht hat."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                for stamp, event in self.events:
+                    if stamp >= after and event.get("tunnel") == tunnel and event["state"] in states:
+                        return stamp
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"{tunnel} hat {states} nicht erreicht")
+                self._condition.wait(remaining)
+
+class Workspace:
+    """Temporäres Anwendungsverzeichnis mit Konfigurationen und einem Starter für den Ersatz-Client."""
+
+    def __init__(self):
+        self.dir = tempfile.mkdtemp(prefix='simplesock-bench-')
+        self.configs_dir = os.path.join(self.dir, 'configs')
+        os.makedirs(self.configs_dir)
+        self.client_path = self._write_launcher()
+
+    def _write_launcher(self):
+        """TunnelSession startet wiresock_path direkt, daher ein ausführbarer Starter für das Skript."""
+        if sys.platform == 'win32':
+            path = os.path.join(self.dir, 'wiresock-client.cmd')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f'@"{sys.executable}" "{FAKE_CLIENT}" %*\n')
+        else:
+            path = os.path.join(self.dir, 'wiresock-client')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_CLIENT}" "$@"\n')
+            os.chmod(path, 0o755)
+        return path
+
+    def make_configs(self, count, split_routes=False):
+        """Legt count Konfigurationen an und gibt Name -> Dateiname zurück.
+
+        Ohne split_routes leiten alle Konfigurationen den gesamten Verkehr um und
+        überschneiden sich damit, mit split_routes hat jede ein eigenes Netz.
+        """
+        configs = {}
+        for i in range(count):
+            suffix = '-split' if split_routes else ''
+            file_name = f'bench{i}{suffix}.conf'
+            allowed_ips = f'10.{100 + i // 250}.{i % 250}.0/24' if split_routes else '0.0.0.0/0'
+            path = os.path.join(self.configs_dir, file_name)
+            if not os.path.exists(path):
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(f'[Interface]\nPrivateKey = key{i}\nAddress = 10.0.{i // 250}.{i % 250 + 1}/32\n\n'
+                            f'[Peer]\nPublicKey = peer{i}\nEndpoint = 127.0.0.1:{20000 + i}\nAllowedIPs = {allowed_ips}\n')
+            configs[f'Bench {i:05d}{suffix}'] = file_name
+        return configs
+
+    def make_service(self, configs, **settings):
+        """Erzeugt einen TunnelService, der den Ersatz-Client startet."""
+        settings = S.apply_settings_defaults(dict(settings, configs=configs, wiresock_path=self.client_path, language='en'))
+        config_index = S.ConfigIndex(self.configs_dir, os.path.join(self.dir, S.CONFIG_INDEX_FILE))
+        config_index.load()
+        service = S.TunnelService(settings, self.configs_dir, config_index=config_index)
+        return service, StateWaiter(service)
+
+    def make_app(self, configs):
+        """Erzeugt eine WiresockApp nur mit dem Zustand, den Menü und Statusfenster brauchen (ohne Tk und Tray-Icon)."""
+        app = S.WiresockApp.__new__(S.WiresockApp)
+        app.service, _ = self.make_service(configs)
+        app.settings = app.service.settings
+        app.config_index = app.service.config_index
+        # Ohne Abonnenten: Menü und Icon lesen nur den Zustand, gezeichnet wird nichts
+        app.state_store = S.StateStore()
+        app.state_store.reset(app.service.status())
+        app.menu_cache = {}
+        app.group_items_cache = {}
+        app.connect_section = None
+        app.connect_item_names = {}
+        app.disconnect_item_names = {}
+        app.connection_groups = None
+        return app
+
+    def close(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def fake_client(**options):
+    """Setzt das Verhalten des Ersatz-Clients für alle danach gestarteten Prozesse."""
+    for key in [k for k in os.environ if k.startswith(('FAKE_WIRESOCK_', 'FAKE_UAPI_'))]:
+        del os.environ[key]
+    for key, value in options.items():
+        # uapi_* gilt für fake_uapi_server.py, alles andere für fake_wiresock_client.py
+        name = key.upper() if key.startswith('uapi_') else f'WIRESOCK_{key.upper()}'
+        os.environ[f'FAKE_{name}'] = str(value)
+
+def describe(values, scale=1000):
+    """Fasst Messwerte (Sekunden) als Millisekunden zusammen."""
+    values = sorted(values)
+    return {
+        'p50_ms': round(statistics.median(values) * scale, 3),
+        'p95_ms': round(values[round(0.95 * (len(values) - 1))] * scale, 3),
+        'min_ms': round(values[0] * scale, 3),
+    }
+
+def bench_connect(workspace, iterations):
+    """Zeit von connect() bis zum Zustand 'connected' und von disconnect() bis zum Ende des Prozesses."""
+    fake_client(handshake_delay=0.05)
+    service, waiter = workspace.make_service(workspace.make_configs(1))
+    connect_times, disconnect_times = [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        error = service.connect('Bench 00000')
+        if error:
+            raise RuntimeError(error)
+        connect_times.append(waiter.wait('Bench 00000', (S.STATE_CONNECTED,), start) - start)
+        start = time.perf_counter()
+        service.disconnect('Bench 00000', wait=True)
+        disconnect_times.append(time.perf_counter() - start)
+    return {
+        'connect_latency': dict(describe(connect_times), handshake_delay_ms=50),
+        'disconnect_latency': describe(disconnect_times),
+    }
+
+def bench_switch(workspace, iterations):
+    """Zeit vom Wechsel auf eine andere Verbindung bis zu deren Zustand 'connected'.
+
+    switch_time misst sich überschneidende Konfigurationen (erst trennen, dann
+    verbinden), fast_switch_time solche mit getrennten Routen, bei denen die alte
+    Verbindung bis zum Handshake der neuen bestehen bleibt. Der Ersatz-Client
+    braucht dabei wie ein echter Client etwas Zeit zum Beenden.
+    """
+    fake_client(handshake_delay=0.05, shutdown_delay=0.3)
+    results = {}
+    for metric, split_routes in (('switch_time', False), ('fast_switch_time', True)):
+        configs = workspace.make_configs(2, split_routes=split_routes)
+        service, waiter = workspace.make_service(configs, multiple_tunnels=False)
+        names = list(configs)
+        start = time.perf_counter()
+        service.connect(names[0])
+        waiter.wait(names[0], (S.STATE_CONNECTED,), start)
+        times = []
+        for i in range(iterations):
+            name = names[(i + 1) % 2]
+            start = time.perf_counter()
+            service.connect(name)
+            times.append(waiter.wait(name, (S.STATE_CONNECTED,), start) - start)
+        service.disconnect(wait=True)
+        results[metric] = dict(describe(times), handshake_delay_ms=50, shutdown_delay_ms=300)
+    return results
+
+def bench_reconnect(workspace, iterations):
+    """Zeit von einem Absturz des Clients bis zur erneuten Verbindung, ohne die Backoff-Wartezeit."""
+    fake_client(handshake_delay=0.05, crash_after=0.2)
+    policy = dict(S.DEFAULT_RECONNECT_POLICY, base_delay=0.01, max_delay=0.01, max_restarts=iterations + 1)
+    service, waiter = workspace.make_service(workspace.make_configs(1), reconnect=policy)
+    service.connect('Bench 00000')
+    after = time.perf_counter()
+    times = []
+    for _ in range(iterations):
+        crashed = waiter.wait('Bench 00000', (S.STATE_RECONNECTING,), after)
+        delay = next(event["detail"] for stamp, event in waiter.events if stamp == crashed)
+        after = waiter.wait('Bench 00000', (S.STATE_CONNECTED,), crashed)
+        times.append(after - crashed - delay)
+    service.disconnect(wait=True)
+    return {'reconnect_time': dict(describe(times), handshake_delay_ms=50)}
+
+def bench_uapi(workspace, iterations):
+    """Verbindungsaufbau über das Backend 'uapi' mit fake_uapi_server.py als Userspace-Implementierung (nur Unix)."""
+    if sys.platform == 'win32':
+        return {}
+    fake_client(uapi_handshake_delay=0.05)
+    S.UAPI_SOCKET_DIR = workspace.dir
+    path = os.path.join(workspace.configs_dir, 'uapi.conf')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'[Interface]\nPrivateKey = {base64.b64encode(os.urandom(32)).decode()}\nAddress = 10.0.0.2/32\n\n'
+                f'[Peer]\nPublicKey = {base64.b64encode(os.urandom(32)).decode()}\nEndpoint = 127.0.0.1:51820\nAllowedIPs = 0.0.0.0/0\n')
+    service, waiter = workspace.make_service({'UAPI': 'uapi.conf'}, backend='uapi',
+                                             uapi_command=[sys.executable, FAKE_UAPI_SERVER, '{socket}'])
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        error = service.connect('UAPI')
+        if error:
+            raise RuntimeError(error)
+        times.append(waiter.wait('UAPI', (S.STATE_CONNECTED,), start) - start)
+        service.disconnect('UAPI', wait=True)
+    return {'uapi_connect_latency': dict(describe(times), handshake_delay_ms=50)}
+
+def bench_dns(workspace, iterations):
+    """Auflösung eines Endpunkts über fake_dns_server.py (20 ms Verzögerung): ohne, mit gültigem und mit abgelaufenem Eintrag."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, FAKE_DNS_DELAY='0.02', FAKE_DNS_TTL='60')
+    server = subprocess.Popen([sys.executable, FAKE_DNS_SERVER, str(port), 'vpn.bench.test=192.0.2.1'], env=env, stdout=subprocess.PIPE)
+    try:
+        server.stdout.readline()
+        cold, warm, stale = [], [], []
+        for _ in range(iterations):
+            resolver = S.EndpointResolver(f'127.0.0.1:{port}')
+            for times in (cold, warm):
+                start = time.perf_counter()
+                resolver.lookup('vpn.bench.test')
+                times.append(time.perf_counter() - start)
+            resolver._cache['vpn.bench.test']['expires'] = 0
+            start = time.perf_counter()
+            resolver.lookup('vpn.bench.test')
+            stale.append(time.perf_counter() - start)
+    finally:
+        server.kill()
+        server.wait()
+    return {
+        'dns_lookup_cold': describe(cold),
+        'dns_lookup_cached': describe(warm),
+        'dns_lookup_stale': describe(stale),
+    }
+
+def bench_log_throughput(workspace, lines):
+    """Durchsatz der Ausgabe vom Prozess bis ins Statusfenster, abgeholt im Takt von STATUS_REFRESH_MS.
+
+    Mit Display werden die Zeilen wie im Statusfenster in ein Tk-Textfeld
+    eingefügt, sonst wird nur bis zum Abholen aus dem Puffer gemessen.
+    """
+    fake_client(burst_lines=lines, handshake_delay=0)
+    app = workspace.make_app(workspace.make_configs(1))
+    service, waiter = app.service, StateWaiter(app.service)
+    root = create_tk_root()
+    if root:
+        app.status_window = S.tk.Toplevel(root)
+        app.status_text = S.tk.Text(app.status_window)
+    start = time.perf_counter()
+    service.connect('Bench 00000')
+    received = dropped = 0
+    done = False
+    while not done:
+        time.sleep(S.STATUS_REFRESH_MS / 1000)
+        done = any(event.get("state") == S.STATE_CONNECTED for _, event in waiter.events)
+        chunk, chunk_dropped = service.drain_log('Bench 00000')
+        received += len(chunk)
+        dropped += chunk_dropped
+        if root and chunk:
+            app._update_status_text('\n'.join(chunk) + '\n')
+            root.update()
+    elapsed = time.perf_counter() - start
+    service.disconnect(wait=True)
+    if root:
+        root.destroy()
+    return {'log_throughput': {
+        'lines_per_s': round((received + dropped) / elapsed),
+        'dropped_lines': dropped,
+        'lines': lines,
+        'widget': bool(root),
+    }}
+
+def create_tk_root():
+    """Erzeugt ein verstecktes Tk-Hauptfenster, falls ein Display vorhanden ist."""
+    try:
+        root = S.tk.Tk()
+    except S.tk.TclError:
+        return None
+    root.withdraw()
+    return root
+
+def bench_menu(workspace, sizes, repeat):
+    """Aufbau des Tray-Menüs (ohne Cache) und Aufklappen aller Untermenüs abhängig von der Zahl der Verbindungen."""
+    results = {}
+    for size in sizes:
+        app = workspace.make_app(workspace.make_configs(size))
+        build_times, expand_times = [], []
+        for _ in range(repeat):
+            app.invalidate_menu()
+            start = time.perf_counter()
+            menu = app.create_menu_items()
+            build_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            for item in menu.items:
+                if item.submenu:
+                    tuple(item.submenu.items)
+            expand_times.append(time.perf_counter() - start)
+        results[f'menu_rebuild_{size}'] = dict(describe(build_times), expand_p50_ms=describe(expand_times)['p50_ms'])
+    return results
+
+def bench_settings(workspace, sizes, repeat):
+    """Schreiben der Einstellungen (flush) abhängig von der Zahl der Verbindungen."""
+    results = {}
+    for size in sizes:
+        store = S.SettingsStore(os.path.join(workspace.dir, f'settings-{size}.json'))
+        store.data = S.apply_settings_defaults({'configs': {f'Bench {i:05d}': f'bench{i}.conf' for i in range(size)}})
+        times = []
+        for i in range(repeat):
+            store.data["startup_config"] = f'Bench {i % max(size, 1):05d}-{i}'
+            start = time.perf_counter()
+            store.flush()
+            times.append(time.perf_counter() - start)
+        results[f'settings_save_{size}'] = dict(describe(times), bytes=os.path.getsize(store.path))
+    return results
+
+BENCHMARKS = {
+    'connect': lambda ws, quick: bench_connect(ws, 5 if quick else 20),
+    'switch': lambda ws, quick: bench_switch(ws, 5 if quick else 20),
+    'uapi': lambda ws, quick: bench_uapi(ws, 5 if quick else 20),
+    'dns': lambda ws, quick: bench_dns(ws, 5 if quick else 20),
+    'reconnect': lambda ws, quick: bench_reconnect(ws, 3 if quick else 10),
+    'log': lambda ws, quick: bench_log_throughput(ws, 50000 if quick else 500000),
+    'menu': lambda ws, quick: bench_menu(ws, (10, 100, 1000) if quick else (10, 100, 1000, 5000), 3 if quick else 10),
+    'settings': lambda ws, quick: bench_settings(ws, (10, 1000) if quick else (10, 100, 1000, 10000), 5 if quick else 20),
+}
+
+def git_revision():
+    """Gibt den aktuellen Commit zurück, falls das Repository verfügbar ist."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_previous(path, quick):
+    """Gibt den letzten gespeicherten Lauf mit denselben Größen (--quick) zurück."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    runs = [run for run in runs if run.get('quick') == quick]
+    return runs[-1] if runs else None
+
+def compare(previous, results, threshold):
+    """Vergleicht p50 bzw. Durchsatz mit dem letzten Lauf und gibt die Verschlechterungen zurück."""
+    regressions = []
+    for name, metrics in results.items():
+        old = (previous or {}).get('results', {}).get(name)
+        if not old:
+            continue
+        for key, higher_is_better in (('p50_ms', False), ('lines_per_s', True)):
+            if key not in metrics or not old.get(key):
+                continue
+            change = (metrics[key] - old[key]) / old[key]
+            if higher_is_better:
+                change = -change
+            if change > threshold:
+                regressions.append(f"{name}.{key}: {old[key]} -> {metrics[key]} ({change:+.0%})")
+    return regressions
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--quick', action='store_true', help='weniger Wiederholungen und kleinere Größen')
+    parser.add_argument('--only', help='Kommagetrennte Auswahl aus ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--results', default=RESULTS_FILE, help='Datei, an die die Ergebnisse angehängt werden')
+    parser.add_argument('--no-save', action='store_true', help='Ergebnisse nicht speichern')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit-Code 1 bei einer Verschlechterung')
+    args = parser.parse_args(argv)
+
+    selected = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unbekannte Benchmarks: {', '.join(unknown)}")
+
+    S.import_gui_modules()
+    S.CATALOG.load('en', os.path.join(REPO_DIR, S.LANG_DIR))
+    workspace = Workspace()
+    results = {}
+    try:
+        for name in selected:
+            print(f"{name} ...", flush=True)
+            results.update(BENCHMARKS[name](workspace, args.quick))
+    finally:
+        fake_client()
+        workspace.close()
+
+    for name, metrics in results.items():
+        print(f"  {name:24} " + '  '.join(f"{key}={value}" for key, value in metrics.items()))
+
+    run = {
+        'version': S.APP_VERSION,
+        'revision': git_revision(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'results': results,
+    }
+    regressions = compare(load_previous(args.results, args.quick), results, args.threshold)
+    for regression in regressions:
+        print(f"Verschlechterung: {regression}")
+    if not args.no_save:
+        with open(args.results, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run) + '\n')
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))